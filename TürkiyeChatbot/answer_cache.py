@@ -0,0 +1,131 @@
+"""OpenAI çağrısının önüne konan anlamsal yanıt önbelleği.
+
+Yeni soru, daha önce yanıtlanmış bir soruya kosinüs benzerliği eşik değerin
+üzerindeyse kayıtlı yanıt ve kaynakları döndürülür. Kayıtların bir yaşam
+süresi (TTL) vardır; doküman index'inin sürümü değişince önbellek boşaltılır.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    sources: list
+    created_at: float = field(default_factory=time.time)
+
+
+class SemanticAnswerCache:
+    """Soru embedding'i ile anahtarlanan yanıt önbelleği."""
+
+    def __init__(self, threshold=0.95, ttl=24 * 3600, maxsize=1000, index_version=None, clock=time.time):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.index_version = index_version
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._clear()
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype="float32").reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _clear(self):
+        # Vektörler maxsize satırlık halka tampondadır; ilk put'ta boyuta göre ayrılır.
+        # _head en eski kaydın satırı, _used şimdiye kadar yazılmış satır sayısıdır.
+        self._vectors = None
+        self._entries = [None] * self.maxsize
+        self._live = np.zeros(self.maxsize, dtype=bool)
+        self._head = 0
+        self._size = 0
+        self._used = 0
+
+    def _check_version(self, index_version):
+        # Kilit altında çağrılır
+        if index_version != self.index_version:
+            self._clear()
+            self.index_version = index_version
+
+    def _pop_oldest(self):
+        self._entries[self._head] = None
+        self._live[self._head] = False
+        self._head = (self._head + 1) % self.maxsize
+        self._size -= 1
+
+    def _drop_expired(self):
+        # Kayıtlar ekleme sırasıyla tutulduğu için süresi dolanlar baştadır
+        now = self._clock()
+        while self._size and now - self._entries[self._head].created_at > self.ttl:
+            self._pop_oldest()
+
+    def get(self, vector, index_version=None):
+        """En benzer kayıt eşiği geçiyorsa CachedAnswer, yoksa None döndürür."""
+        query = self._unit(vector)
+        with self._lock:
+            self._check_version(index_version)
+            self._drop_expired()
+            if self._size and self._vectors.shape[1] == len(query):
+                scores = self._vectors[:self._used] @ query
+                scores[~self._live[:self._used]] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return self._entries[best]
+            self.misses += 1
+            return None
+
+    def put(self, vector, question, answer, sources, index_version=None):
+        query = self._unit(vector)
+        with self._lock:
+            self._check_version(index_version)
+            entry = CachedAnswer(question, answer, list(sources), self._clock())
+            if self.maxsize <= 0:
+                return entry
+            if self._vectors is None or self._vectors.shape[1] != len(query):
+                self._clear()
+                self._vectors = np.zeros((self.maxsize, len(query)), dtype="float32")
+            if self._size == self.maxsize:
+                self._pop_oldest()
+            slot = (self._head + self._size) % self.maxsize
+            # Satır yerinde yazılır; matris kopyalanmaz
+            self._vectors[slot] = query
+            self._entries[slot] = entry
+            self._live[slot] = True
+            self._size += 1
+            self._used = max(self._used, slot + 1)
+            return entry
+
+    def get_or_compute(self, vector, question, compute, index_version=None):
+        """Önbellekte yoksa compute() -> (yanıt, kaynaklar) çağrılır ve sonuç saklanır.
+
+        (CachedAnswer, önbellekten_mi) döndürür. compute() hata fırlatırsa
+        hiçbir şey saklanmaz.
+        """
+        cached = self.get(vector, index_version)
+        if cached is not None:
+            return cached, True
+        answer, sources = compute()
+        return self.put(vector, question, answer, sources, index_version), False
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "index_version": self.index_version,
+            }
@@ -0,0 +1,326 @@
+"""asyncio tabanlı HTTP API (aiohttp).
+
+Uç noktalar:
+    POST /retrieve  {"question": "...", "top_k": 3}  -> eşleşen pasajlar
+    POST /ask       {"question": "...", "session_id": "..."} -> yanıt ve kaynaklar
+                    (session_id isteğe bağlı; verilirse takip soruları sohbet geçmişiyle yanıtlanır)
+                    İki uç nokta da isteğe bağlı "collection" alır (bkz. collection.py);
+                    verilmezse varsayılan index aranır, bilinmeyen koleksiyon 404 döner.
+    GET  /collections  derlenmiş koleksiyonlar ve bellekteki parçalar
+    GET  /health   canlılık; yükleme durumu ve açılış süreleri
+    GET  /ready    motor yüklenip ısınana kadar 503
+    GET  /metrics  aşama süresi histogramları ve önbellek sayaçları (Prometheus)
+
+Embedding ve FAISS araması sınırlı bir iş parçacığı havuzunda çalışır;
+LLM çağrıları bağlantı havuzlu tek bir AsyncOpenAI istemcisinden geçer
+(süre sınırı, yeniden deneme ve devre kesiciyle; bkz. llm_client.py).
+Aynı anda işlenen istek sayısı ve bekleme kuyruğu sınırlıdır; kuyruk
+doluysa istek 503 ile hemen reddedilir. Sunucu hemen dinlemeye başlar;
+model ve index arka planda yüklenip ısınana kadar istekler 503 alır.
+
+Kullanım:
+    python api_server.py [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+from aiohttp import web
+
+from config import (
+    API_MAX_INFLIGHT, API_MAX_QUEUE, API_WORKERS, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, FAKE_LLM,
+    LLM_MAX_CONNECTIONS, LLM_TIMEOUT, MAX_TOP_K,
+)
+from llm_client import create_async_client as create_resilient_client
+from metrics import CONTENT_TYPE, METRICS
+from resources import REGISTRY
+
+
+class Overloaded(Exception):
+    """Bekleme kuyruğu dolu."""
+
+
+class AdmissionLimiter:
+    """En fazla max_inflight istek işlenir, en fazla max_queue istek bekler."""
+
+    def __init__(self, max_inflight, max_queue):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.inflight = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_inflight)
+
+    async def __aenter__(self):
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.inflight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.inflight -= 1
+        self._semaphore.release()
+
+
+def create_async_client(max_connections=LLM_MAX_CONNECTIONS, timeout=LLM_TIMEOUT):
+    """Tüm istekler arasında paylaşılan, bağlantı havuzlu AsyncOpenAI istemcisi.
+
+    Süre sınırı, yeniden deneme, devre kesici ve aynı istemlerin birleştirilmesi
+    llm_client.AsyncResilientClient'tadır.
+    """
+    if FAKE_LLM:
+        from fake_llm import FakeAsyncClient
+        return FakeAsyncClient("Bu yanıt sahte istemci tarafından üretildi.", 0.3, 0.03)
+    return create_resilient_client(api_key=os.getenv("OPENAI_API_KEY"), max_connections=max_connections,
+                                   timeout=timeout)
+
+
+class RagService:
+    """RagEngine'i asyncio dünyasına bağlar."""
+
+    def __init__(self, engine, async_client, workers=API_WORKERS):
+        self.engine = engine
+        self.client = async_client
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def retrieve(self, question, top_k=None, collection=None):
+        if collection is not None:
+            # Parçalara dağıtım kendi havuzunda paraleldir; toplayıcı yalnızca varsayılan index'i tanır
+            return await self._run(self.engine.retrieve, question, top_k, collection)
+        batcher = self.engine.batcher
+        if batcher is not None:
+            self.engine.refresh()
+            # Toplayıcı kendi iş parçacığında çalışır; havuzdan iş parçacığı harcamadan beklenir
+            return await asyncio.wrap_future(batcher.submit(question, top_k or self.engine.top_k))
+        return await self._run(self.engine.retrieve, question, top_k)
+
+    async def embed(self, question):
+        batcher = self.engine.batcher
+        if batcher is not None:
+            return await asyncio.wrap_future(batcher.submit(question))
+        return await self._run(self.engine.embed, question)
+
+    async def ask(self, question, session=None, collection=None):
+        engine = self.engine
+        answer_cache, version = engine.answer_cache_for(collection)
+        # Motorun senkron istemcisi yok: takip soruları ve özetler kurallarla oluşturulur
+        conversation, query = engine.start_turn(question, session)
+        query_embedding = None
+        if answer_cache is not None:
+            query_embedding = await self.embed(query)
+            cached = answer_cache.get(query_embedding, version)
+            if cached is not None:
+                await self._run(engine.finish_turn, conversation, question, query, cached.answer)
+                return {"answer": cached.answer, "sources": cached.sources, "cached": True, "query": query}
+
+        passages = await self.retrieve(query, collection=collection)
+        context = engine.build_context(passages)
+        with METRICS.span("llm_total"):
+            response = await self.client.chat.completions.create(
+                model=engine.llm_model, messages=engine.build_messages(query, context, conversation, collection)
+            )
+        answer = response.choices[0].message.content
+        sources = context.sources
+        if answer_cache is not None:
+            answer_cache.put(query_embedding, query, answer, sources, version)
+        await self._run(engine.finish_turn, conversation, question, query, answer)
+        return {"answer": answer, "sources": sources, "cached": False, "context_tokens": context.tokens,
+                "query": query}
+
+    async def close(self):
+        if self.engine is not None and self.engine.batcher is not None:
+            self.engine.batcher.close()
+        self.executor.shutdown(wait=False)
+        await self.client.close()
+
+
+async def _read_question(request):
+    try:
+        body = await request.json()
+    except Exception:
+        raise web.HTTPBadRequest(text="Geçersiz JSON")
+    question = str(body.get("question", "")).strip()
+    if not question:
+        raise web.HTTPBadRequest(text="'question' alanı boş olamaz")
+    return question, body
+
+
+# web.Application'a konan nesneler (dizge anahtarlar aiohttp'de NotAppKeyWarning verir)
+SERVICE_KEY = web.AppKey("service", RagService)
+LIMITER_KEY = web.AppKey("limiter", AdmissionLimiter)
+
+
+def _top_k(service, body):
+    """İstekteki top_k; tamsayı değilse ya da 1'den küçükse 400, MAX_TOP_K'ye kırpılır."""
+    value = body.get("top_k")
+    if value is None:
+        return service.engine.top_k
+    # bool int'in alt sınıfıdır; 2.5 ya da "5" gibi değerler sessizce çevrilmez
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise web.HTTPBadRequest(text="'top_k' bir tamsayı olmalı")
+    if value < 1:
+        raise web.HTTPBadRequest(text="'top_k' en az 1 olmalı")
+    return min(value, MAX_TOP_K)
+
+
+def _collection(service, body):
+    """İstekteki koleksiyon adı (yoksa None); bilinmeyen ad 404."""
+    name = body.get("collection")
+    if name is None:
+        return None
+    name = str(name)
+    collections = service.engine.collections
+    if collections is None or name not in collections:
+        raise web.HTTPNotFound(text=f"Koleksiyon bulunamadı: {name}")
+    return name
+
+
+def create_app(service, max_inflight=API_MAX_INFLIGHT, max_queue=API_MAX_QUEUE, readiness=None):
+    """readiness verilirse (startup.Readiness) motor hazır olana kadar istekler 503 alır."""
+    limiter = AdmissionLimiter(max_inflight, max_queue)
+    routes = web.RouteTableDef()
+
+    def starting():
+        if readiness is None or readiness.ready:
+            return None
+        return web.json_response({**readiness.status(), "error": readiness.error or "Sunucu hazırlanıyor"},
+                                 status=503,
+                                 headers={"Retry-After": "1"})
+
+    async def guarded(coro_fn):
+        try:
+            async with limiter:
+                return web.json_response(await coro_fn())
+        except Overloaded:
+            return web.json_response({"error": "Sunucu meşgul"}, status=503, headers={"Retry-After": "1"})
+
+    @routes.post("/retrieve")
+    async def retrieve(request):
+        question, body = await _read_question(request)
+        response = starting()
+        if response is not None:
+            return response
+        top_k = _top_k(service, body)
+        collection = _collection(service, body)
+
+        async def run():
+            passages = await service.retrieve(question, top_k, collection)
+            return {"passages": [asdict(p) for p in passages]}
+
+        return await guarded(run)
+
+    @routes.post("/ask")
+    async def ask(request):
+        question, body = await _read_question(request)
+        response = starting()
+        if response is not None:
+            return response
+        session = body.get("session_id")
+        collection = _collection(service, body)
+        return await guarded(lambda: service.ask(question, str(session) if session else None, collection))
+
+    @routes.get("/collections")
+    async def collections(request):
+        response = starting()
+        if response is not None:
+            return response
+        registry = service.engine.collections
+        if registry is None:
+            return web.json_response({"collections": []})
+        return web.json_response({
+            "collections": [{"name": name, "shards": len(c.shards), "passages": c.passages}
+                            for name, c in ((name, registry.get(name)) for name in registry.names())],
+            "resident": registry.cache.stats(),
+        })
+
+    @routes.get("/health")
+    async def health(request):
+        status = {"status": "ok", "inflight": limiter.inflight, "waiting": limiter.waiting,
+                  "rejected": limiter.rejected}
+        if readiness is not None:
+            status["startup"] = readiness.status()
+        if service.engine is not None and service.engine.batcher is not None:
+            status["batcher"] = service.engine.batcher.stats()
+        if hasattr(service.client, "stats"):
+            status["llm"] = service.client.stats()
+        status["memory_mb"] = {name: round(value / 2**20, 1) for name, value in REGISTRY.memory().items()}
+        return web.json_response(status)
+
+    @routes.get("/metrics")
+    async def metrics(request):
+        return web.Response(body=METRICS.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    @routes.get("/ready")
+    async def ready(request):
+        return starting() or web.json_response({"state": "ready"})
+
+    app = web.Application()
+    app.add_routes(routes)
+    app[SERVICE_KEY] = service
+    app[LIMITER_KEY] = limiter
+
+    async def on_cleanup(app):
+        await service.close()
+
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    from dotenv import load_dotenv
+
+    from answer_cache import SemanticAnswerCache
+    from batching import MicroBatcher
+    from conversation import ConversationStore
+    from config import ANSWER_CACHE_SIZE, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, QUERY_CACHE_SIZE
+    from query_cache import EmbeddingCache
+    from rag_engine import RagEngine
+    from startup import Readiness, warm_up
+
+    parser = argparse.ArgumentParser(description="Türkiye Chatbot HTTP API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="Embedding/arama iş parçacığı sayısı")
+    parser.add_argument("--max-inflight", type=int, default=API_MAX_INFLIGHT)
+    parser.add_argument("--max-queue", type=int, default=API_MAX_QUEUE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_MAX_SIZE, help="0 ise toplama kapalı")
+    parser.add_argument("--batch-wait-ms", type=float, default=BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    load_dotenv()
+    service = RagService(None, create_async_client(), args.workers)
+
+    def load():
+        # Eşzamanlı yolda LLM çağrısını servis yapar; motorun senkron istemcisine gerek yok
+        query_cache = EmbeddingCache(QUERY_CACHE_SIZE)
+        engine = RagEngine.from_disk(
+            client=None,
+            query_cache=query_cache,
+            answer_cache=SemanticAnswerCache(ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, ANSWER_CACHE_SIZE),
+            conversations=ConversationStore(),
+        )
+        if args.batch_size > 0:
+            engine.batcher = MicroBatcher(engine.model, engine.handle, args.batch_size,
+                                          args.batch_wait_ms, cache=query_cache)
+        warm_up(engine)
+        service.engine = engine
+        return engine
+
+    # Sunucu hemen dinlemeye başlar; /ready motor ısınınca 200 döner
+    readiness = Readiness().start(load)
+    web.run_app(create_app(service, args.max_inflight, args.max_queue, readiness), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
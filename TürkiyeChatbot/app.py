@@ -6,85 +6,14 @@ except Exception:
     _is_streamlit = False
 
 if _is_streamlit:
+    import runpy
+
     import streamlit as st
-    st.set_page_config(page_title="Türkiye Chatbot", page_icon="🇹🇷", layout="centered")
 
-    from openai import OpenAI
-    import faiss
-    import numpy as np
-    from sentence_transformers import SentenceTransformer
-    from dotenv import load_dotenv
-
-    load_dotenv()
-    api_key = _os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        st.error("❌ OpenAI API Key bulunamadı! Lütfen .env dosyasını kontrol edin.")
-        st.stop()
-
-    client = OpenAI(api_key=api_key)
-
-    @st.cache_resource
-    def load_components():
-        import os
-        # Dosyaların varlığını kontrol et
-        # Streamlit Cloud kök dizinde çalıştığı için TürkiyeChatbot alt klasörünü ekle
-        base_path = "TürkiyeChatbot" if os.path.exists("TürkiyeChatbot") else "."
-        faiss_path = os.path.join(base_path, "turkiye_index.faiss")
-        npy_path = os.path.join(base_path, "turkiye_files.npy")
-        
-        if not os.path.exists(faiss_path):
-            st.error(f"❌ turkiye_index.faiss dosyası bulunamadı!")
-            st.stop()
-        if not os.path.exists(npy_path):
-            st.error(f"❌ turkiye_files.npy dosyası bulunamadı!")
-            st.stop()
-        
-        try:
-            model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
-            index = faiss.read_index(faiss_path)
-            file_names = np.load(npy_path, allow_pickle=True)
-            return model, index, file_names
-        except Exception as e:
-            st.error(f"❌ Model yüklenirken hata: {e}")
-            st.stop()
-
-    if "model" not in st.session_state:
-        st.session_state.model, st.session_state.index, st.session_state.file_names = load_components()
-
-    def get_relevant_texts(query, top_k=2):
-        query_embedding = st.session_state.model.encode([query])
-        distances, indices = st.session_state.index.search(np.array(query_embedding).astype("float32"), top_k)
-        relevant_files = [st.session_state.file_names[i] for i in indices[0]]
-        return relevant_files
-
-    def generate_answer(query):
-        relevant_files = get_relevant_texts(query)
-        context = ""
-        # Streamlit Cloud için dosya yolu
-        docs_path = os.path.join("TürkiyeChatbot", "docs", "temizlenmis") if os.path.exists("TürkiyeChatbot") else "docs/temizlenmis"
-        for f in relevant_files:
-            file_path = os.path.join(docs_path, f)
-            with open(file_path, "r", encoding="utf-8") as file:
-                context += file.read() + "\n\n"
-        if len(context) > 8000:
-            context = context[:8000]
-        prompt = f"Türkiye hakkında bilgiler:\n{context}\nSoru: {query}"
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.choices[0].message.content
-
-    st.title("🇹🇷 Türkiye Bilgi Chatbot")
-    st.write("Temizlenmiş dokümanlardan bilgiye dayalı olarak yanıt verir.")
-    query = st.text_input("Sorunuzu yazın:")
-    if st.button("Sor"):
-        if query:
-            with st.spinner("Yanıt üretiliyor..."):
-                answer = generate_answer(query)
-                st.markdown(f"**Yanıt:**\n\n{answer}")
-        else:
-            st.warning("Lütfen bir soru yazın.")
+    # Arayüz streamlit_app.py'dedir (dayanıklı LLM istemcisi, sohbet geçmişi, koleksiyon
+    # seçimi, hata ayıklama paneli); iki giriş noktası ayrışmasın diye her çalıştırmada aynen yürütülür
+    runpy.run_path(_os.path.join(_os.path.dirname(_os.path.abspath(__file__)), "streamlit_app.py"),
+                   run_name="__main__")
 
     # Streamlit çalışırken aşağıdaki notebook benzeri bölümlerin çalışmasını durdur
     st.stop()
@@ -162,56 +91,10 @@ print(f"Oluşturuldu: {file_path.resolve()}")
 
 
 # Hücre B: turkiye_bilgileri.txt dosyasını '####' başlıklarına göre ayır
-import os
-
-# Girdi dosyası
-input_file = DOCS_DIR / "turkiye_bilgileri.txt"
-
-# Çıktı klasörü
-output_folder = DOCS_DIR / "bolumler"
-os.makedirs(output_folder, exist_ok=True)
-
-# Dosyayı oku
-with open(input_file, "r", encoding="utf-8") as f:
-    content = f.read()
-
-# Bölümleri ayır
-sections = content.split("####")
-for section in sections:
-    section = section.strip()
-    if not section:
-        continue
-
-    lines = section.split("\n")
-    title = lines[0].strip().lower()
-    title = (
-        title.replace("🏛️", "")
-        .replace("📜", "")
-        .replace("⚖️", "")
-        .replace("🗺️", "")
-        .replace("💰", "")
-        .replace("💱", "")
-        .replace("🌍", "")
-        .replace("☀️", "")
-        .replace("🤝", "")
-        .replace("🎭", "")
-        .replace("🎓", "")
-        .replace("🏥", "")
-        .replace("🎨", "")
-        .replace("🏞️", "")
-        .replace("🛰️", "")
-        .replace("🇹🇷", "")
-        .strip()
-        .replace(" ", "_")
-    )
-
-    # Dosya adı oluştur
-    filename = f"turkiye_{title}.txt"
-    filepath = output_folder / filename
+# (başlıklar ingest.normalize_title ile dosya adına çevrilir; emoji vb. Unicode kategorisine göre atılır)
+from ingest import iter_documents, iter_sections, write_documents
 
-    # Bölüm içeriğini kaydet
-    with open(filepath, "w", encoding="utf-8") as out:
-        out.write("\n".join(lines[1:]).strip())
+write_documents(iter_documents(iter_sections(DOCS_DIR / "turkiye_bilgileri.txt")), DOCS_DIR / "bolumler")
 
 print("✅ Bölme tamamlandı! -> 'docs/bolumler' klasörünü kontrol et.")
 
@@ -335,47 +218,23 @@ for soru in sorular:
 
 
 # Hücre C: Veri temizleme işlemleri (lowercase, noktalama kaldırma, stopword çıkarma)
-import os
-import string
-import nltk
-from nltk.corpus import stopwords
-
-# Gerekli verileri indir
-nltk.download("stopwords")
+# Türkçe küçük harf (İ -> i, I -> ı), frozenset stopword filtresi ve
+# süreç havuzunda akış halinde işleme prepare_corpus.py içindedir.
+from prepare_corpus import clean_text, prepare_folder
+from turkish import turkish_stopwords as load_turkish_stopwords
 
-# Türkçe stopword listesi
-turkish_stopwords = stopwords.words("turkish")
+# Türkçe stopword listesi (NLTK; frozenset olduğu için üyelik testi O(1))
+turkish_stopwords = load_turkish_stopwords()
 
 # Girdi ve çıktı klasörleri
 input_folder = DOCS_DIR / "bolumler"
 output_folder = DOCS_DIR / "temizlenmis"
-os.makedirs(output_folder, exist_ok=True)
 
 def temizle_metin(text):
-    # Küçük harfe çevir
-    text = text.lower()
-    # Noktalama kaldır
-    text = text.translate(str.maketrans("", "", string.punctuation))
-    # Stopword temizleme
-    kelimeler = text.split()
-    temiz = [k for k in kelimeler if k not in turkish_stopwords]
-    return " ".join(temiz)
-
-# Her dosyayı sırayla işle
-for filename in os.listdir(input_folder):
-    if filename.endswith(".txt"):
-        input_path = input_folder / filename
-        output_path = output_folder / filename
-
-        with open(input_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        temizlenmis = temizle_metin(content)
-
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(temizlenmis)
+    return clean_text(text, turkish_stopwords)
 
-        print(f"✅ Temizlendi: {filename}")
+stats = prepare_folder(input_folder, output_folder, stopwords=turkish_stopwords)
+print(f"✅ {stats['files']} dosya temizlendi ({stats['bytes'] / 2**20 / stats['seconds']:.1f} MB/s)")
 
 print("\n🎯 Tüm dosyalar temizlenip 'docs/temizlenmis' klasörüne kaydedildi!")
 
@@ -420,21 +279,52 @@ for filename in os.listdir(input_folder):
             texts.append(content)
             file_names.append(filename)
 
-# Embedding oluştur
-embeddings = model.encode(texts)
+# Embedding oluştur (uzunluğa göre sıralı gruplar; sonuç girdi sırasıyla döner)
+from embed_pool import encode_sorted
+
+embeddings = encode_sorted(model, texts, normalize=False)
+
+# FAISS index oluştur (tür TURKIYE_INDEX ile seçilir: flat, ivf, hnsw, pq, ivfpq)
+from config import INDEX_SPEC
+from index_factory import IndexSpec, create_index
 
-# FAISS index oluştur
 dimension = embeddings.shape[1]
-index = faiss.IndexFlatL2(dimension)
+index_spec = IndexSpec.parse(INDEX_SPEC).resolve(len(embeddings), dimension)
+index = create_index(index_spec, dimension, embeddings)
 index.add(np.array(embeddings))
 
-# Kaydet
+# Kaydet (vektör başına dosya, bayt aralığı, başlık ve içerik özeti; pickle'sız ikili metadata)
+import hashlib
+from chunk_meta import write_chunk_meta
+from chunking import section_title
+
 faiss.write_index(index, "turkiye_index.faiss")
-np.save("turkiye_files.npy", np.array(file_names))
+files, chunks = {}, []
+for i, filename in enumerate(file_names):
+    data = (input_folder / filename).read_bytes()
+    files[filename] = hashlib.sha256(data).hexdigest()
+    chunks.append({"id": i, "file": filename, "start": 0, "end": len(data), "title": section_title(filename)})
+write_chunk_meta("turkiye_files.meta", {"model": "paraphrase-multilingual-MiniLM-L12-v2", "source_dir": "docs/temizlenmis",
+                                        "index_params": index_spec.to_dict()},
+                 files, chunks, dimension, normalized=False)
 
 print("✅ Embedding ve FAISS index başarıyla oluşturuldu!")
 
 
+# In[12b]:
+
+
+# Hücre D2: Pasaj (chunk) düzeyinde index
+# Dosyanın tamamı yerine cümle sınırlarından bölünmüş pasajlar gömülür;
+# arama yalnızca eşleşen pasajları döndürür, bağlam kesmeye gerek kalmaz.
+from build_index import build_chunk_index
+
+# Yalnızca yeni ya da değişen dosyalar yeniden gömülür
+chunk_index, chunk_meta, chunk_stats = build_chunk_index(model, DOCS_DIR / "bolumler")
+print(chunk_stats)
+print(f"✅ {chunk_index.ntotal} pasaj index'lendi!")
+
+
 # In[13]:
 
 
@@ -450,7 +340,8 @@ model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
 
 # FAISS ve dosya isimlerini yükle
 index = faiss.read_index("turkiye_index.faiss")
-file_names = np.load("turkiye_files.npy", allow_pickle=True)
+from chunk_meta import ChunkMeta
+file_names = list(ChunkMeta.open("turkiye_files.meta").files)
 
 # Fonksiyon: Kullanıcı sorusuna göre en ilgili dokümanı bul
 def en_ilgili_dosya_bul(soru, top_k=1):
@@ -503,7 +394,8 @@ client = OpenAI(api_key=api_key)
 # Modeli ve FAISS index'i yükle
 model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
 index = faiss.read_index("turkiye_index.faiss")
-file_names = np.load("turkiye_files.npy", allow_pickle=True)
+from chunk_meta import ChunkMeta
+file_names = list(ChunkMeta.open("turkiye_files.meta").files)
 
 # Temizlenmiş dosyaların bulunduğu klasör
 temizlenmis_klasor = DOCS_DIR / "temizlenmis"
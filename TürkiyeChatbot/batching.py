@@ -0,0 +1,159 @@
+"""Eşzamanlı sorgular için mikro-toplama (micro-batching).
+
+Kısa bir pencere içinde gelen sorgular toplanır, tek model.encode ve tek
+index.search çağrısıyla işlenir, sonuçlar her bekleyene kendi Future'ı
+üzerinden dağıtılır. Future'lar hem iş parçacıklarından (.result()) hem de
+asyncio'dan (asyncio.wrap_future) beklenebilir.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from metrics import METRICS
+from retrieval import encode_queries, search_depth, start_lexical, to_passages
+
+
+@dataclass
+class _Request:
+    query: str
+    top_k: int  # None ise yalnızca embedding istenir
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """SentenceTransformer + FAISS önünde toplama zamanlayıcısı.
+
+    Index ve pasaj deposu handle (resources.IndexHandle) üzerinden okunur;
+    index yeniden yüklendiğinde sonraki toplu iş yeni sürümü görür.
+    """
+
+    def __init__(self, model, handle, max_batch_size=32, max_wait_ms=5.0, cache=None):
+        self.model = model
+        self.handle = handle
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache = cache
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._max_depth = 0
+        self._queue_wait_total = 0.0
+        self._items = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    # -----------------------------
+    # Dış arayüz
+    # -----------------------------
+    def submit(self, query, top_k=None):
+        """Sorguyu kuyruğa ekler; top_k=None ise Future embedding vektörüyle tamamlanır."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher kapatıldı")
+        request = _Request(query, top_k)
+        self._queue.put(request)
+        depth = self._queue.qsize()
+        with self._lock:
+            self._max_depth = max(self._max_depth, depth)
+        return request.future
+
+    def search(self, query, top_k):
+        return self.submit(query, top_k).result()
+
+    def embed(self, query):
+        return self.submit(query).result()
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_depth,
+                "batches": batches,
+                "items": self._items,
+                "mean_batch_size": self._items / batches if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "mean_queue_wait_ms": 1000 * self._queue_wait_total / self._items if self._items else 0.0,
+            }
+
+    # -----------------------------
+    # Arka plan döngüsü
+    # -----------------------------
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._closed = True
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # İptal edilmiş istekler atlanır; kalanlar çalışıyor sayılır ve artık iptal edilemez
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                if self._closed and self._queue.empty():
+                    return
+                continue
+            started = time.perf_counter()
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                self._items += len(batch)
+                self._queue_wait_total += sum(started - r.enqueued_at for r in batch)
+            try:
+                self._process(batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+            if self._closed and self._queue.empty():
+                return
+
+    def _process(self, batch):
+        with self.handle.read() as (index, store):
+            self._process_locked(batch, index, store)
+
+    def _process_locked(self, batch, index, store):
+        searches = [i for i, r in enumerate(batch) if r.top_k is not None]
+        depth = search_depth(store, max((batch[i].top_k for i in searches), default=0))
+        lexical = start_lexical(store, [batch[i].query for i in searches], depth) if searches else None
+        embeddings = encode_queries(self.model, [r.query for r in batch], store.normalized, self.cache)
+        if searches:
+            with METRICS.span("search"):
+                distances, indices = index.search(embeddings[searches], depth)
+            with METRICS.span("lexical"):
+                lexical = lexical.result() if lexical is not None else [None] * len(searches)
+            for row, i in enumerate(searches):
+                # Bir isteğin pasaj hatası yalnızca o isteğe yazılır
+                try:
+                    with METRICS.span("passages"):
+                        passages = to_passages(store, distances[row], indices[row], batch[i].top_k, lexical[row])
+                except Exception as e:
+                    batch[i].future.set_exception(e)
+                else:
+                    batch[i].future.set_result(passages)
+        for i, request in enumerate(batch):
+            if request.top_k is None:
+                request.future.set_result(embeddings[i])
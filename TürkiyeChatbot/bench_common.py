@@ -0,0 +1,51 @@
+"""Benchmark ve değerlendirme betiklerinin ortak yardımcıları.
+
+bench_index.py, bench_retrieval.py, bench_load.py, embeddings.py ve
+evaluate.py sonuçlarını aynı tablo biçiminde yazdırır; arama yollarını
+karşılaştıran betikler aynı make_retrievers'ı kullanır.
+"""
+import copy
+
+from bm25 import BM25Index
+
+
+def print_table(rows):
+    """Sözlük satırlarını sütunları hizalı düz metin tablo olarak yazdırır."""
+    if not rows:
+        return
+    columns = list(dict.fromkeys(c for r in rows for c in r))
+    widths = [max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
+
+
+def make_retrievers(model, index, store, bm25=None, cache=None):
+    """Yoğun, BM25 ve hibrit aramayı aynı toplu arayüze getirir.
+
+    Her yol (sorgular, k) -> her sorgu için vektör kimlikleri listesi döndürür.
+    Yoğun ve hibrit yollar uygulamadaki retrieval.search_batch'ten geçer; her
+    biri store'un yalnızca bm25 alanı farklı sığ bir kopyasını kullanır, store
+    değiştirilmez. bm25 verilmezse store'unki, o da yoksa pasajlardan yenisi kullanılır.
+    """
+    from retrieval import search_batch
+
+    bm25 = bm25 or store.bm25 or BM25Index.from_store(store)
+    vector_ids = {(e["file"], e["start"]): e["id"] for e in map(store.entry, store.meta.ids.tolist())}
+
+    def view(lexical):
+        out = copy.copy(store)
+        out.bm25 = lexical
+        return out
+
+    def searcher(target):
+        def retrieve(queries, k):
+            results = search_batch(model, index, target, queries, k, cache)
+            return [[vector_ids[(p.file, p.start)] for p in passages] for passages in results]
+
+        return retrieve
+
+    def lexical(queries, k):
+        return [ids.tolist() for ids, _ in bm25.search_batch(queries, k)]
+
+    return {"dense": searcher(view(None)), "bm25": lexical, "hybrid": searcher(view(bm25))}
@@ -0,0 +1,119 @@
+"""Index türlerini karşılaştırma: recall@k, gecikme ve bellek.
+
+Her index türü aynı vektörler üzerinde kurulur; sonuçlar kaba kuvvet
+(flat) aramasının verdiği gerçek komşularla karşılaştırılır.
+
+Kullanım:
+    python bench_index.py --synthetic 50000 --queries 500 --k 10
+    python bench_index.py --from-index turkiye_chunks.faiss --index flat --index hnsw:m=16
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from bench_common import print_table
+from index_factory import IndexSpec, create_index, index_memory
+
+DEFAULT_SPECS = ["flat", "ivf", "ivf:nprobe=32", "hnsw:m=32", "pq", "ivfpq"]
+
+
+def synthetic_vectors(n, dim, clusters=100, seed=0):
+    """Kümelenmiş, birim uzunlukta rastgele vektörler (cümle embedding'lerine benzer dağılım)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def vectors_from_index(path):
+    """Var olan bir index'teki vektörleri geri okur (flat tabanlı index'ler için)."""
+    index = faiss.read_index(str(path))
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def make_queries(vectors, n, noise=0.1, seed=1):
+    """Korpustaki vektörlerin gürültülü kopyaları; gerçek sorguların belgelere yakınlığını taklit eder."""
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(0, len(vectors), n)] + noise * rng.standard_normal((n, vectors.shape[1]))
+    queries = queries.astype("float32")
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def bench_spec(spec, vectors, queries, truth, k):
+    dim = vectors.shape[1]
+    spec = spec.resolve(len(vectors), dim)
+    started = time.perf_counter()
+    index = create_index(spec, dim, vectors)
+    trained = time.perf_counter()
+    index.add(vectors)
+    added = time.perf_counter()
+
+    latencies = []
+    found = []
+    for q in queries:
+        t = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencies.append(time.perf_counter() - t)
+        found.append(ids[0])
+    t = time.perf_counter()
+    index.search(queries, k)
+    batch = time.perf_counter() - t
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "index": str(spec),
+        "train_s": round(trained - started, 3),
+        "add_s": round(added - trained, 3),
+        f"recall@{k}": round(recall_at_k(np.array(found), truth), 4),
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "batch_qps": round(len(queries) / batch, 1),
+        "memory_mb": round(index_memory(index) / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS index türlerini karşılaştırır")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", type=int, default=20000, help="Rastgele vektör sayısı")
+    source.add_argument("--from-index", help="Vektörleri var olan bir index'ten al")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--index", action="append", help="Denenecek index türü (birden çok verilebilir)")
+    parser.add_argument("--threads", type=int, default=1, help="FAISS iş parçacığı sayısı")
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yazdır")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    vectors = vectors_from_index(args.from_index) if args.from_index else synthetic_vectors(args.synthetic, args.dim)
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    queries = make_queries(vectors, args.queries)
+    k = min(args.k, len(vectors))
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    results = [bench_spec(IndexSpec.parse(s), vectors, queries, truth, k) for s in args.index or DEFAULT_SPECS]
+    if args.json:
+        print(json.dumps(results, indent=1))
+        return
+
+    print(f"{len(vectors)} vektör, boyut {vectors.shape[1]}, {len(queries)} sorgu, k={k}")
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
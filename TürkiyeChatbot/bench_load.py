@@ -0,0 +1,284 @@
+"""Çevrimdışı yük testi: hedef QPS'te arama ve yanıt yolu, temel ölçümle karşılaştırma.
+
+LLM çağrıları yerel, OpenAI uyumlu sahte sunucuya (fake_llm.StubServer)
+gider; gerçek openai istemcisi, HTTP bağlantı havuzu ve SSE akışı
+kullanılır ama ağa ve API anahtarına gerek yoktur. İstekler sabit aralıklı
+(açık döngü) zamanlanır; gecikme isteğin planlanan anından ölçülür, böylece
+kuyrukta bekleme de sayılır.
+
+Aşamalar:
+    retrieve      yalnızca arama (sorgu önbelleği boş başlar)
+    answer        arama + bağlam + akışlı LLM yanıtı (yanıt önbelleği boş)
+    answer-warm   aynı sorular tekrar: yanıt önbelleği isabetleri
+
+Her aşama için p50/p95/p99, gerçekleşen QPS, hata sayısı, CPU (çekirdek)
+ve tepe RSS; ayrıca iç adımların (embed, search, context, llm_ttft...)
+yüzdelikleri yazdırılır.
+
+Kullanım:
+    python bench_load.py --qps 20 --duration 10 --save-baseline bench_baseline.json
+    python bench_load.py --qps 20 --duration 10 --baseline bench_baseline.json   # gerilemede çıkış kodu 1
+    python bench_load.py --phase answer --error-rate 0.2 --jitter 0.1           # LLM hataları ve yeniden deneme
+"""
+import argparse
+import json
+import random
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from answer_cache import SemanticAnswerCache
+from bench_common import print_table
+from config import ANSWER_CACHE_SIZE, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, QUERY_CACHE_SIZE
+from metrics import METRICS
+from query_cache import EmbeddingCache
+from resources import rss_bytes
+
+PHASES = ("retrieve", "answer", "answer-warm")
+# Karşılaştırmada gerileme sayılan ölçümler: (anahtar, büyüme kötü mü). p99 kısa
+# koşularda birkaç örneğe dayandığı için yalnızca raporlanır.
+COMPARED = (("p50_ms", True), ("p95_ms", True), ("qps", False))
+
+
+def make_questions(store, n, rng, words=8):
+    """Pasaj metinlerinden ardışık words kelimelik, birbirinden farklı sorgular.
+
+    Korpus noktalama içermediği için cümle yerine sabit kelime pencereleri
+    kullanılır. Korpus n sorguya yetmezse sorgular tekrar eder.
+    """
+    questions = []
+    for vector_id in store.meta.ids.tolist():
+        tokens = store.text(vector_id).split()
+        questions.extend(" ".join(tokens[i:i + words]) for i in range(0, len(tokens) - words + 1, words))
+    questions = list(dict.fromkeys(questions))
+    rng.shuffle(questions)
+    return [questions[i % len(questions)] for i in range(n)] if questions else []
+
+
+class _Usage:
+    """Aşama boyunca CPU süresi ve örneklenen tepe RSS."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        self._cpu = usage.ru_utime + usage.ru_stime
+        self._wall = time.perf_counter()
+        self.start_rss = rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        self.cpu_seconds = usage.ru_utime + usage.ru_stime - self._cpu
+        self.wall = time.perf_counter() - self._wall
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+    return {"p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2)}
+
+
+def run_phase(fn, questions, qps, concurrency):
+    """questions'ı 1/qps aralıklarla fn'e verir; aşama ölçümlerini döndürür."""
+    interval = 1.0 / qps
+    latencies, stages, errors = [], {}, []
+    lock = threading.Lock()
+
+    def one(question, scheduled):
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        with METRICS.trace() as spans:
+            try:
+                fn(question)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                return
+        latency = time.perf_counter() - scheduled
+        with lock:
+            latencies.append(latency)
+            for name, seconds in spans:
+                stages.setdefault(name, []).append(seconds)
+
+    with _Usage() as usage, ThreadPoolExecutor(concurrency, thread_name_prefix="load") as pool:
+        started = time.perf_counter()
+        for i, question in enumerate(questions):
+            pool.submit(one, question, started + i * interval)
+    return {
+        "requests": len(questions),
+        "errors": len(errors),
+        "qps": round(len(latencies) / usage.wall, 2),
+        **_percentiles(latencies),
+        "cpu_cores": round(usage.cpu_seconds / usage.wall, 2),
+        "rss_mb": round(usage.peak / 2**20, 1),
+        "rss_growth_mb": round((usage.peak - usage.start_rss) / 2**20, 1),
+        "stages": {name: _percentiles(values) for name, values in sorted(stages.items())},
+        "first_errors": errors[:3],
+    }
+
+
+def build_engine(server_url):
+    from llm_client import create_client
+    from rag_engine import RagEngine
+
+    client = create_client(api_key="stub", base_url=server_url)
+    return RagEngine.from_disk(client, query_cache=EmbeddingCache(QUERY_CACHE_SIZE), answer_cache=_answer_cache())
+
+
+def _answer_cache():
+    return SemanticAnswerCache(ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, ANSWER_CACHE_SIZE)
+
+
+def _answer(engine, question):
+    answer = engine.answer_stream(question)
+    if answer.stream is not None:
+        for _ in answer.stream:
+            pass
+
+
+def run(engine, phases, qps, duration, concurrency, seed=0):
+    questions = make_questions(engine.store, max(1, int(qps * duration)), random.Random(seed))
+    if not questions:
+        raise ValueError("Korpustan soru üretilemedi")
+    results = {}
+    for phase in phases:
+        if phase == "retrieve":
+            engine.query_cache.clear()
+            fn = engine.retrieve
+        elif phase == "answer":
+            # SemanticAnswerCache'in clear'ı yok; soğuk aşama boş bir önbellekle başlar
+            engine.answer_cache = _answer_cache()
+            METRICS.watch_cache("answer", engine.answer_cache)
+            fn = lambda q: _answer(engine, q)  # noqa: E731
+        elif phase == "answer-warm":
+            fn = lambda q: _answer(engine, q)  # noqa: E731
+        else:
+            raise ValueError(f"Bilinmeyen aşama '{phase}' (seçenekler: {', '.join(PHASES)})")
+        # İstemci sayaçları süreç boyunca birikir; aşamaya yalnızca kendi payı yazılır
+        llm_before = engine.client.stats() if hasattr(engine.client, "stats") else None
+        results[phase] = run_phase(fn, questions, qps, concurrency)
+        results[phase]["cache"] = METRICS.cache_stats()
+        if llm_before is not None:
+            results[phase]["llm"] = _counter_delta(llm_before, engine.client.stats())
+    return results
+
+
+def _counter_delta(before, after):
+    """Sayısal sayaçların farkı; diğer alanlar (ör. devre kesici durumu) son değerdir."""
+    return {key: value - before.get(key, 0) if isinstance(value, (int, float)) else value
+            for key, value in after.items()}
+
+
+def compare(results, baseline, tolerance, floor_ms=1.0):
+    """Temel ölçüme göre satırlar ve gerileme olup olmadığı.
+
+    Gecikmede hem oran (tolerance) hem de mutlak fark (floor_ms) aşılmalıdır;
+    milisaniye altı aşamalardaki gürültü gerileme sayılmaz.
+    """
+    rows, regressed = [], False
+    for phase, current in results.items():
+        previous = baseline.get("phases", {}).get(phase)
+        if previous is None:
+            continue
+        checks = [(phase, key, current.get(key), previous.get(key), worse) for key, worse in COMPARED]
+        for stage, values in current["stages"].items():
+            old = previous.get("stages", {}).get(stage, {})
+            checks.append((f"{phase}/{stage}", "p95_ms", values["p95_ms"], old.get("p95_ms"), True))
+        for name, key, now, before, worse in checks:
+            if now is None or before is None:
+                continue
+            change = (now - before) / before if before else 0.0
+            if worse:
+                bad = change > tolerance and now - before > floor_ms
+            else:
+                bad = change < -tolerance
+            regressed |= bad
+            rows.append({"ölçüm": f"{name} {key}", "temel": before, "şimdi": now,
+                         "değişim": f"{change:+.0%}", "": "❌" if bad else "✅"})
+    return rows, regressed
+
+
+def main():
+    from fake_llm import StubServer
+
+    parser = argparse.ArgumentParser(description="Sahte LLM sunucusuyla çevrimdışı yük testi")
+    parser.add_argument("--qps", type=float, default=10.0, help="Hedef istek/s")
+    parser.add_argument("--duration", type=float, default=10.0, help="Aşama başına süre (saniye)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Eşzamanlı istek üst sınırı")
+    parser.add_argument("--phase", action="append", choices=PHASES, help="Çalıştırılacak aşama (varsayılan: hepsi)")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Sahte LLM ilk token gecikmesi (saniye)")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Sahte LLM token hızı")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Sahte LLM ilk token gecikmesine eklenen rastgele süre")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Sahte LLM'in hata döndürdüğü istek oranı (0-1)")
+    parser.add_argument("--llm-url", help="Sahte sunucu yerine bu OpenAI uyumlu adresi kullan")
+    parser.add_argument("--baseline", type=Path, help="Karşılaştırılacak temel ölçüm (JSON)")
+    parser.add_argument("--save-baseline", type=Path, help="Sonuçları temel ölçüm olarak kaydet")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Gerileme sayılan oran (0.2 = %%20)")
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yazdır")
+    args = parser.parse_args()
+
+    settings = {"qps": args.qps, "duration": args.duration, "concurrency": args.concurrency,
+                "ttft": args.ttft, "tokens_per_second": args.tokens_per_second, "jitter": args.jitter,
+                "error_rate": args.error_rate}
+    server = None
+    if args.llm_url is None:
+        server = StubServer(first_token_delay=args.ttft, tokens_per_second=args.tokens_per_second,
+                            jitter=args.jitter, error_rate=args.error_rate, error_status=503, seed=0).start()
+    try:
+        engine = build_engine(args.llm_url or server.url)
+        results = run(engine, args.phase or PHASES, args.qps, args.duration, args.concurrency)
+    finally:
+        if server is not None:
+            server.stop()
+    report = {"settings": settings, "phases": results}
+
+    if args.json:
+        print(json.dumps(report, indent=1, ensure_ascii=False))
+    else:
+        print(f"🎯 {args.qps} istek/s × {args.duration}s, en fazla {args.concurrency} eşzamanlı, "
+              f"sahte LLM ttft {args.ttft}s, {args.tokens_per_second} token/s")
+        print_table([{"aşama": phase, **{k: v for k, v in r.items() if k not in ("stages", "cache", "llm", "first_errors")}}
+                      for phase, r in results.items()])
+        print()
+        print_table([{"aşama": phase, "adım": stage, **values}
+                      for phase, r in results.items() for stage, values in r["stages"].items()])
+        for phase, r in results.items():
+            if r.get("llm", {}).get("upstream"):
+                print(f"🔁 {phase}: LLM {r['llm']}")
+            for error in r["first_errors"]:
+                print(f"⚠️ {phase}: {error}")
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=1, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Temel ölçüm -> {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("settings") != settings:
+            print(f"⚠️ Ayarlar temel ölçümden farklı: {baseline.get('settings')}")
+        rows, regressed = compare(results, baseline, args.tolerance)
+        print()
+        print_table(rows)
+        print("❌ Performans gerilemesi" if regressed else "✅ Gerileme yok")
+        raise SystemExit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
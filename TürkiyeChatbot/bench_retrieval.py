@@ -0,0 +1,106 @@
+"""Yoğun, BM25 ve hibrit aramayı karşılaştırma: isabet oranı ve gecikme.
+
+Etiketli soru seti gerekmez; sorgular korpustan üretilir:
+    varlık   pasajda yalnızca birkaç yerde geçen nadir bir kelime ("Göbeklitepe")
+             -> dönen pasajlardan biri bu kelimeyi içeriyorsa isabet
+    cümle    pasajdan bir cümlenin kelimelerinin bir kısmı atılarak türetilir
+             -> hedef pasaj ilk k içindeyse isabet
+
+Kullanım:
+    python bench_retrieval.py [--k 3] [--queries 200]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from bench_common import make_retrievers, print_table
+from bm25 import BM25Index
+from chunking import split_sentences
+from turkish import tokenize
+
+
+def entity_queries(store, bm25, n, rng, max_df=3):
+    """Her pasaj için df'i en düşük (en ayırt edici) kelimeyi sorgu yapar."""
+    queries = []
+    df = np.diff(bm25.offsets)
+    for vector_id in store.meta.ids.tolist():
+        text = store.text(vector_id)
+        words = [w for w in dict.fromkeys(text.split()) if len(w) >= 5]
+        scored = []
+        for word in words:
+            tokens = tokenize(word)
+            t = bm25.vocabulary.get(tokens[0]) if len(tokens) == 1 else None
+            if t is not None and df[t] <= max_df:
+                scored.append((df[t], word.strip(".,;:()\"'"), tokens[0]))
+        if scored:
+            _, word, token = min(scored)
+            queries.append(("varlık", word, vector_id, token))
+    rng.shuffle(queries)
+    return queries[:n]
+
+
+def sentence_queries(store, n, rng, drop=0.3):
+    queries = []
+    for vector_id in store.meta.ids.tolist():
+        text = store.text(vector_id)
+        for start, end in split_sentences(text):
+            words = text[start:end].split()
+            if len(words) < 6:
+                continue
+            kept = [w for w in words if rng.random() > drop]
+            queries.append(("cümle", " ".join(kept), vector_id, None))
+    rng.shuffle(queries)
+    return queries[:n]
+
+
+def is_hit(store, found, target, token):
+    if token is None:
+        return target in found
+    return any(token in tokenize(store.text(i)) for i in found)
+
+
+def run(retrievers, store, queries, k):
+    """retrievers: {ad: fn(sorgular, k) -> vektör kimlikleri} (bkz. bench_common). Her biri için isabet ve gecikme."""
+    results = []
+    for name, retrieve in retrievers.items():
+        hits = {}
+        latencies = []
+        for kind, query, target, token in queries:
+            started = time.perf_counter()
+            found = retrieve([query], k)[0]
+            latencies.append(time.perf_counter() - started)
+            total, hit = hits.get(kind, (0, 0))
+            hits[kind] = (total + 1, hit + is_hit(store, found, target, token))
+        p50, p95, p99 = (float(p) for p in np.percentile(latencies, [50, 95, 99]) * 1000)
+        row = {"retriever": name}
+        row.update({f"{kind}@{k}": round(hit / total, 3) for kind, (total, hit) in sorted(hits.items())})
+        row.update({"p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2)})
+        results.append(row)
+    return results
+
+
+def main():
+    from retrieval import load_chunk_store
+    from startup import load_embedding_model
+
+    parser = argparse.ArgumentParser(description="Yoğun / BM25 / hibrit arama karşılaştırması")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200, help="Her sorgu türünden en fazla bu kadar")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    model = load_embedding_model()
+    index, store = load_chunk_store()
+    bm25 = store.bm25 or BM25Index.from_store(store)
+    retrievers = make_retrievers(model, index, store, bm25)
+    queries = entity_queries(store, bm25, args.queries, rng) + sentence_queries(store, args.queries, rng)
+    print(f"{len(store)} pasaj, {len(queries)} sorgu, BM25 postings {bm25.memory() / 1024:.1f} KB")
+
+    print_table(run(retrievers, store, queries, args.k))
+
+
+if __name__ == "__main__":
+    main()
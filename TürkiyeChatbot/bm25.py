@@ -0,0 +1,132 @@
+"""Pasajlar üzerinde BM25 (ters index) araması.
+
+Yoğun (dense) arama anlamca yakın pasajları iyi bulur ama "Göbeklitepe",
+"TEKNOFEST" gibi özel adlarda kaçırabilir; BM25 tam terim eşleşmesine
+dayanır. İki sonuç listesi retrieval.search_batch içinde RRF ile birleşir.
+
+Postings CSR düzenindedir: terim t'nin kayıtları
+doc[offsets[t]:offsets[t + 1]] ve tf[offsets[t]:offsets[t + 1]]
+dilimleridir (uint32 pasaj sırası, uint16 terim frekansı). Index .npz
+olarak pickle'sız kaydedilir.
+"""
+import os
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from turkish import tokenize, turkish_stopwords
+
+
+class BM25Index:
+    """Okapi BM25; k1 terim frekansı doygunluğu, b uzunluk normalizasyonu."""
+
+    def __init__(self, terms, offsets, doc, tf, doc_lengths, ids, k1=1.2, b=0.75, version=None):
+        self.terms = list(terms)
+        self.vocabulary = {term: i for i, term in enumerate(self.terms)}
+        self.offsets = offsets
+        self.doc = doc
+        self.tf = tf
+        self.doc_lengths = doc_lengths
+        self.ids = ids
+        self.k1 = k1
+        self.b = b
+        self.version = version
+        n = len(doc_lengths)
+        df = np.diff(offsets)
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype("float32")
+        avgdl = float(doc_lengths.mean()) if n else 0.0
+        # Uzunluk normalizasyonu pasaj başına bir kez hesaplanır
+        self._norm = (k1 * (1 - b + b * doc_lengths / avgdl)).astype("float32") if n else doc_lengths
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, texts, ids, stopwords=None, k1=1.2, b=0.75, version=None):
+        """texts[i] metninin vektör kimliği ids[i] olacak şekilde index oluşturur."""
+        stopwords = turkish_stopwords() if stopwords is None else stopwords
+        postings = {}
+        doc_lengths = np.zeros(len(texts), dtype="float32")
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text, stopwords))
+            doc_lengths[position] = sum(counts.values())
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((position, min(count, 65535)))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype="int64")
+        offsets[1:] = np.cumsum([len(postings[t]) for t in terms])
+        doc = np.empty(offsets[-1], dtype="uint32")
+        tf = np.empty(offsets[-1], dtype="uint16")
+        for i, term in enumerate(terms):
+            entries = np.asarray(postings[term], dtype="int64")
+            doc[offsets[i]:offsets[i + 1]] = entries[:, 0]
+            tf[offsets[i]:offsets[i + 1]] = entries[:, 1]
+        return cls(terms, offsets, doc, tf, doc_lengths, np.asarray(ids, dtype="int64"), k1, b, version)
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        """ChunkStore'daki pasajlardan (başlık + metin) index oluşturur."""
+        ids = store.meta.ids
+        texts = []
+        for vector_id in ids.tolist():
+            texts.append(store.entry(vector_id)["title"] + "\n" + store.text(vector_id))
+        return cls.build(texts, ids, version=store.version, **kwargs)
+
+    def scores(self, query, stopwords=None):
+        """Sorgunun tüm pasajlara göre BM25 skorları (pasaj sırasıyla)."""
+        stopwords = turkish_stopwords() if stopwords is None else stopwords
+        scores = np.zeros(len(self), dtype="float32")
+        for term in set(tokenize(query, stopwords)):
+            t = self.vocabulary.get(term)
+            if t is None:
+                continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            docs = self.doc[start:end]
+            tf = self.tf[start:end].astype("float32")
+            # Bir terimin postings'inde her pasaj bir kez geçer; doğrudan toplanabilir
+            scores[docs] += self.idf[t] * tf * (self.k1 + 1) / (tf + self._norm[docs])
+        return scores
+
+    def search(self, query, top_k):
+        """(vektör kimlikleri, skorlar); yalnızca en az bir terimi eşleşen pasajlar döner."""
+        scores = self.scores(query)
+        hits = np.flatnonzero(scores)
+        if len(hits) > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return self.ids[hits], scores[hits]
+
+    def search_batch(self, queries, top_k):
+        return [self.search(q, top_k) for q in queries]
+
+    def memory(self):
+        """Postings ve yardımcı dizilerin bayt cinsinden boyutu."""
+        arrays = (self.offsets, self.doc, self.tf, self.doc_lengths, self.ids, self.idf)
+        return sum(a.nbytes for a in arrays)
+
+    # -----------------------------
+    # Kalıcılık
+    # -----------------------------
+    def save(self, path):
+        path = Path(path)
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".npz", dir=path.parent)
+        os.close(fd)
+        try:
+            np.savez(tmp, terms=np.array(self.terms, dtype=str), offsets=self.offsets, doc=self.doc, tf=self.tf,
+                     doc_lengths=self.doc_lengths, ids=self.ids, params=np.array([self.k1, self.b]),
+                     version=np.array(self.version or ""))
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = data["params"].tolist()
+            return cls(data["terms"].tolist(), data["offsets"], data["doc"], data["tf"], data["doc_lengths"],
+                       data["ids"], k1, b, str(data["version"]) or None)
@@ -0,0 +1,283 @@
+"""Pasaj düzeyinde FAISS index oluşturma (artımlı).
+
+Metadata dosyası aynı zamanda bir manifesto gibi çalışır: her kaynak dosyanın
+SHA-256 özeti ve o dosyaya ait vektör kimlikleri saklanır. Sonraki
+çalıştırmalarda yalnızca yeni ya da değişen dosyalar yeniden gömülür,
+silinen dosyaların vektörleri ID-eşlemeli index'ten çıkarılır.
+
+Kullanım:
+    python build_index.py [--source docs/bolumler] [--chunk-size 600] [--overlap 120] [--full]
+                          [--index ivf:nlist=64,nprobe=8]
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from bm25 import BM25Index
+from chunk_meta import ChunkMeta, write_chunk_meta
+from chunking import chunk_document
+from config import (
+    BASE_DIR, BM25_PATH, CHUNK_INDEX_PATH, CHUNK_META_PATH, CHUNK_OVERLAP, CHUNK_SIZE, CORPUS_PATH,
+    EMBED_CHECKPOINT_DIR, EMBED_DTYPE, EMBED_SHARD_SIZE, EMBED_WORKERS, EMBEDDING_BACKEND, EMBEDDING_MODEL, INDEX_SPEC, SECTIONS_DIR,
+)
+from doc_store import CorpusWriter, DocStore
+from embed_pool import EmbeddingPool, ShardCheckpoint
+from index_factory import IndexSpec, create_index
+
+
+def _relative_to_base(path):
+    """Metadata taşınabilir kalsın diye yolu BASE_DIR'e göre yazar."""
+    path = Path(path).resolve()
+    return path.relative_to(BASE_DIR).as_posix() if path.is_relative_to(BASE_DIR) else str(path)
+
+
+def _atomic_write(path, write):
+    """write(tmp_path) ile aynı klasörde geçici dosya yazar, sonra yerine taşır."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def save_index(index, meta, index_path=CHUNK_INDEX_PATH, meta_path=CHUNK_META_PATH):
+    """Index'i ve metadata'yı atomik olarak yazar.
+
+    Metadata en son yazılır; okuyucular onu izleyerek yeni sürümü fark eder.
+    """
+    _atomic_write(index_path, lambda tmp: faiss.write_index(index, tmp))
+    settings = {k: v for k, v in meta.items() if k not in ("files", "chunks")}
+    write_chunk_meta(meta_path, settings, meta["files"], meta["chunks"], index.d, normalized=True)
+
+
+def save_bm25(meta, corpus_path=CORPUS_PATH, meta_path=CHUNK_META_PATH, bm25_path=BM25_PATH):
+    """Pasajlar için BM25 index'ini yazar; sürüm olarak metadata parmak izini taşır.
+
+    Pasaj metinleri yazılmış korpus paketinden dilimlenir.
+    """
+    chunks = sorted(meta["chunks"], key=lambda c: c["id"])
+    docs = DocStore.open(corpus_path)
+    texts = [c["title"] + "\n" + docs.text(c["file"], c["start"], c["end"]) for c in chunks]
+    docs.close()
+    written = ChunkMeta.open(meta_path)
+    BM25Index.build(texts, [c["id"] for c in chunks], version=written.fingerprint()).save(bm25_path)
+    written.close()
+
+
+def _read_folder(source_dir):
+    for path in sorted(Path(source_dir).glob("*.txt")):
+        yield path.name, path.read_bytes()
+
+
+# Bu ayar eklenmeden önce yazılmış metadata'da karşılığı olan değer
+_SETTING_DEFAULTS = {"backend": "torch"}
+
+
+def _load_previous(index_path, meta_path, settings):
+    """Ayarları aynı olan önceki index'i döndürür; yoksa (None, None)."""
+    if not (Path(index_path).exists() and Path(meta_path).exists()):
+        return None, None
+    try:
+        previous = ChunkMeta.open(meta_path)
+    except ValueError:
+        # Eski ya da bozuk metadata: baştan oluşturulur
+        return None, None
+    if any(previous.settings.get(k, _SETTING_DEFAULTS.get(k)) != v for k, v in settings.items()):
+        return None, None
+    index = faiss.read_index(str(index_path))
+    try:
+        if not isinstance(index, faiss.IndexIDMap2):
+            return None, None
+        previous.validate(index)
+    except ValueError:
+        return None, None
+    meta = {**previous.settings, **settings, "files": previous.files, "chunks": previous.chunks()}
+    previous.close()
+    return index, meta
+
+
+def build_chunk_index(model, source_dir=SECTIONS_DIR, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP,
+                      index_path=CHUNK_INDEX_PATH, meta_path=CHUNK_META_PATH, full=False,
+                      corpus_path=CORPUS_PATH, index_spec=INDEX_SPEC, bm25_path=BM25_PATH,
+                      documents=None, shard_size=EMBED_SHARD_SIZE, workers=EMBED_WORKERS,
+                      checkpoint_dir=EMBED_CHECKPOINT_DIR, embed_dtype=EMBED_DTYPE):
+    """Dokümanları parçalar, gömer ve index + metadata yazar.
+
+    documents verilmezse source_dir altındaki .txt dosyaları okunur; verilirse
+    (ad, bayt) çiftleri üreten bir yineleyicidir (bkz. ingest.py) ve
+    source_dir yalnızca kaynağın adı olarak metadata'ya yazılır. Dokümanlar
+    akış halinde işlenir: metinler korpus paketine eklenir, değişenlerin
+    pasajları shard_size'lık parçalar halinde gömülür (bkz. embed_pool).
+    Parçalar checkpoint_dir altına embed_dtype olarak yazılır; derleme
+    yarıda kalırsa yeniden çalıştırıldığında hazır parçalar atlanır.
+    workers > 1 iken model her süreçte EMBEDDING_MODEL adından yüklenir.
+    Embedding arka ucu (EMBEDDING_BACKEND) değiştiyse index baştan oluşturulur.
+
+    full=False iken yalnızca özeti değişen dokümanlar yeniden gömülür.
+    index_spec index türünü seçer (bkz. index_factory); eğitilen türler
+    ilk oluşturmadaki korpusla eğitilir, korpus çok büyüdüyse full=True ile
+    yeniden eğitilmelidir. (index, meta, stats) döndürür.
+    """
+    source_dir = Path(source_dir)
+    spec = IndexSpec.parse(index_spec) if isinstance(index_spec, str) else index_spec
+    settings = {
+        "model": EMBEDDING_MODEL,
+        "backend": EMBEDDING_BACKEND,
+        "source_dir": _relative_to_base(source_dir),
+        "chunk_size": chunk_size,
+        "overlap": overlap,
+        "index": str(spec),
+    }
+    index, meta = (None, None) if full else _load_previous(index_path, meta_path, settings)
+    if meta is None:
+        meta = {**settings, "next_id": 0, "files": {}, "chunks": []}
+
+    chunks_by_file = {}
+    for entry in meta["chunks"]:
+        chunks_by_file.setdefault(entry["file"], []).append(entry)
+
+    stale_ids = []
+    new_entries = []
+    pending = []
+    next_id = meta["next_id"]
+    files = {}
+    stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    started = time.perf_counter()
+
+    def flush():
+        if pending:
+            pool.submit(pending[:])
+            pending.clear()
+
+    checkpoint = ShardCheckpoint(checkpoint_dir, embed_dtype, EMBEDDING_MODEL)
+    writer = CorpusWriter(corpus_path)
+    pool = EmbeddingPool(model if workers <= 1 else None, workers, checkpoint=checkpoint)
+    try:
+        for name, data in (_read_folder(source_dir) if documents is None else documents):
+            if name in files:
+                raise ValueError(f"'{name}' adlı doküman birden fazla kez verildi")
+            digest = hashlib.sha256(data).hexdigest()
+            files[name] = digest
+            writer.add(name, data)
+            if meta["files"].get(name) == digest:
+                stats["unchanged"] += 1
+                continue
+            stats["updated" if name in meta["files"] else "added"] += 1
+            stale_ids.extend(e["id"] for e in chunks_by_file.pop(name, []))
+            for chunk in chunk_document(name, data.decode("utf-8"), chunk_size, overlap):
+                new_entries.append({"id": next_id, "file": chunk.file, "start": chunk.start, "end": chunk.end,
+                                    "title": chunk.title})
+                next_id += 1
+                pending.append(chunk.text)
+                if len(pending) >= shard_size:
+                    flush()
+        flush()
+        embeddings = pool.results()
+        if not files:
+            raise ValueError(f"{source_dir} altında parçalanacak metin bulunamadı")
+        for name in meta["files"].keys() - files.keys():
+            stale_ids.extend(e["id"] for e in chunks_by_file.pop(name, []))
+            stats["removed"] += 1
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        pool.close()
+    stats.update(encoded=pool.encoded, resumed=pool.resumed, documents=len(files),
+                 seconds=time.perf_counter() - started)
+
+    if not stale_ids and not new_entries and index is not None:
+        if Path(corpus_path).exists():
+            writer.abort()
+        else:
+            writer.commit()
+        if not Path(bm25_path).exists():
+            save_bm25(meta, corpus_path, meta_path, bm25_path)
+        checkpoint.clear()
+        return index, meta, stats
+
+    if stale_ids and index is not None and not spec.removable:
+        # Silme desteklemeyen index'ler (HNSW) kalan vektörlerden yeniden kurulur
+        stale = set(stale_ids)
+        kept = [e["id"] for entries in chunks_by_file.values() for e in entries if e["id"] not in stale]
+        if kept:
+            embeddings.insert(0, np.vstack([index.reconstruct(i) for i in kept]))
+        new_ids = np.asarray(kept + [e["id"] for e in new_entries], dtype="int64")
+        index, stale_ids = None, []
+    else:
+        new_ids = np.asarray([e["id"] for e in new_entries], dtype="int64")
+
+    if embeddings:
+        if index is None:
+            dim = embeddings[0].shape[1]
+            resolved = spec.resolve(len(new_ids), dim)
+            train = np.vstack(embeddings).astype("float32") if resolved.trainable else None
+            index = faiss.IndexIDMap2(create_index(resolved, dim, train))
+            meta["index_params"] = resolved.to_dict()
+        # Parçalar mmap'ten tek tek eklenir; float16 parçalar burada float32'ye çevrilir
+        offset = 0
+        for shard in embeddings:
+            index.add_with_ids(np.ascontiguousarray(shard, dtype="float32"), new_ids[offset:offset + len(shard)])
+            offset += len(shard)
+    if stale_ids:
+        index.remove_ids(np.asarray(stale_ids, dtype="int64"))
+
+    for entry in new_entries:
+        chunks_by_file.setdefault(entry["file"], []).append(entry)
+    meta["chunks"] = [e for name in sorted(chunks_by_file) for e in chunks_by_file[name]]
+    meta["files"] = files
+    meta["next_id"] = next_id
+
+    writer.commit()
+    save_index(index, meta, index_path, meta_path)
+    save_bm25(meta, corpus_path, meta_path, bm25_path)
+    checkpoint.clear()
+    return index, meta, stats
+
+
+def format_stats(stats):
+    """build_chunk_index istatistiklerini iki satırlık özet olarak biçimlendirir."""
+    seconds = max(stats["seconds"], 1e-9)
+    return (f"🆕 {stats['added']} eklendi, ✏️ {stats['updated']} güncellendi, "
+            f"🗑️ {stats['removed']} silindi, ⏭️ {stats['unchanged']} değişmedi\n"
+            f"⏱️ {stats['seconds']:.1f} s, {stats['documents'] / seconds:.1f} doküman/s, "
+            f"{stats['encoded'] / seconds:.1f} pasaj/s gömüldü ({stats['resumed']} pasaj önceki çalıştırmadan)")
+
+
+def main():
+    from startup import load_embedding_model
+
+    parser = argparse.ArgumentParser(description="Pasaj düzeyinde FAISS index oluşturur/günceller.")
+    parser.add_argument("--source", type=Path, default=SECTIONS_DIR, help="Parçalanacak .txt klasörü")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--full", action="store_true", help="Manifestoyu yok say, her şeyi yeniden göm")
+    parser.add_argument("--index", default=INDEX_SPEC, help="Index türü, ör. flat, ivf:nlist=64, hnsw:m=32, pq")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS, help="Embedding süreç sayısı")
+    parser.add_argument("--dtype", default=EMBED_DTYPE, choices=("float32", "float16"),
+                        help="Ara embedding parçalarının veri tipi")
+    args = parser.parse_args()
+
+    # Çok süreçte model her süreçte ayrıca yüklenir
+    model = load_embedding_model() if args.workers <= 1 else None
+    index, meta, stats = build_chunk_index(model, args.source.resolve(), args.chunk_size, args.overlap,
+                                           full=args.full, index_spec=args.index, workers=args.workers,
+                                           embed_dtype=args.dtype)
+    print(format_stats(stats))
+    print(f"✅ {index.ntotal} pasaj index'lendi ({IndexSpec.from_dict(meta['index_params'])}) "
+          f"-> {CHUNK_INDEX_PATH.name}, {CHUNK_META_PATH.name}")
+
+
+if __name__ == "__main__":
+    main()
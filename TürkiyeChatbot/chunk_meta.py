@@ -0,0 +1,248 @@
+"""Index metadata'sı için pickle'sız, sürümlü ikili biçim.
+
+Her vektör için doküman kimliği, bayt ofsetleri ve başlık; her doküman için
+ad ve SHA-256 özeti; dosya başına da embedding modeli ve index ayarları
+saklanır. Dosya mmap ile açılır ve sütunlar numpy görünümü olarak okunur;
+açılış maliyeti kayıt sayısından bağımsızdır, dizgeler erişildikçe çözülür.
+
+Düzen (little-endian, bölümler 8 bayta hizalı):
+    başlık   b"TRMETA01", u16 biçim sürümü, u16 bayraklar, u32 vektör sayısı,
+             u32 doküman sayısı, u32 boyut, u32 JSON ayar bloğu uzunluğu
+    ayarlar  UTF-8 JSON (model, source_dir, chunk_size, overlap, next_id)
+    vektörler  id i64, doc u32, title u32, start u64, end u64 (id'ye göre sıralı)
+    dokümanlar sha256 32 bayt, name u32
+    dizgeler   u32 sayı (m), u64 ofset[m + 1], UTF-8 veri
+
+Uygulama turkiye_chunks.meta ve turkiye_files.meta dosyalarını bu biçimde
+yazar ve okur. Pickle'lı turkiye_files.npy yalnızca eski kurulumlarda kalmış
+olabilir; onu bir kereliğine dönüştürmek için:
+    python chunk_meta.py migrate turkiye_index.faiss turkiye_files.npy turkiye_files.meta
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+MAGIC = b"TRMETA01"
+FORMAT_VERSION = 1
+FLAG_NORMALIZED = 1
+
+_HEADER = struct.Struct("<8sHHIIII")
+_U32 = struct.Struct("<I")
+VECTOR_DTYPE = np.dtype([("id", "<i8"), ("doc", "<u4"), ("title", "<u4"), ("start", "<u8"), ("end", "<u8")])
+DOC_DTYPE = np.dtype([("sha256", "u1", (32,)), ("name", "<u4")])
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+class ChunkMeta:
+    """Salt okunur metadata görünümü; ChunkMeta.open ile açılır."""
+
+    def __init__(self, buffer, path=None, closer=None):
+        self.path = path
+        self._buffer = buffer
+        self._closer = closer
+        magic, version, flags, count, n_docs, dim, settings_len = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} bir metadata dosyası değil")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: desteklenmeyen metadata sürümü {version}")
+        pos = _HEADER.size
+        self.settings = json.loads(bytes(buffer[pos:pos + settings_len]).decode("utf-8"))
+        pos = _align(pos + settings_len)
+        self.vectors = np.frombuffer(buffer, VECTOR_DTYPE, count, pos)
+        pos = _align(pos + count * VECTOR_DTYPE.itemsize)
+        self.docs = np.frombuffer(buffer, DOC_DTYPE, n_docs, pos)
+        pos = _align(pos + n_docs * DOC_DTYPE.itemsize)
+        (n_strings,) = _U32.unpack_from(buffer, pos)
+        pos = _align(pos + _U32.size)
+        self._string_offsets = np.frombuffer(buffer, "<u8", n_strings + 1, pos)
+        self._strings_start = pos + (n_strings + 1) * 8
+        self.normalized = bool(flags & FLAG_NORMALIZED)
+        self.dim = dim
+        self.model = self.settings["model"]
+        self.ids = self.vectors["id"]
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def memory(self):
+        return len(self._buffer)
+
+    def string(self, i):
+        start, end = self._string_offsets[i], self._string_offsets[i + 1]
+        return bytes(self._buffer[self._strings_start + start:self._strings_start + end]).decode("utf-8")
+
+    @property
+    def files(self):
+        """{doküman adı: sha256 hex} (doküman kimliği sırasıyla)."""
+        return {self.string(int(doc["name"])): doc["sha256"].tobytes().hex() for doc in self.docs}
+
+    def position(self, vector_id):
+        """Vektör kimliğinin satır numarası; kimlikler sıralı olduğu için ikili arama."""
+        pos = int(np.searchsorted(self.ids, vector_id))
+        if pos == len(self.ids) or self.ids[pos] != vector_id:
+            raise KeyError(vector_id)
+        return pos
+
+    def entry(self, vector_id):
+        row = self.vectors[self.position(vector_id)]
+        return {
+            "id": int(row["id"]),
+            "doc": int(row["doc"]),
+            "file": self.string(int(self.docs[row["doc"]]["name"])),
+            "start": int(row["start"]),
+            "end": int(row["end"]),
+            "title": self.string(int(row["title"])),
+        }
+
+    def chunks(self):
+        """Tüm kayıtlar sözlük listesi olarak (artımlı index güncellemesi için)."""
+        return [self.entry(int(i)) for i in self.ids]
+
+    def fingerprint(self):
+        """Ayarlar ve doküman özetlerinden türetilen kısa sürüm kimliği."""
+        h = hashlib.sha256(json.dumps(self.settings, sort_keys=True).encode("utf-8"))
+        h.update(self.docs.tobytes())
+        return h.hexdigest()[:16]
+
+    def validate(self, index, model=None):
+        """Index ile metadata uyuşmuyorsa ValueError fırlatır."""
+        name = Path(self.path).name if self.path else "metadata"
+        if model is not None and self.model != model:
+            raise ValueError(f"{name} '{self.model}' modeliyle oluşturulmuş, yapılandırılan model '{model}'")
+        if index.d != self.dim:
+            raise ValueError(f"Index boyutu {index.d}, {name} boyutu {self.dim}")
+        if index.ntotal != len(self):
+            raise ValueError(f"Index {index.ntotal} vektör içeriyor ama {name} {len(self)} kayıt içeriyor")
+        id_map = getattr(index, "id_map", None)
+        if id_map is not None:
+            index_ids = np.sort(faiss.vector_to_array(id_map))
+            if not np.array_equal(index_ids, self.ids):
+                raise ValueError(f"Index vektör kimlikleri {name} ile uyuşmuyor")
+        elif len(self) and not np.array_equal(self.ids, np.arange(len(self))):
+            raise ValueError(f"{name} ID-eşlemeli olmayan bir index için sıralı kimlikler içermiyor")
+
+    def close(self):
+        self.vectors = self.docs = self.ids = self._string_offsets = None
+        if self._closer is not None:
+            try:
+                self._closer()
+            except BufferError:
+                # Dışarıda hâlâ görünümler var; mmap son referansla birlikte kapanır
+                pass
+
+    @classmethod
+    def open(cls, path):
+        """Dosyayı salt okunur mmap ile açar (O(1) yükleme)."""
+        path = Path(path)
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mm, path=path, closer=mm.close)
+        except Exception:
+            mm.close()
+            raise
+
+
+def write_chunk_meta(path, settings, files, chunks, dim, normalized):
+    """Metadata dosyasını atomik olarak yazar.
+
+    files: {ad: sha256 hex}, chunks: id/file/start/end/title anahtarlı sözlükler.
+    """
+    path = Path(path)
+    strings = {}
+
+    def intern(s):
+        return strings.setdefault(s, len(strings))
+
+    doc_ids = {name: i for i, name in enumerate(files)}
+    docs = np.zeros(len(files), DOC_DTYPE)
+    for name, i in doc_ids.items():
+        docs[i] = (np.frombuffer(bytes.fromhex(files[name]), "u1"), intern(name))
+    vectors = np.zeros(len(chunks), VECTOR_DTYPE)
+    for row, chunk in enumerate(sorted(chunks, key=lambda c: c["id"])):
+        vectors[row] = (chunk["id"], doc_ids[chunk["file"]], intern(chunk["title"]), chunk["start"], chunk["end"])
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, "<u8")
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    settings_block = json.dumps(settings, ensure_ascii=False).encode("utf-8")
+    flags = FLAG_NORMALIZED if normalized else 0
+
+    def pad(f):
+        f.write(b"\0" * (_align(f.tell()) - f.tell()))
+
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(vectors), len(docs), dim, len(settings_block)))
+            f.write(settings_block)
+            pad(f)
+            f.write(vectors.tobytes())
+            pad(f)
+            f.write(docs.tobytes())
+            pad(f)
+            f.write(_U32.pack(len(encoded)))
+            pad(f)
+            f.write(offsets.tobytes())
+            f.writelines(encoded)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def migrate_legacy(index_path, files_path, out_path, source_dir, model):
+    """Dosya düzeyindeki eski index'in .npy ad listesini ikili metadata'ya çevirir."""
+    from build_index import _relative_to_base
+    from chunking import section_title
+
+    index = faiss.read_index(str(index_path))
+    names = [str(name) for name in np.load(files_path, allow_pickle=False)]
+    files, chunks = {}, []
+    for i, name in enumerate(names):
+        data = (Path(source_dir) / name).read_bytes()
+        files[name] = hashlib.sha256(data).hexdigest()
+        chunks.append({"id": i, "file": name, "start": 0, "end": len(data), "title": section_title(name)})
+    settings = {"model": model, "source_dir": _relative_to_base(source_dir)}
+    write_chunk_meta(out_path, settings, files, chunks, index.d, normalized=False)
+    ChunkMeta.open(out_path).validate(index)
+
+
+def main():
+    from config import CLEAN_DIR, EMBEDDING_MODEL
+
+    parser = argparse.ArgumentParser(description="Index metadata araçları")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="turkiye_files.npy -> ikili metadata")
+    migrate.add_argument("index", type=Path)
+    migrate.add_argument("files", type=Path)
+    migrate.add_argument("out", type=Path)
+    migrate.add_argument("--source", type=Path, default=CLEAN_DIR)
+    migrate.add_argument("--model", default=EMBEDDING_MODEL)
+    show = sub.add_parser("show", help="Metadata özetini yazdır")
+    show.add_argument("path", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate_legacy(args.index, args.files, args.out, args.source, args.model)
+        print(f"✅ {args.out} yazıldı")
+    else:
+        meta = ChunkMeta.open(args.path)
+        print(json.dumps({**meta.settings, "vectors": len(meta), "docs": len(meta.docs), "dim": meta.dim,
+                          "normalized": meta.normalized}, ensure_ascii=False, indent=1))
+
+
+if __name__ == "__main__":
+    main()
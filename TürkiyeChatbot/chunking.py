@@ -0,0 +1,142 @@
+"""Türkçe metinler için cümle duyarlı pasaj (chunk) oluşturma.
+
+Her pasaj, kaynak dosyadaki UTF-8 bayt aralığıyla (start, end) birlikte
+tutulur; böylece metin index'e gömülmeden de dosyadan geri okunabilir.
+"""
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import CHUNK_OVERLAP, CHUNK_SIZE
+
+# Nokta ile biten ama cümle sonu olmayan Türkçe kısaltmalar
+TURKISH_ABBREVIATIONS = frozenset({
+    "a.ş", "age", "agy", "alb", "bkz", "bknz", "cad", "doç", "dr", "hz", "ing",
+    "ltd", "m.ö", "m.s", "mah", "no", "nu", "opr", "örn", "prof", "s", "sf",
+    "sok", "şti", "t.c", "tel", "vb", "vd", "vs", "yy", "yrd", "yzb",
+})
+
+# Cümle sonu adayı: . ! ? … ve ardından gelen tırnak/parantez, sonra boşluk
+_BOUNDARY = re.compile(r"[.!?…]+[\"'”’)\]]*\s+")
+_ROMAN = re.compile(r"^[IVXLCDM]+$")
+_LAST_TOKEN = re.compile(r"(\S+)$")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """Bir kaynak dosyanın bayt aralığıyla tanımlanan pasajı."""
+    file: str
+    start: int
+    end: int
+    title: str
+    text: str
+
+
+def section_title(file_name):
+    """'turkiye_tarih_ve_kuruluş.txt' -> 'tarih ve kuruluş'"""
+    stem = Path(file_name).stem
+    if stem.startswith("turkiye_"):
+        stem = stem[len("turkiye_"):]
+    return stem.replace("_", " ")
+
+
+def _is_false_boundary(text, dot_pos):
+    """Noktadan önceki kelime kısaltma, sıra sayısı ya da baş harf ise True."""
+    if text[dot_pos] != ".":
+        return False
+    match = _LAST_TOKEN.search(text, 0, dot_pos)
+    if not match:
+        return False
+    token = match.group(1).lstrip("(\"'“‘").rstrip(".")
+    if not token:
+        return False
+    # "29. madde", "II. Dünya Savaşı", "M. Kemal"
+    if token.isdigit() or _ROMAN.match(token) or (len(token) == 1 and token.isalpha()):
+        return True
+    return token.replace("İ", "i").replace("I", "ı").lower() in TURKISH_ABBREVIATIONS
+
+
+def split_sentences(text):
+    """Metni cümlelere böler ve (başlangıç, bitiş) karakter aralıklarını döndürür."""
+    spans = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        if _is_false_boundary(text, match.start()):
+            continue
+        end = match.end()
+        # Sonraki karakter küçük harfse cümle devam ediyordur ("vb. ürünler")
+        if end < len(text) and text[end].islower():
+            continue
+        sentence_end = end - (len(match.group()) - len(match.group().rstrip()))
+        if sentence_end > start:
+            spans.append((start, sentence_end))
+        start = end
+    tail = text[start:].rstrip()
+    if tail.strip():
+        spans.append((start, start + len(tail)))
+    return spans
+
+
+def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Cümleleri chunk_size karakteri aşmayacak şekilde gruplar.
+
+    Ardışık pasajlar, toplam uzunluğu overlap karakteri geçmeyen son
+    cümleleri paylaşır. Tek başına chunk_size'dan uzun bir cümle kendi
+    pasajını oluşturur. (başlangıç, bitiş) karakter aralıkları döner.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("overlap, chunk_size değerinden küçük olmalı")
+
+    sentences = split_sentences(text)
+    chunks = []
+    i = 0
+    while i < len(sentences):
+        j = i
+        while j + 1 < len(sentences) and sentences[j + 1][1] - sentences[i][0] <= chunk_size:
+            j += 1
+        chunks.append((sentences[i][0], sentences[j][1]))
+        if j + 1 >= len(sentences):
+            break
+        # Bindirme: sondan geriye doğru overlap'e sığan cümleleri tekrar al
+        k = j + 1
+        while k - 1 > i and sentences[j][1] - sentences[k - 1][0] <= overlap:
+            k -= 1
+        i = k
+    return chunks
+
+
+def _char_to_byte_offsets(text, spans):
+    """Karakter aralıklarını UTF-8 bayt aralıklarına çevirir (tek geçiş)."""
+    points = sorted({p for span in spans for p in span})
+    mapping = {}
+    char_pos = byte_pos = 0
+    for p in points:
+        byte_pos += len(text[char_pos:p].encode("utf-8"))
+        char_pos = p
+        mapping[p] = byte_pos
+    return [(mapping[s], mapping[e]) for s, e in spans]
+
+
+def chunk_document(file_name, text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Bellekteki bir dokümanı parçalar; bayt aralıkları text'in UTF-8 haline göredir."""
+    spans = chunk_text(text, chunk_size, overlap)
+    title = section_title(file_name)
+    return [
+        Chunk(file_name, b_start, b_end, title, text[c_start:c_end])
+        for (c_start, c_end), (b_start, b_end) in zip(spans, _char_to_byte_offsets(text, spans))
+    ]
+
+
+def chunk_file(path, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Bir dosyayı okuyup Chunk listesi döndürür."""
+    path = Path(path)
+    # read_text satır sonlarını çevirir; bayt aralıkları bozulmasın diye ham bayt çözülür
+    return chunk_document(path.name, path.read_bytes().decode("utf-8"), chunk_size, overlap)
+
+
+def chunk_folder(folder, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Klasördeki tüm .txt dosyalarını ada göre sıralı biçimde parçalar."""
+    chunks = []
+    for path in sorted(Path(folder).glob("*.txt")):
+        chunks.extend(chunk_file(path, chunk_size, overlap))
+    return chunks
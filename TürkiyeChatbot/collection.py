@@ -0,0 +1,458 @@
+"""Çok korpuslu, parçalı (sharded) koleksiyonlar ve parçalara paralel arama.
+
+Her koleksiyon COLLECTIONS_DIR altında bir klasördür; yeni bir korpus için
+kod değişikliği gerekmez, klasörü açıp derlemek yeter:
+
+    collections/<ad>/
+        docs/*.txt          kaynak dokümanlar
+        collection.json     isteğe bağlı ayarlar, ör. {"shards": 8, "index": "hnsw:m=16",
+                            "chunk_size": 600, "overlap": 120, "source": "docs", "prompt": "..."}
+        shard-000.*         derleme çıktısı: parça başına index, metadata, korpus paketi, BM25
+        manifest.json       derlemenin en son yazdığı parça listesi
+
+Dokümanlar adlarının CRC32'siyle parçalara dağıtılır ve her parça
+build_index.build_chunk_index ile artımlı derlenir; parça sayısı
+değiştiğinde yalnızca parçası değişen dokümanlar yeniden gömülür.
+
+Arama: sorgular bir kez gömülür, FAISS ve (hibritte) BM25 araması her
+parçada bir iş parçacığı havuzunda paralel çalışır. Parçaların adayları
+uzaklığa ve BM25 skoruna göre birleştirilir, iki sıralama RRF ile top_k'ya
+indirilir. Parçalar ilk aramada yüklenir; tüm koleksiyonlarda bellekte en
+fazla COLLECTION_MAX_SHARDS parça tutulur, en uzun süredir kullanılmayan
+kapatılır. Aramada kullanılan parçalar sabitlenir, arama sürerken kapatılmaz.
+
+    python collection.py build genel --shards 4
+    python collection.py list
+    python collection.py search genel "Türkiye'nin başkenti neresidir?"
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+
+from config import (
+    CHUNK_OVERLAP, CHUNK_SIZE, COLLECTION_MAX_SHARDS, COLLECTION_SEARCH_WORKERS, COLLECTION_SHARDS, COLLECTIONS_DIR,
+    DOCSTORE_RELOAD_INTERVAL, EMBED_CHECKPOINT_DIR, EMBED_WORKERS, EMBEDDING_MODEL, HYBRID, HYBRID_DEPTH, INDEX_SPEC,
+)
+from metrics import METRICS
+from resources import IndexHandle
+from retrieval import encode_queries, load_chunk_store, reciprocal_rank_fusion, to_passage
+
+MANIFEST = "manifest.json"
+SETTINGS = "collection.json"
+# Koleksiyon adı klasör adıdır; API'den gelen adlar yol içeremez
+_VALID_NAME = re.compile(r"^\w[\w-]*$")
+_SHARD_FILE = re.compile(r"^shard-(\d+)\.")
+
+
+def shard_of(name, shards):
+    """Dokümanın parçası; süreçten bağımsız olsun diye hash() yerine CRC32."""
+    return zlib.crc32(name.encode("utf-8")) % shards
+
+
+def shard_paths(root, shard):
+    """Parçanın dosyaları (load_chunk_store / build_chunk_index anahtar adlarıyla)."""
+    prefix = Path(root) / f"shard-{int(shard):03d}"
+    return {"index_path": prefix.with_suffix(".faiss"), "meta_path": prefix.with_suffix(".meta"),
+            "corpus_path": prefix.with_suffix(".bin"), "bm25_path": Path(f"{prefix}.bm25.npz")}
+
+
+def read_settings(root):
+    """Varsayılanların collection.json ile güncellenmiş hali."""
+    settings = {"source": "docs", "shards": COLLECTION_SHARDS, "index": INDEX_SPEC,
+                "chunk_size": CHUNK_SIZE, "overlap": CHUNK_OVERLAP, "prompt": None}
+    path = Path(root) / SETTINGS
+    if path.exists():
+        settings.update(json.loads(path.read_text(encoding="utf-8")))
+    return settings
+
+
+def _remove_shard(root, shard):
+    for path in shard_paths(root, shard).values():
+        path.unlink(missing_ok=True)
+
+
+def build_collection(model, root, shards=None, full=False, workers=EMBED_WORKERS):
+    """Koleksiyonun kaynak dokümanlarını parçalara dağıtıp her parçayı derler.
+
+    Boş kalan ve artık kullanılmayan parçaların dosyaları silinir; manifest
+    en son yazılır. (manifest, toplam istatistikler) döndürür.
+    """
+    from build_index import _atomic_write, build_chunk_index
+    from chunk_meta import ChunkMeta
+
+    root = Path(root)
+    settings = read_settings(root)
+    shards = shards or int(settings["shards"])
+    source = root / settings["source"]
+    groups = [[] for _ in range(shards)]
+    for path in sorted(source.glob("*.txt")):
+        groups[shard_of(path.name, shards)].append(path)
+    if not any(groups):
+        raise ValueError(f"{source} altında .txt doküman bulunamadı")
+
+    built, totals = {}, {}
+    for shard, paths in enumerate(groups):
+        if not paths:
+            _remove_shard(root, shard)
+            continue
+        files = shard_paths(root, shard)
+        _, meta, stats = build_chunk_index(
+            model, source, settings["chunk_size"], settings["overlap"], full=full, index_spec=settings["index"],
+            documents=((p.name, p.read_bytes()) for p in paths), workers=workers,
+            checkpoint_dir=EMBED_CHECKPOINT_DIR / f"{root.name}-{shard:03d}", **files)
+        written = ChunkMeta.open(files["meta_path"])
+        built[f"{shard:03d}"] = {"version": written.fingerprint(), "passages": len(written),
+                                 "documents": len(paths)}
+        normalized = written.normalized
+        written.close()
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+
+    for path in root.glob("shard-*.meta"):
+        shard = int(_SHARD_FILE.match(path.name).group(1))
+        if shard >= shards:
+            _remove_shard(root, shard)
+
+    manifest = {"model": EMBEDDING_MODEL, "normalized": normalized, "shards": built}
+    _atomic_write(root / MANIFEST,
+                  lambda tmp: Path(tmp).write_text(json.dumps(manifest, indent=1, ensure_ascii=False), encoding="utf-8"))
+    return manifest, totals
+
+
+class ShardCache:
+    """(koleksiyon, parça) -> IndexHandle; en fazla max_shards parça açık tutulur.
+
+    pin() parçayı gerekirse yükler ve sabitler; sabit parçalar çıkarılmaz
+    (bu sırada sınır geçici olarak aşılabilir), unpin() ile serbest kalır.
+    Aynı parçayı eşzamanlı isteyenler tek yüklemeyi bekler.
+    """
+
+    def __init__(self, max_shards=COLLECTION_MAX_SHARDS):
+        self.max_shards = max_shards
+        self.hits = self.misses = 0
+        self.evicted = 0
+        self._handles = OrderedDict()
+        self._pins = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._handles)
+
+    def pin(self, key, loader):
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                self.hits += 1
+                self._handles.move_to_end(key)
+                self._pins[key] += 1
+                return handle
+            lock = self._loading.setdefault(key, threading.Lock())
+        with lock:
+            with self._lock:
+                handle = self._handles.get(key)
+                if handle is not None:
+                    self.hits += 1
+                    self._pins[key] += 1
+                    return handle
+            with METRICS.span("shard_load"):
+                handle = IndexHandle(*loader(), loader=loader)
+            with self._lock:
+                self.misses += 1
+                self._handles[key] = handle
+                self._pins[key] = 1
+                self._loading.pop(key, None)
+                evicted = self._evict()
+        self._close(evicted)
+        return handle
+
+    def unpin(self, key):
+        with self._lock:
+            self._pins[key] -= 1
+            evicted = self._evict()
+        self._close(evicted)
+
+    def _evict(self):
+        # Kilit altında çağrılır; kapatma kilit dışında yapılır
+        evicted = []
+        for key in list(self._handles):
+            if len(self._handles) <= self.max_shards:
+                break
+            if not self._pins[key]:
+                evicted.append(self._handles.pop(key))
+                del self._pins[key]
+        self.evicted += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _close(handles):
+        for handle in handles:
+            handle.close()
+
+    def discard(self, predicate):
+        """predicate(key) doğru olan sabitlenmemiş parçaları kapatır."""
+        with self._lock:
+            keys = [k for k in self._handles if predicate(k) and not self._pins[k]]
+            handles = [self._handles.pop(k) for k in keys]
+            for k in keys:
+                del self._pins[k]
+        self._close(handles)
+
+    def close(self):
+        self.discard(lambda key: True)
+
+    def memory(self):
+        with self._lock:
+            handles = list(self._handles.values())
+        return sum(h.memory() for h in handles if h.store is not None)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._handles), "max_size": self.max_shards, "hits": self.hits,
+                    "misses": self.misses, "evicted": self.evicted,
+                    "resident": sorted(f"{name}/{shard}" for name, shard in self._handles)}
+
+
+class Collection:
+    """Bir koleksiyonun parçaları; arama parçalara paralel dağıtılır.
+
+    manifest.json değiştiğinde (yeniden derleme) parça listesi en fazla
+    reload_interval saniyede bir yenilenir; parçaların kendisi IndexHandle
+    üzerinden yerinde yeniden yüklenir.
+    """
+
+    def __init__(self, name, root, cache, pool, hybrid=HYBRID, reload_interval=DOCSTORE_RELOAD_INTERVAL):
+        self.name = name
+        self.root = Path(root)
+        self.cache = cache
+        self.pool = pool
+        self.hybrid = hybrid
+        self.reload_interval = reload_interval
+        self.prompt = read_settings(self.root)["prompt"]
+        self._read_manifest()
+
+    def _read_manifest(self):
+        path = self.root / MANIFEST
+        self._stamp = path.stat().st_mtime_ns
+        self._next_check = time.monotonic() + self.reload_interval
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest["model"] != EMBEDDING_MODEL:
+            raise ValueError(f"'{self.name}' '{manifest['model']}' modeliyle derlenmiş, "
+                             f"yapılandırılan model '{EMBEDDING_MODEL}'")
+        self.shards = sorted(manifest["shards"])
+        self.normalized = manifest["normalized"]
+        self.passages = sum(s["passages"] for s in manifest["shards"].values())
+        # Yanıt önbelleği için: herhangi bir parça değişince değişir
+        payload = json.dumps(manifest["shards"], sort_keys=True).encode("utf-8")
+        self.version = f"{self.name}:{hashlib.sha256(payload).hexdigest()[:16]}"
+
+    def refresh(self):
+        """Manifest değiştiyse parça listesini yeniler; kaldırılan parçaları kapatır."""
+        if time.monotonic() < self._next_check:
+            return False
+        self._next_check = time.monotonic() + self.reload_interval
+        try:
+            if (self.root / MANIFEST).stat().st_mtime_ns == self._stamp:
+                return False
+        except FileNotFoundError:
+            # Koleksiyon silindiyse açık parçalarla devam edilir
+            return False
+        self._read_manifest()
+        self.prompt = read_settings(self.root)["prompt"]
+        shards = set(self.shards)
+        self.cache.discard(lambda key: key[0] == self.name and key[1] not in shards)
+        return True
+
+    def _loader(self, shard):
+        paths = shard_paths(self.root, shard)
+        return lambda: load_chunk_store(self.reload_interval, **paths)
+
+    def _pin(self, shard):
+        # Havuzda çalışır; hata fırlatmak yerine döndürür ki sabitlenen diğer parçalar bırakılabilsin
+        try:
+            return self.cache.pin((self.name, shard), self._loader(shard))
+        except Exception as e:
+            return e
+
+    def search_batch(self, model, queries, top_k, cache=None, embeddings=None):
+        """Her sorgu için parçaların birleşik top_k pasajı (skor sırasıyla).
+
+        embeddings verilirse (ör. MicroBatcher'dan) sorgular yeniden gömülmez.
+        """
+        self.refresh()
+        depth = max(top_k, HYBRID_DEPTH) if self.hybrid else top_k
+        if embeddings is None:
+            embeddings = encode_queries(model, queries, self.normalized, cache)
+        embeddings = np.ascontiguousarray(embeddings, dtype="float32").reshape(len(queries), -1)
+
+        # Yüklemeler de paralel: soğuk koleksiyonda parçalar aynı anda açılır
+        shards = self.shards
+        opened = self._map(self._pin, shards)
+        handles = {shard: h for shard, h in zip(shards, opened) if not isinstance(h, Exception)}
+        try:
+            for error in opened:
+                if isinstance(error, Exception):
+                    raise error
+            # Yenileme (yazma kilidi) havuz dışında ve okuma kilitleri alınmadan yapılır;
+            # havuzdaki aramalar hiçbir kilidi beklemez, kilitlenme olmaz
+            for handle in handles.values():
+                handle.refresh()
+            with ExitStack() as stack:
+                # Okuma kilitleri birleştirme bitene kadar tutulur; parça arada değiştirilemez
+                pairs = {shard: stack.enter_context(handle.read()) for shard, handle in handles.items()}
+
+                def search_shard(shard):
+                    index, store = pairs[shard]
+                    with METRICS.span("shard_search"):
+                        distances, ids = index.search(embeddings, depth)
+                        lexical = store.bm25.search_batch(queries, depth) if self.hybrid and store.bm25 else None
+                    return distances, ids, lexical
+
+                with METRICS.span("search"):
+                    results = dict(zip(pairs, self._map(search_shard, list(pairs))))
+                with METRICS.span("passages"):
+                    return [self._merge(q, results, pairs, top_k, depth) for q in range(len(queries))]
+        finally:
+            for shard in handles:
+                self.cache.unpin((self.name, shard))
+
+    def search(self, model, query, top_k, cache=None, embedding=None):
+        embeddings = None if embedding is None else [embedding]
+        return self.search_batch(model, [query], top_k, cache, embeddings)[0]
+
+    def _map(self, fn, items):
+        # Tek parçada havuz atlanır
+        if len(items) == 1:
+            return [fn(items[0])]
+        return list(self.pool.map(fn, items))
+
+    def _merge(self, q, results, pairs, top_k, depth):
+        """q. sorgu için parça sonuçlarını birleştirir; anahtar (parça, vektör kimliği)."""
+        distances, keys = [], []
+        lexical_scores, lexical_keys = [], []
+        for shard, (d, ids, lexical) in results.items():
+            found = ids[q] >= 0
+            distances.append(d[q][found])
+            keys.extend((shard, int(i)) for i in ids[q][found])
+            if lexical is not None:
+                lex_ids, lex_scores = lexical[q]
+                lexical_scores.append(lex_scores)
+                lexical_keys.extend((shard, int(i)) for i in lex_ids)
+        distances = np.concatenate(distances)
+        dense = [(keys[i], -float(distances[i])) for i in np.argsort(distances, kind="stable")[:depth]]
+        if lexical_keys:
+            # BM25 skorları parçaların kendi IDF'leriyle hesaplanır; parçalar aynı
+            # dağılımdan geldiği için (CRC32) doğrudan karşılaştırılabilir kabul edilir
+            order = np.argsort(-np.concatenate(lexical_scores), kind="stable")[:depth]
+            fused = reciprocal_rank_fusion([[key for key, _ in dense], [lexical_keys[i] for i in order]])
+        else:
+            fused = dense
+        return [to_passage(pairs[shard][1], vector_id, score) for (shard, vector_id), score in fused[:top_k]]
+
+
+class CollectionRegistry:
+    """COLLECTIONS_DIR altındaki koleksiyonlar; her biri ilk kullanımda açılır.
+
+    Klasör her names() çağrısında yeniden taranır: derlenen yeni bir koleksiyon
+    süreç yeniden başlatılmadan kullanılabilir.
+    """
+
+    def __init__(self, root=COLLECTIONS_DIR, max_shards=COLLECTION_MAX_SHARDS, workers=COLLECTION_SEARCH_WORKERS,
+                 hybrid=HYBRID, reload_interval=DOCSTORE_RELOAD_INTERVAL):
+        self.root = Path(root)
+        self.hybrid = hybrid
+        self.reload_interval = reload_interval
+        self.cache = ShardCache(max_shards)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard")
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / MANIFEST).exists() and _VALID_NAME.match(p.name))
+
+    def __contains__(self, name):
+        return bool(_VALID_NAME.match(name)) and (self.root / name / MANIFEST).exists()
+
+    def get(self, name):
+        """Koleksiyonu döndürür; yoksa (ya da derlenmemişse) KeyError."""
+        if name not in self:
+            raise KeyError(f"Koleksiyon bulunamadı: {name}")
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = self._collections[name] = Collection(name, self.root / name, self.cache, self.pool,
+                                                                  self.hybrid, self.reload_interval)
+            return collection
+
+    def memory(self):
+        return self.cache.memory()
+
+    def stats(self):
+        return {"collections": self.names(), **self.cache.stats()}
+
+    def close(self):
+        self.cache.close()
+        self.pool.shutdown(wait=False)
+
+
+def main():
+    from startup import load_embedding_model
+
+    parser = argparse.ArgumentParser(description="Çok korpuslu, parçalı koleksiyonlar")
+    parser.add_argument("--root", type=Path, default=COLLECTIONS_DIR, help="Koleksiyonların klasörü")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Koleksiyonu derle/güncelle (collections/<ad>/docs/*.txt)")
+    build.add_argument("name")
+    build.add_argument("--shards", type=int, help="Parça sayısı (varsayılan collection.json ya da ayar)")
+    build.add_argument("--full", action="store_true", help="Manifestoyu yok say, her şeyi yeniden göm")
+    build.add_argument("--workers", type=int, default=EMBED_WORKERS, help="Embedding süreç sayısı")
+    sub.add_parser("list", help="Derlenmiş koleksiyonları listele")
+    search = sub.add_parser("search", help="Koleksiyonda ara")
+    search.add_argument("name")
+    search.add_argument("query")
+    search.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not _VALID_NAME.match(args.name):
+            parser.error(f"Geçersiz koleksiyon adı: {args.name}")
+        from build_index import format_stats
+
+        model = load_embedding_model() if args.workers <= 1 else None
+        manifest, stats = build_collection(model, args.root / args.name, args.shards, args.full, args.workers)
+        print(format_stats(stats))
+        print(f"✅ {args.name}: {len(manifest['shards'])} parça, "
+              f"{sum(s['passages'] for s in manifest['shards'].values())} pasaj")
+        return
+
+    registry = CollectionRegistry(args.root)
+    if args.command == "list":
+        for name in registry.names():
+            collection = registry.get(name)
+            print(f"📚 {name}: {len(collection.shards)} parça, {collection.passages} pasaj")
+        return
+
+    model = load_embedding_model()
+    started = time.perf_counter()
+    passages = registry.get(args.name).search(model, args.query, args.top_k)
+    for p in passages:
+        print(f"{p.score:.4f}  {p.file}  {p.title}")
+    print(f"⏱️ {(time.perf_counter() - started) * 1000:.1f} ms, {registry.cache.stats()}")
+    registry.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Ortak yol ve model ayarları.
+
+Streamlit Cloud kök dizinden, yerel kurulum ise TürkiyeChatbot klasöründen
+çalıştığı için tüm yollar bu dosyanın konumuna göre çözülür.
+"""
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Doküman klasörleri
+DOCS_DIR = BASE_DIR / "docs"
+SECTIONS_DIR = DOCS_DIR / "bolumler"
+CLEAN_DIR = DOCS_DIR / "temizlenmis"
+
+# Dosya düzeyindeki eski index (her dosya tek vektör)
+INDEX_PATH = BASE_DIR / "turkiye_index.faiss"
+FILES_PATH = BASE_DIR / "turkiye_files.meta"
+
+# Pasaj (chunk) düzeyindeki index ve metadata
+CHUNK_INDEX_PATH = BASE_DIR / "turkiye_chunks.faiss"
+CHUNK_META_PATH = BASE_DIR / "turkiye_chunks.meta"
+
+# Pasaj index'inin türü (bkz. index_factory.py): flat, ivf, hnsw, pq, ivfpq
+INDEX_SPEC = os.getenv("TURKIYE_INDEX", "flat")
+
+# Hibrit arama: BM25 yoğun arama ile paralel çalışır, sonuçlar RRF ile birleşir
+HYBRID = os.getenv("TURKIYE_HYBRID", "1") == "1"
+BM25_PATH = BASE_DIR / "turkiye_bm25.npz"
+HYBRID_DEPTH = int(os.getenv("TURKIYE_HYBRID_DEPTH", "20"))
+RRF_K = int(os.getenv("TURKIYE_RRF_K", "60"))
+
+# Paketlenmiş korpus (mmap ile açılır) ve değişiklik kontrol aralığı (saniye)
+CORPUS_PATH = BASE_DIR / "turkiye_corpus.bin"
+DOCSTORE_RELOAD_INTERVAL = float(os.getenv("TURKIYE_DOCSTORE_RELOAD_INTERVAL", "5"))
+
+# Arama kalitesi değerlendirmesi (bkz. evaluate.py): soru -> beklenen bölüm dosyası
+EVAL_QUESTIONS_PATH = Path(os.getenv("TURKIYE_EVAL_QUESTIONS", BASE_DIR / "eval_questions.jsonl"))
+
+# Çok korpuslu koleksiyonlar (bkz. collection.py): her alt klasör bir koleksiyondur.
+# Yeni koleksiyonların parça sayısı, tüm koleksiyonlarda bellekte tutulan en fazla
+# parça (LRU) ve parçalara paralel aramanın iş parçacığı sayısı
+COLLECTIONS_DIR = Path(os.getenv("TURKIYE_COLLECTIONS_DIR", BASE_DIR / "collections"))
+COLLECTION_SHARDS = int(os.getenv("TURKIYE_COLLECTION_SHARDS", "4"))
+COLLECTION_MAX_SHARDS = int(os.getenv("TURKIYE_COLLECTION_MAX_SHARDS", "16"))
+COLLECTION_SEARCH_WORKERS = int(os.getenv("TURKIYE_COLLECTION_SEARCH_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Açılış: index dosyası kopyalanmadan mmap ile açılır; ilk sorgu maliyeti bu sorguyla önceden ödenir
+INDEX_MMAP = os.getenv("TURKIYE_INDEX_MMAP", "1") == "1"
+WARMUP_QUERY = os.getenv("TURKIYE_WARMUP_QUERY", "Türkiye'nin başkenti neresidir?")
+
+# Modeller
+EMBEDDING_MODEL = os.getenv("TURKIYE_EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+# Sabitlenmiş yerel model kopyası (python startup.py pin); varsa hub'a gidilmez
+EMBEDDING_MODEL_DIR = Path(os.getenv("TURKIYE_EMBEDDING_MODEL_DIR", BASE_DIR / "models" / EMBEDDING_MODEL))
+# Embedding arka ucu (bkz. embeddings.py): torch, torch-int8, onnx, onnx-int8
+EMBEDDING_BACKEND = os.getenv("TURKIYE_EMBEDDING_BACKEND", "torch")
+LLM_MODEL = os.getenv("TURKIYE_LLM_MODEL", "gpt-4o-mini")
+
+# Parçalama ayarları (karakter cinsinden)
+CHUNK_SIZE = int(os.getenv("TURKIYE_CHUNK_SIZE", "600"))
+CHUNK_OVERLAP = int(os.getenv("TURKIYE_CHUNK_OVERLAP", "120"))
+TOP_K = int(os.getenv("TURKIYE_TOP_K", "3"))
+
+# İstem bağlamı (bkz. context_builder.py): token bütçesi ve yakın kopya sayılan
+# pasajların kelime üçlüsü Jaccard benzerliği eşiği
+CONTEXT_TOKEN_BUDGET = int(os.getenv("TURKIYE_CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("TURKIYE_CONTEXT_DEDUP_THRESHOLD", "0.8"))
+
+# Çok turlu sohbet (bkz. conversation.py): istemde tutulan son tur sayısı ve token
+# bütçesi, daha eski turların özetinin bütçesi, boşta kalan oturumun silinme süresi
+# (saniye) ve tüm oturumların toplam bellek sınırı. CONVERSATION_LLM=0 ise takip
+# soruları ve özetler LLM çağrısı yapılmadan kurallarla oluşturulur.
+CONVERSATION_TURNS = int(os.getenv("TURKIYE_CONVERSATION_TURNS", "4"))
+CONVERSATION_HISTORY_TOKENS = int(os.getenv("TURKIYE_CONVERSATION_HISTORY_TOKENS", "600"))
+CONVERSATION_SUMMARY_TOKENS = int(os.getenv("TURKIYE_CONVERSATION_SUMMARY_TOKENS", "200"))
+CONVERSATION_IDLE_SECONDS = float(os.getenv("TURKIYE_CONVERSATION_IDLE_SECONDS", "1800"))
+CONVERSATION_MAX_MB = float(os.getenv("TURKIYE_CONVERSATION_MAX_MB", "64"))
+CONVERSATION_LLM = os.getenv("TURKIYE_CONVERSATION_LLM", "1") == "1"
+
+# Index derlemede embedding üretimi (bkz. embed_pool.py): parça başına pasaj, model
+# grup boyutu, süreç sayısı ve yarıda kalan derlemenin parçalarının saklandığı klasör
+EMBED_SHARD_SIZE = int(os.getenv("TURKIYE_EMBED_SHARD_SIZE", "2048"))
+EMBED_BATCH_SIZE = int(os.getenv("TURKIYE_EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.getenv("TURKIYE_EMBED_WORKERS", "1"))
+EMBED_DTYPE = os.getenv("TURKIYE_EMBED_DTYPE", "float32")
+EMBED_CHECKPOINT_DIR = BASE_DIR / ".embed_checkpoint"
+
+# Sorgu embedding önbelleği (yol boşsa diske yazılmaz)
+QUERY_CACHE_SIZE = int(os.getenv("TURKIYE_QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_PATH = os.getenv("TURKIYE_QUERY_CACHE_PATH", "")
+
+# Anlamsal yanıt önbelleği
+ANSWER_CACHE_THRESHOLD = float(os.getenv("TURKIYE_ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = int(os.getenv("TURKIYE_ANSWER_CACHE_TTL", str(24 * 3600)))
+ANSWER_CACHE_SIZE = int(os.getenv("TURKIYE_ANSWER_CACHE_SIZE", "1000"))
+
+# Yanıtı token token göster; TURKIYE_FAKE_LLM=1 ise OpenAI yerine sahte istemci kullanılır
+STREAMING = os.getenv("TURKIYE_STREAMING", "1") == "1"
+FAKE_LLM = os.getenv("TURKIYE_FAKE_LLM", "0") == "1"
+
+# HTTP API (api_server.py)
+API_WORKERS = int(os.getenv("TURKIYE_API_WORKERS", str(min(8, os.cpu_count() or 1))))
+API_MAX_INFLIGHT = int(os.getenv("TURKIYE_API_MAX_INFLIGHT", "64"))
+API_MAX_QUEUE = int(os.getenv("TURKIYE_API_MAX_QUEUE", "512"))
+LLM_MAX_CONNECTIONS = int(os.getenv("TURKIYE_LLM_MAX_CONNECTIONS", "100"))
+LLM_TIMEOUT = float(os.getenv("TURKIYE_LLM_TIMEOUT", "60"))
+# /retrieve isteğinde top_k'nin üst sınırı; daha büyük değerler buna indirilir
+MAX_TOP_K = int(os.getenv("TURKIYE_MAX_TOP_K", "50"))
+
+# LLM çağrılarında yeniden deneme, devre kesici ve aynı istemlerin birleştirilmesi (llm_client.py)
+LLM_RETRIES = int(os.getenv("TURKIYE_LLM_RETRIES", "2"))
+LLM_BACKOFF = float(os.getenv("TURKIYE_LLM_BACKOFF", "0.5"))
+LLM_MAX_BACKOFF = float(os.getenv("TURKIYE_LLM_MAX_BACKOFF", "8"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("TURKIYE_LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.getenv("TURKIYE_LLM_BREAKER_RESET", "30"))
+LLM_COALESCE = os.getenv("TURKIYE_LLM_COALESCE", "1") == "1"
+
+# Sorgu embedding'lerinde mikro-toplama (API sunucusu)
+BATCH_MAX_SIZE = int(os.getenv("TURKIYE_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("TURKIYE_BATCH_MAX_WAIT_MS", "5"))
+
+# Aşama süreleri ve önbellek ölçümleri (bkz. metrics.py). Port verilirse Streamlit
+# süreci Prometheus metinlerini http://127.0.0.1:<port>/metrics adresinden sunar
+METRICS = os.getenv("TURKIYE_METRICS", "1") == "1"
+METRICS_PORT = int(os.getenv("TURKIYE_METRICS_PORT", "0"))
+DEBUG_PANEL = os.getenv("TURKIYE_DEBUG_PANEL", "0") == "1"
@@ -0,0 +1,139 @@
+"""Token bütçeli istem bağlamı.
+
+Pasajlar skora göre sıralanır ve bütçe dolana kadar en iyisinden başlayarak
+eklenir; sığmayan pasaj atlanır, daha kısa olan sonrakiler denenir. En iyi
+pasaj tek başına bütçeyi aşıyorsa cümle sınırından kısaltılır, böylece en
+ilgili bilgi hiçbir zaman düşmez. Aynı dokümanın örtüşen pasajları ve
+metni neredeyse aynı olan pasajlar bir kez eklenir.
+
+Token'lar LLM modelinin tiktoken kodlamasıyla sayılır. Kodlama dosyası
+yerelde yoksa (çevrimdışı ortam, bkz. TIKTOKEN_CACHE_DIR) UTF-8 bayt / 4
+ile temkinli bir tahmine düşülür.
+"""
+import math
+import re
+import warnings
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from chunking import split_sentences
+from config import CONTEXT_DEDUP_THRESHOLD, CONTEXT_TOKEN_BUDGET, LLM_MODEL
+
+_WORD = re.compile(r"\w+")
+SEPARATOR = "\n\n"
+
+
+def _estimate_tokens(text):
+    # Türkçe metinde BPE token'ı ortalama 3-4 bayttır; bütçeyi aşmamak için yukarı yuvarlanır
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+
+@lru_cache(maxsize=None)
+def token_counter(model=LLM_MODEL):
+    """model için metin -> token sayısı fonksiyonu."""
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        warnings.warn(f"tiktoken kodlaması yüklenemedi ({type(e).__name__}); token sayısı tahmin ediliyor")
+        return _estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+@dataclass
+class Context:
+    """İsteme giren bağlam ve onu oluşturan pasajlar."""
+    text: str
+    passages: list
+    tokens: int
+    budget: int
+    duplicates: int = 0  # yakın kopya diye atlanan pasaj sayısı
+    dropped: list = field(default_factory=list)  # bütçeye sığmayan pasajlar
+
+    @property
+    def sources(self):
+        return list(dict.fromkeys(p.title for p in self.passages))
+
+
+def _shingles(text):
+    words = _WORD.findall(text.lower())
+    return {tuple(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+
+
+def _overlap(a, b):
+    """Aynı dokümandaki iki pasajın bayt aralıklarının kısa olana oranla örtüşmesi."""
+    if a.file != b.file:
+        return 0.0
+    shared = min(a.end, b.end) - max(a.start, b.start)
+    return max(shared, 0) / max(min(a.end - a.start, b.end - b.start), 1)
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def truncate(text, budget, count_tokens):
+    """Metni cümle sınırından budget token'a sığacak kadar kısaltır."""
+    out = ""
+    for start, end in split_sentences(text):
+        candidate = text[:end]
+        if count_tokens(candidate) > budget:
+            break
+        out = candidate
+    if not out:
+        # Tek cümle bile sığmıyor: sığan en uzun önek ikili aramayla bulunur
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(text[:middle].rstrip()) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        out = text[:low]
+    return out.rstrip()
+
+
+class ContextBuilder:
+    """Pasajları token bütçesine göre paketler (bkz. modül açıklaması)."""
+
+    def __init__(self, budget=CONTEXT_TOKEN_BUDGET, dedup_threshold=CONTEXT_DEDUP_THRESHOLD,
+                 count_tokens=None, model=LLM_MODEL):
+        self.budget = budget
+        self.dedup_threshold = dedup_threshold
+        self.count_tokens = count_tokens or token_counter(model)
+        self._separator_tokens = self.count_tokens(SEPARATOR)
+
+    @staticmethod
+    def format(passage, text=None):
+        return f"[{passage.title}]\n{passage.text if text is None else text}"
+
+    def build(self, passages):
+        ranked = sorted(passages, key=lambda p: p.score, reverse=True)
+        kept, blocks, shingles, dropped = [], [], [], []
+        duplicates = 0
+        used = 0
+        for passage in ranked:
+            current = _shingles(passage.text)
+            if any(_overlap(passage, other) >= self.dedup_threshold or _jaccard(current, seen) >= self.dedup_threshold
+                   for other, seen in zip(kept, shingles)):
+                duplicates += 1
+                continue
+            block = self.format(passage)
+            cost = self.count_tokens(block) + (self._separator_tokens if blocks else 0)
+            if used + cost > self.budget:
+                if blocks:
+                    dropped.append(passage)
+                    continue
+                # En ilgili pasaj tek başına sığmıyor: düşürmek yerine kısaltılır
+                header = self.count_tokens(self.format(passage, ""))
+                block = self.format(passage, truncate(passage.text, self.budget - header, self.count_tokens))
+                cost = self.count_tokens(block)
+            kept.append(passage)
+            blocks.append(block)
+            shingles.append(current)
+            used += cost
+        return Context(SEPARATOR.join(blocks), kept, used, self.budget, duplicates, dropped)
@@ -0,0 +1,316 @@
+"""Çok turlu sohbet belleği: kayan pencere, özet ve bağımsız arama sorgusu.
+
+Her oturumun son CONVERSATION_TURNS turu istemde aynen yer alır; pencereden
+ya da CONVERSATION_HISTORY_TOKENS bütçesinden taşan eski turlar tek bir
+özete katlanır (en fazla CONVERSATION_SUMMARY_TOKENS). Böylece istem
+büyüklüğü sohbet ne kadar uzarsa uzasın özet + pencere + bağlam bütçesiyle
+sınırlı kalır.
+
+"peki nüfusu?" gibi takip soruları geçmişi bilmeyen arama için bağımsız bir
+sorguya çevrilir. Takip gibi görünmeyen sorularda (ya da ilk soruda) LLM
+çağrılmaz; LLM yoksa veya hata verirse önceki sorgu ile birleştirmeye düşülür.
+
+Oturumlar süreçte tek bir ConversationStore'da yalnızca metin olarak tutulur.
+CONVERSATION_IDLE_SECONDS boyunca kullanılmayan oturumlar ve toplam boyut
+CONVERSATION_MAX_MB'ı aştığında en uzun süredir kullanılmayanlar silinir.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    CONVERSATION_HISTORY_TOKENS, CONVERSATION_IDLE_SECONDS, CONVERSATION_LLM, CONVERSATION_MAX_MB,
+    CONVERSATION_SUMMARY_TOKENS, CONVERSATION_TURNS, LLM_MODEL,
+)
+from context_builder import token_counter, truncate
+from llm import complete
+from metrics import METRICS
+
+# Takip sorusunu belli eden baş kelimeler (bağlaç ve gönderme zamirleri)
+FOLLOW_UP_WORDS = frozenset(
+    "peki ya ayrıca o bu şu onun bunun şunun onu bunu onlar bunlar onların orası burası "
+    "orada burada oranın buranın oraya neden niye".split()
+)
+# Sorunun herhangi bir yerinde geçtiğinde önceki konuya gönderme yapan zamirler
+REFERRING_WORDS = frozenset(
+    "onun bunun şunun onu bunu şunu onlar bunlar onların bunların orası burası orada burada "
+    "oranın buranın oraya buraya oradaki buradaki".split()
+)
+_CONNECTIVES = ("peki", "ya", "ayrıca")
+_WORD = re.compile(r"\w+")
+# Tur başına sabit yük (nesne, liste yuvası); bellek sınırı için yaklaşık değer
+_TURN_OVERHEAD = 200
+
+REWRITE_PROMPT = """Aşağıdaki sohbete göre son soruyu, sohbeti bilmeyen birinin anlayacağı tek bir arama sorgusuna çevir.
+Yalnızca sorguyu yaz.
+
+{history}
+
+Son soru: {question}
+"""
+
+SUMMARY_PROMPT = """Aşağıdaki konuşma özetini yeni turlarla güncelle. En fazla {words} kelime kullan; konuşulan
+konuları ve verilen önemli bilgileri koru, yalnızca özeti yaz.
+
+Mevcut özet: {summary}
+
+Yeni turlar:
+{turns}
+"""
+
+
+class Turn:
+    """Tek bir soru-yanıt turu; query aramada kullanılan bağımsız sorgudur."""
+
+    __slots__ = ("question", "query", "answer")
+
+    def __init__(self, question, query, answer):
+        self.question = question
+        self.query = query
+        self.answer = answer
+
+    def nbytes(self):
+        return len(self.question.encode()) + len(self.query.encode()) + len(self.answer.encode()) + _TURN_OVERHEAD
+
+
+class Conversation:
+    """Bir oturumun özeti ve pencere içindeki turları."""
+
+    def __init__(self, session_id, now):
+        self.session_id = session_id
+        self.summary = ""
+        self.turns = []
+        self.last_used = now
+        self.folding = False  # eski turlar kilit dışında özetleniyor
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.turns)
+
+    def nbytes(self):
+        return len(self.summary.encode()) + sum(turn.nbytes() for turn in self.turns) + _TURN_OVERHEAD
+
+    def messages(self):
+        """İsteme eklenecek geçmiş: özet (varsa) ve penceredeki turlar."""
+        out = []
+        if self.summary:
+            out.append({"role": "system", "content": f"Önceki konuşmanın özeti: {self.summary}"})
+        for turn in self.turns:
+            out.append({"role": "user", "content": turn.question})
+            out.append({"role": "assistant", "content": turn.answer})
+        return out
+
+
+def transcript(turns):
+    return "\n".join(f"Kullanıcı: {t.question}\nAsistan: {t.answer}" for t in turns)
+
+
+def is_follow_up(question):
+    """Soru önceki turlara dayanıyor mu: bağlaçla ya da zamirle başlıyor veya gönderme zamiri içeriyor.
+
+    Uzunluğa bakılmaz; "TEKNOFEST nedir?" gibi kısa ama bağımsız sorular olduğu gibi aranır.
+    """
+    words = _WORD.findall(question.lower())
+    if not words:
+        return False
+    return words[0] in FOLLOW_UP_WORDS or any(word in REFERRING_WORDS for word in words)
+
+
+def _strip_follow_up(question):
+    words = question.split()
+    while words and "".join(_WORD.findall(words[0].lower())) in _CONNECTIVES:
+        words.pop(0)
+    return " ".join(words)
+
+
+def combine_query(previous, question, max_words=12):
+    """LLM'siz bağımsız sorgu: önceki sorgunun ilk kelimeleri + bağlaçsız yeni soru."""
+    return " ".join(previous.split()[:max_words] + [_strip_follow_up(question) or question])
+
+
+def extractive_summary(summary, turns):
+    """LLM'siz özet: her tur için soru ve yanıtın ilk cümlesi."""
+    from chunking import split_sentences
+
+    parts = [summary] if summary else []
+    for turn in turns:
+        spans = split_sentences(turn.answer)
+        first = turn.answer[:spans[0][1]] if spans else turn.answer
+        parts.append(f"{turn.question} — {first}")
+    return " ".join(parts)
+
+
+class ConversationStore:
+    """Oturum kimliği -> Conversation; boşta kalma ve bellek sınırıyla siler.
+
+    LLM çağrıları (yeniden yazım, özet) deponun kilidi dışında yapılır; bir
+    oturumun özeti diğer oturumları bekletmez.
+    """
+
+    def __init__(self, max_turns=CONVERSATION_TURNS, history_tokens=CONVERSATION_HISTORY_TOKENS,
+                 summary_tokens=CONVERSATION_SUMMARY_TOKENS, max_idle=CONVERSATION_IDLE_SECONDS,
+                 max_mb=CONVERSATION_MAX_MB, use_llm=CONVERSATION_LLM, count_tokens=None,
+                 clock=time.monotonic):
+        self.max_turns = max_turns
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        self.max_idle = max_idle
+        self.max_bytes = int(max_mb * 2**20)
+        self.use_llm = use_llm
+        self.count_tokens = count_tokens or token_counter()
+        self.clock = clock
+        # Metriklerde önbellek gibi görünür: hits sürdürülen, misses yeni açılan oturumlar
+        self.hits = self.misses = 0
+        self.evicted = 0
+        self.summarized = 0
+        self.rewritten = 0
+        self._sessions = OrderedDict()
+        self._bytes = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def get(self, session_id):
+        """Oturumu döndürür (yoksa oluşturur) ve kullanılmış sayar."""
+        now = self.clock()
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                conversation = self._sessions[session_id] = Conversation(session_id, now)
+                self._resize(session_id, conversation.nbytes())
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._sessions.move_to_end(session_id)
+                conversation.last_used = now
+            self._evict(now, keep=session_id)
+        return conversation
+
+    def drop(self, session_id):
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._resize(session_id, 0)
+            del self._sessions[session_id], self._bytes[session_id]
+            return True
+
+    def _resize(self, session_id, size):
+        self._total += size - self._bytes.get(session_id, 0)
+        self._bytes[session_id] = size
+
+    def _evict(self, now, keep=None):
+        # Sözlük son kullanıma göre sıralı: boşta kalanlar baştadır
+        while self._sessions:
+            session_id, oldest = next(iter(self._sessions.items()))
+            if session_id == keep or now - oldest.last_used <= self.max_idle:
+                break
+            self._remove(session_id)
+        for session_id in list(self._sessions):
+            if self._total <= self.max_bytes:
+                break
+            if session_id != keep:
+                self._remove(session_id)
+
+    def _remove(self, session_id):
+        self._resize(session_id, 0)
+        del self._sessions[session_id], self._bytes[session_id]
+        self.evicted += 1
+
+    def standalone(self, conversation, question, client=None, model=LLM_MODEL):
+        """Aramada kullanılacak bağımsız sorgu."""
+        with conversation.lock:
+            if not conversation.turns or not is_follow_up(question):
+                return question
+            previous = conversation.turns[-1].query
+            if client is None or not self.use_llm:
+                return combine_query(previous, question)
+            history = "\n".join(filter(None, [f"Özet: {conversation.summary}" if conversation.summary else "",
+                                              transcript(conversation.turns[-2:])]))
+        messages = [{"role": "user", "content": REWRITE_PROMPT.format(history=history, question=question)}]
+        try:
+            with METRICS.span("rewrite"):
+                query = (complete(client, messages, model=model, temperature=0, max_tokens=64) or "").strip()
+        except Exception:
+            query = ""
+        self.rewritten += bool(query)
+        return query or combine_query(previous, question)
+
+    def record(self, conversation, question, query, answer, client=None, model=LLM_MODEL):
+        """Turu ekler; pencereden ya da token bütçesinden taşan eski turları özete katlar.
+
+        Özet (LLM çağrısı) oturum kilidi dışında üretilir; katlanan turlar özet
+        hazır olana kadar pencerede kalır, o sırada gelen turlar katlama yapmaz.
+        """
+        # Tek bir çok uzun yanıt da pencereyi tek başına doldurmasın
+        answer = truncate(answer, self.history_tokens // 2, self.count_tokens)
+        with conversation.lock:
+            conversation.turns.append(Turn(question, query, answer))
+            folded = []
+            if not conversation.folding and (len(conversation.turns) > self.max_turns or
+                                             self._tokens(conversation.turns) > self.history_tokens):
+                # Pencerenin yarısına kadar katlanır: özet her turda değil birkaç turda bir yenilenir
+                kept = conversation.turns
+                while len(kept) > 1 and (len(kept) > max(1, self.max_turns // 2) or
+                                         self._tokens(kept) > self.history_tokens // 2):
+                    kept = kept[1:]
+                folded = conversation.turns[:len(conversation.turns) - len(kept)]
+                conversation.folding = bool(folded)
+            previous = conversation.summary
+        if folded:
+            summary = None
+            try:
+                summary = self._summarize(previous, folded, client, model)
+            finally:
+                with conversation.lock:
+                    # Katlama sürerken yalnızca sona tur eklenir; katlanan turlar hâlâ baştadır
+                    if summary is not None:
+                        del conversation.turns[:len(folded)]
+                        conversation.summary = summary
+                        self.summarized += 1
+                    conversation.folding = False
+        with conversation.lock:
+            conversation.last_used = self.clock()
+            size = conversation.nbytes()
+        with self._lock:
+            if conversation.session_id in self._sessions:
+                self._sessions.move_to_end(conversation.session_id)
+                self._resize(conversation.session_id, size)
+                self._evict(conversation.last_used, keep=conversation.session_id)
+
+    def _tokens(self, turns):
+        # Özet kendi bütçesiyle sınırlı; pencere bütçesine yalnızca turlar girer
+        return sum(self.count_tokens(t.question) + self.count_tokens(t.answer) for t in turns)
+
+    def _summarize(self, summary, turns, client, model):
+        summary_text = ""
+        if client is not None and self.use_llm:
+            prompt = SUMMARY_PROMPT.format(words=self.summary_tokens // 2, summary=summary or "-",
+                                           turns=transcript(turns))
+            try:
+                with METRICS.span("summarize"):
+                    summary_text = complete(client, [{"role": "user", "content": prompt}], model=model,
+                                            temperature=0, max_tokens=self.summary_tokens) or ""
+            except Exception:
+                summary_text = ""
+        summary_text = summary_text.strip() or extractive_summary(summary, turns)
+        if self.count_tokens(summary_text) <= self.summary_tokens:
+            return summary_text
+        # Bütçe aşılırsa en yeni bilgiler kalsın: baştan kırpılır
+        words = summary_text.split()
+        while words and self.count_tokens(" ".join(words)) > self.summary_tokens:
+            words = words[max(1, len(words) // 8):]
+        return " ".join(words)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._sessions), "hits": self.hits, "misses": self.misses,
+                    "bytes": self._total, "max_bytes": self.max_bytes, "evicted": self.evicted,
+                    "summarized": self.summarized, "rewritten": self.rewritten}
+
+    def memory(self):
+        with self._lock:
+            return self._total
@@ -0,0 +1,165 @@
+"""Bellekte tutulan doküman deposu.
+
+Dokümanlar ya açılışta bir kez klasörden okunur ya da tek bir paketlenmiş
+korpus dosyası (turkiye_corpus.bin) mmap ile eşlenir. Pasaj erişimi
+memoryview dilimidir; sorgu sırasında dosya açılmaz, kopya yapılmaz.
+
+Paket düzeni (little-endian):
+    8 bayt   sihirli değer b"TRCORP01"
+    u32      doküman sayısı (n), u32 ayrılmış
+    n kayıt  u64 ofset, u64 uzunluk, 32 bayt SHA-256
+    u32      ad bloğu uzunluğu, ardından "\\0" ile ayrılmış UTF-8 adlar
+    veri     dokümanların art arda eklenmiş baytları
+"""
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+
+MAGIC = b"TRCORP01"
+_HEADER = struct.Struct("<8sII")
+_RECORD = struct.Struct("<QQ32s")
+_U32 = struct.Struct("<I")
+
+
+class DocStore:
+    """Ad -> (ofset, uzunluk) tablosu üzerinden sıfır kopyalı erişim."""
+
+    def __init__(self, buffer, table, path=None, closer=None):
+        self._buffer = memoryview(buffer)
+        self._table = table
+        self.path = path
+        self._closer = closer
+        digests = b"".join(digest for _, _, digest in sorted(table.values(), key=lambda r: r[0]))
+        self.version = hashlib.sha256(digests).hexdigest()[:16]
+
+    def __len__(self):
+        return len(self._table)
+
+    def memory(self):
+        return self._buffer.nbytes
+
+    def __contains__(self, name):
+        return name in self._table
+
+    def names(self):
+        return list(self._table)
+
+    def digest(self, name):
+        return self._table[name][2].hex()
+
+    def view(self, name, start=0, end=None):
+        """Dokümanın [start, end) bayt aralığını kopyasız memoryview olarak döndürür."""
+        offset, length, _ = self._table[name]
+        end = length if end is None else min(end, length)
+        return self._buffer[offset + start:offset + end]
+
+    def text(self, name, start=0, end=None):
+        return str(self.view(name, start, end), "utf-8")
+
+    def close(self):
+        self._buffer.release()
+        if self._closer is not None:
+            try:
+                self._closer()
+            except BufferError:
+                # Dışarıda hâlâ dilimler var; mmap son referansla birlikte kapanır
+                pass
+
+    # -----------------------------
+    # Oluşturma
+    # -----------------------------
+    @classmethod
+    def from_files(cls, paths):
+        """Dosyaları tek bir bellek bloğuna okur."""
+        data = bytearray()
+        table = {}
+        for path in paths:
+            path = Path(path)
+            content = path.read_bytes()
+            table[path.name] = (len(data), len(content), hashlib.sha256(content).digest())
+            data += content
+        return cls(bytes(data), table)
+
+    @classmethod
+    def from_folder(cls, folder, pattern="*.txt"):
+        return cls.from_files(sorted(Path(folder).glob(pattern)))
+
+    @classmethod
+    def open(cls, path):
+        """Paketlenmiş korpus dosyasını salt okunur mmap ile açar (O(1) yükleme)."""
+        path = Path(path)
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, count, _ = _HEADER.unpack_from(mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path.name} bir korpus paketi değil")
+            pos = _HEADER.size
+            records = [_RECORD.unpack_from(mm, pos + i * _RECORD.size) for i in range(count)]
+            pos += count * _RECORD.size
+            (names_len,) = _U32.unpack_from(mm, pos)
+            pos += _U32.size
+            names = bytes(mm[pos:pos + names_len]).decode("utf-8").split("\0") if count else []
+            data_start = pos + names_len
+        except Exception:
+            mm.close()
+            raise
+        table = {name: (data_start + offset, length, digest)
+                 for name, (offset, length, digest) in zip(names, records)}
+        return cls(mm, table, path=path, closer=mm.close)
+
+
+class CorpusWriter:
+    """Dokümanları akış halinde paket dosyasına yazar.
+
+    Veri önce geçici bir dosyaya eklenir; commit() başlık ve tabloyu yazıp
+    veriyi arkasına kopyalar ve dosyayı atomik olarak yerine taşır. Bellekte
+    yalnızca ad/ofset tablosu tutulur.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.records = []
+        self.names = []
+        self._offset = 0
+        self._data = tempfile.TemporaryFile(dir=self.path.parent)
+
+    def add(self, name, content):
+        self.records.append(_RECORD.pack(self._offset, len(content), hashlib.sha256(content).digest()))
+        self.names.append(name)
+        self._data.write(content)
+        self._offset += len(content)
+
+    def commit(self):
+        names_block = "\0".join(self.names).encode("utf-8")
+        fd, tmp = tempfile.mkstemp(prefix=f".{self.path.name}.", dir=self.path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, len(self.names), 0))
+                f.writelines(self.records)
+                f.write(_U32.pack(len(names_block)))
+                f.write(names_block)
+                self._data.seek(0)
+                shutil.copyfileobj(self._data, f, 1 << 20)
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        finally:
+            self._data.close()
+
+    def abort(self):
+        self._data.close()
+
+
+def pack_corpus(documents, path):
+    """{ad: bayt} sözlüğünü paket dosyasına atomik olarak yazar."""
+    writer = CorpusWriter(path)
+    for name, content in documents.items():
+        writer.add(name, content)
+    writer.commit()
@@ -0,0 +1,162 @@
+"""Toplu embedding üretimi: uzunluğa göre sıralama, süreç havuzu ve kaldığı yerden devam.
+
+Metinler parça (shard) parça gömülür. Her parça, içeriğinin özetiyle
+adlandırılmış bir .npy dosyasına (float32 ya da float16, mmap ile açılır)
+atomik olarak yazılır; yarıda kesilen bir derleme yeniden çalıştırıldığında
+özeti tutan parçalar diskten okunur, yalnızca eksikler gömülür. Derleme
+başarıyla bitince build_index klasörü siler.
+
+workers > 1 iken her süreç modeli kendisi yükler (factory); ana süreç
+yalnızca metinleri dağıtır ve parçaları yazar.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from config import EMBED_BATCH_SIZE, EMBED_CHECKPOINT_DIR, EMBED_DTYPE, EMBED_WORKERS, EMBEDDING_MODEL
+from pools import run_inline
+from startup import load_embedding_model
+
+_model = None
+
+
+def encode_sorted(model, texts, batch_size=EMBED_BATCH_SIZE, normalize=True):
+    """Metinleri uzunluğa göre sıralayıp gruplar halinde gömer, sonucu girdi sırasıyla döndürür.
+
+    Benzer uzunluktaki metinler aynı gruba düştüğü için dolgu (padding) payı azalır.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    vectors = model.encode([texts[i] for i in order], batch_size=batch_size, normalize_embeddings=normalize)
+    out = np.empty_like(np.asarray(vectors, dtype="float32"))
+    out[order] = vectors
+    return out
+
+
+def _init_worker(factory, args):
+    global _model
+    # Süreçler çekirdekleri paylaşır; her biri tek iş parçacığıyla çalışsın
+    try:
+        import torch
+
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    _model = factory(*args)
+
+
+def _encode_in_worker(texts, batch_size):
+    # Normalize vektörlerde L2 sıralaması kosinüs benzerliği sıralamasıyla aynıdır
+    return encode_sorted(_model, texts, batch_size)
+
+
+class ShardCheckpoint:
+    """İçerik özetiyle adlandırılmış embedding parçaları."""
+
+    def __init__(self, directory=EMBED_CHECKPOINT_DIR, dtype=EMBED_DTYPE, model_name=EMBEDDING_MODEL):
+        self.directory = Path(directory)
+        self.dtype = np.dtype(dtype)
+        self.model_name = model_name
+
+    def key(self, texts):
+        digest = hashlib.sha256(f"{self.model_name}\0{self.dtype.str}".encode("utf-8"))
+        for text in texts:
+            digest.update(b"\0" + text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return self.directory / f"{key[:32]}.npy"
+
+    def load(self, key):
+        """Parça varsa mmap ile açar, yoksa None."""
+        path = self.path(key)
+        return np.load(path, mmap_mode="r") if path.exists() else None
+
+    def save(self, key, vectors):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".npy", dir=self.directory)
+        os.close(fd)
+        try:
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=self.dtype, shape=vectors.shape)
+            out[:] = vectors
+            out.flush()
+            del out
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return np.load(path, mmap_mode="r")
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class EmbeddingPool:
+    """Metin parçalarını sırayla gömer; sonuçlar parça sırasıyla mmap diziler olarak döner.
+
+    model verilirse tek süreçte onunla, workers > 1 ise factory(*factory_args)
+    ile her süreçte yüklenen modelle çalışır. Bellekte en fazla workers * 2
+    parça bekler.
+    """
+
+    def __init__(self, model=None, workers=EMBED_WORKERS, batch_size=EMBED_BATCH_SIZE, checkpoint=None,
+                 factory=load_embedding_model, factory_args=(EMBEDDING_MODEL,)):
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint or ShardCheckpoint()
+        self.encoded = 0  # bu çalıştırmada gömülen metin sayısı
+        self.resumed = 0  # diskten okunan metin sayısı
+        self._shards = []
+        self._pending = deque()
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                             initargs=(factory, tuple(factory_args)))
+        else:
+            self._pool = None
+            global _model
+            _model = model if model is not None else factory(*factory_args)
+
+    def submit(self, texts):
+        key = self.checkpoint.key(texts)
+        cached = self.checkpoint.load(key)
+        if cached is not None and len(cached) == len(texts):
+            self.resumed += len(texts)
+            self._pending.append((key, run_inline(lambda: cached), True))
+        else:
+            submit = self._pool.submit if self._pool is not None else run_inline
+            self._pending.append((key, submit(_encode_in_worker, texts, self.batch_size), False))
+        # Tek süreçte parça hemen diske yazılır; havuzda sınırlı sayıda parça bekler
+        while len(self._pending) > (self.workers * 2 if self._pool is not None else 0):
+            self._collect()
+
+    def _collect(self):
+        key, future, cached = self._pending.popleft()
+        vectors = future.result()
+        if not cached:
+            self.encoded += len(vectors)
+            vectors = self.checkpoint.save(key, vectors)
+        self._shards.append(vectors)
+
+    def results(self):
+        """Bekleyen parçaları tamamlar ve tüm parçaları sırayla döndürür."""
+        while self._pending:
+            self._collect()
+        return self._shards
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
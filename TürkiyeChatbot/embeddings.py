@@ -0,0 +1,259 @@
+"""Embedding arka uçları: hepsi SentenceTransformer ile aynı encode arayüzünü sunar.
+
+    torch        SentenceTransformer (fp32, PyTorch) — referans
+    torch-int8   aynı model, Linear katmanları dinamik int8 nicemlenmiş
+    onnx         ONNX Runtime ile dışa aktarılmış model (fp32)
+    onnx-int8    ONNX modeli, ağırlıklar dinamik int8 nicemlenmiş
+
+Arka uç TURKIYE_EMBEDDING_BACKEND ile seçilir; sorgular (RagEngine) ve
+index derleme (build_index, ingest) aynı startup.load_embedding_model
+üzerinden yüklendiği için iki taraf da aynı arka ucu kullanır. Index
+metadata'sı derlendiği arka ucu saklar.
+
+ONNX arka uçları yerel model klasöründe onnx/ alt klasörünü bekler
+(model.onnx, model_int8.onnx, tokenizer.json, encoder.json). Çalışma
+anında torch ve transformers import edilmez; yalnızca onnxruntime ve
+tokenizers gerekir.
+
+Kullanım:
+    python embeddings.py export                       # models/<model>/onnx altına aktar (+ int8)
+    python embeddings.py check --backend onnx-int8    # referansa göre kosinüs benzerliği
+    python embeddings.py bench                        # gecikme, verim ve bellek karşılaştırması
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import print_table
+from config import DOCS_DIR, EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_MODEL_DIR
+from resources import rss_bytes
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+ONNX_DIR = "onnx"
+
+
+class OnnxEncoder:
+    """ONNX Runtime üzerinde transformer + havuzlama (mean / cls)."""
+
+    def __init__(self, model_dir, quantized=False, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        onnx_dir = Path(model_dir) / ONNX_DIR
+        path = onnx_dir / ("model_int8.onnx" if quantized else "model.onnx")
+        if not path.exists():
+            raise FileNotFoundError(f"{path} bulunamadı; önce 'python embeddings.py export' çalıştırın")
+        self.config = json.loads((onnx_dir / "encoder.json").read_text(encoding="utf-8"))
+        self.tokenizer = Tokenizer.from_file(str(onnx_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.config["max_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.path = path
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self._inputs = [i.name for i in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self):
+        return self.config["dim"]
+
+    def memory(self):
+        """ONNX Runtime ağırlıkları dosyadan bir kez okur; yaklaşık boyut dosya boyutudur."""
+        return self.path.stat().st_size
+
+    def _forward(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype="int64"),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype="int64"),
+        }
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype="int64")
+        hidden = self.session.run(None, {name: feeds[name] for name in self._inputs})[0]
+        if self.config["pooling"] == "cls":
+            return hidden[:, 0]
+        mask = feeds["attention_mask"][:, :, None].astype("float32")
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.empty((len(texts), self.config["dim"]), dtype="float32")
+        for start in range(0, len(texts), batch_size):
+            out[start:start + batch_size] = self._forward(texts[start:start + batch_size])
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
+
+
+def load_backend(source, backend=EMBEDDING_BACKEND):
+    """source (yerel klasör ya da hub adı) için seçilen arka ucu yükler."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Bilinmeyen embedding arka ucu '{backend}' (seçenekler: {', '.join(BACKENDS)})")
+    if backend.startswith("onnx"):
+        if not Path(source).is_dir():
+            raise ValueError(f"'{backend}' yerel model klasörü gerektirir; önce 'python embeddings.py export'")
+        return OnnxEncoder(source, quantized=backend == "onnx-int8")
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(source)
+    # Dinamik int8 nicemleme yalnızca CPU'da çalışır
+    import torch
+
+    model = SentenceTransformer(source, device="cpu")
+    torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def export_onnx(source=EMBEDDING_MODEL, out_dir=EMBEDDING_MODEL_DIR, int8=True, opset=17):
+    """Modeli out_dir'e sabitler ve transformer'ı out_dir/onnx altına ONNX olarak aktarır."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = Path(out_dir)
+    model = SentenceTransformer(str(source), device="cpu")
+    if not (out_dir / "modules.json").exists():
+        model.save(str(out_dir))
+    onnx_dir = out_dir / ONNX_DIR
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+
+    transformer, pooling = model[0], model[1]
+    mode = getattr(pooling, "pooling_mode", None) or pooling.get_pooling_mode_str()
+    if mode not in ("mean", "cls"):
+        raise ValueError(f"Desteklenmeyen havuzlama '{mode}'")
+    tokenizer = model.tokenizer
+    tokenizer.backend_tokenizer.save(str(onnx_dir / "tokenizer.json"))
+    config = {"source": str(source), "pooling": mode, "max_length": int(model.max_seq_length),
+              "pad_id": int(tokenizer.pad_token_id), "pad_token": tokenizer.pad_token,
+              "dim": int(model.get_sentence_embedding_dimension())}
+    (onnx_dir / "encoder.json").write_text(json.dumps(config, indent=1), encoding="utf-8")
+
+    dummy = tokenizer(["örnek cümle", "ikinci örnek"], padding=True, return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    axes = {n: {0: "batch", 1: "sequence"} for n in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    auto_model = transformer.auto_model.eval()
+
+    class _Hidden(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = auto_model
+
+        def forward(self, *args):
+            return self.model(**dict(zip(names, args))).last_hidden_state
+
+    with torch.no_grad():
+        torch.onnx.export(_Hidden(), tuple(dummy[n] for n in names), str(onnx_dir / "model.onnx"),
+                          input_names=names, output_names=["last_hidden_state"], dynamic_axes=axes,
+                          opset_version=opset, dynamo=False)
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(onnx_dir / "model.onnx"), str(onnx_dir / "model_int8.onnx"),
+                         weight_type=QuantType.QInt8)
+    return onnx_dir
+
+
+def sample_texts(n=200):
+    """Parite ve benchmark için korpustan cümle düzeyinde örnek metinler."""
+    from chunking import split_sentences
+
+    texts = []
+    for path in sorted((DOCS_DIR / "bolumler").glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        texts.extend(text[s:e] for s, e in split_sentences(text))
+    return texts[:n]
+
+
+def parity(reference, candidate, texts):
+    """Her metin için referans ve aday embedding'ler arasındaki kosinüs benzerliği."""
+    a = np.asarray(reference.encode(texts, normalize_embeddings=True), dtype="float32")
+    b = np.asarray(candidate.encode(texts, normalize_embeddings=True), dtype="float32")
+    return (a * b).sum(axis=1)
+
+
+def _bench_backend(source, backend, texts, queries, batch_size):
+    """Ayrı bir süreçte çalışır; bellek ölçümü diğer arka uçlardan etkilenmez."""
+    before = rss_bytes()
+    started = time.perf_counter()
+    model = load_backend(source, backend)
+    loaded = time.perf_counter()
+    model.encode(texts[:2], normalize_embeddings=True)
+    latencies = []
+    for query in queries:
+        t = time.perf_counter()
+        model.encode([query], normalize_embeddings=True)
+        latencies.append(time.perf_counter() - t)
+    t = time.perf_counter()
+    model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    batch = time.perf_counter() - t
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "backend": backend,
+        "load_s": round(loaded - started, 2),
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "texts_per_s": round(len(texts) / batch, 1),
+        "rss_mb": round((rss_bytes() - before) / 2**20, 1),
+    }
+
+
+def main():
+    from startup import model_source
+
+    parser = argparse.ArgumentParser(description="Embedding arka uçları: dışa aktarma, parite ve benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Modeli ONNX'e (ve int8'e) aktar")
+    export.add_argument("--dir", type=Path, default=EMBEDDING_MODEL_DIR)
+    export.add_argument("--no-int8", action="store_true")
+    check = sub.add_parser("check", help="Arka ucun torch referansına yakınlığını denetle")
+    check.add_argument("--backend", action="append", choices=BACKENDS[1:])
+    check.add_argument("--tolerance", type=float, default=0.98, help="En düşük kabul edilen kosinüs benzerliği")
+    check.add_argument("--texts", type=int, default=200)
+    bench = sub.add_parser("bench", help="Gecikme, verim ve bellek karşılaştırması")
+    bench.add_argument("--backend", action="append", choices=BACKENDS)
+    bench.add_argument("--texts", type=int, default=256)
+    bench.add_argument("--queries", type=int, default=100)
+    bench.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    source = model_source()
+    if args.command == "export":
+        print(f"✅ ONNX -> {export_onnx(source, args.dir, not args.no_int8)}")
+        return
+
+    texts = sample_texts(args.texts)
+    if args.command == "check":
+        reference = load_backend(source, "torch")
+        failed = False
+        for backend in args.backend or BACKENDS[1:]:
+            sims = parity(reference, load_backend(source, backend), texts)
+            ok = float(sims.min()) >= args.tolerance
+            failed |= not ok
+            print(f"{'✅' if ok else '❌'} {backend:<10} min {sims.min():.4f}  ort {sims.mean():.4f}  "
+                  f"(eşik {args.tolerance}, {len(texts)} metin)")
+        raise SystemExit(1 if failed else 0)
+
+    queries = texts[:args.queries]
+    rows = []
+    for backend in args.backend or BACKENDS:
+        with ProcessPoolExecutor(1) as pool:
+            try:
+                rows.append(pool.submit(_bench_backend, source, backend, texts, queries, args.batch_size).result())
+            except Exception as e:
+                rows.append({"backend": backend, "hata": str(e)[:60]})
+    print(f"{len(queries)} tek sorgu, {len(texts)} metin (grup {args.batch_size}), {os.cpu_count()} çekirdek")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
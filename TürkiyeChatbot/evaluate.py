@@ -0,0 +1,204 @@
+"""Arama kalitesi ve hızı: etiketli soru seti üzerinde recall@k, MRR ve QPS.
+
+eval_questions.jsonl her satırda bir soru ve cevabın bulunduğu bölüm
+dosyasını tutar:
+
+    {"question": "Türkiye'nin başkenti neresidir?", "section": "turkiye_genel_bilgiler.txt"}
+
+Sorular toplu halde (tek encode + tek index.search çağrısı, --batch-size)
+arama yollarından geçirilir; Streamlit'teki get_relevant_texts ve API aynı
+retrieval.search_batch'i kullanır. Dönen pasajların dosyası beklenen bölümle
+karşılaştırılır:
+
+    recall@k  beklenen bölüm ilk k pasaj içinde mi
+    mrr       beklenen bölümden ilk pasajın sırasının tersi (ortalama)
+    qps       toplu aramada saniyedeki sorgu (encode dahil)
+
+Her arama yolu (dense, bm25, hybrid) diskteki index ile ve --index ile
+verilen her index türüyle (pasajlar yeniden gömülüp bellekte kurulur) ayrı
+ayrı ölçülür. Hız iyileştirmeleri --baseline ile kalite korumasına bağlanır:
+recall veya MRR temel ölçümden toleranstan fazla düşerse çıkış kodu 1 olur.
+
+Kullanım:
+    python evaluate.py
+    python evaluate.py --index flat --index hnsw:m=16 --index ivfpq --k 1 --k 3 --k 5
+    python evaluate.py --save-baseline eval_baseline.json
+    python evaluate.py --baseline eval_baseline.json --tolerance 0.02
+"""
+import argparse
+import json
+import time
+import unicodedata
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from bench_common import make_retrievers, print_table
+from bm25 import BM25Index
+from config import EVAL_QUESTIONS_PATH
+from embed_pool import encode_sorted
+from index_factory import IndexSpec, create_index
+
+DEFAULT_KS = (1, 3, 5)
+# Gerileme denetiminde karşılaştırılan kalite ölçümleri (QPS yalnızca raporlanır)
+GUARDED = ("recall@", "mrr")
+
+
+def _name(section):
+    return unicodedata.normalize("NFC", Path(section).name)
+
+
+def load_questions(path=EVAL_QUESTIONS_PATH):
+    """[(soru, beklenen bölüm dosyası)]; boş satırlar ve # ile başlayanlar atlanır."""
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            item = json.loads(line)
+            if "question" not in item or "section" not in item:
+                raise ValueError(f"{path}:{line_no}: 'question' ve 'section' alanları gerekli")
+            questions.append((item["question"], _name(item["section"])))
+    return questions
+
+
+def check_sections(questions, store):
+    """Etiketlerdeki bölümlerin index'te bulunduğunu doğrular."""
+    known = {_name(f) for f in store.meta.files}
+    missing = sorted({section for _, section in questions} - known)
+    if missing:
+        raise ValueError(f"Index'te olmayan bölümler: {', '.join(missing)}")
+
+
+def build_variant(spec, vectors, ids):
+    """Aynı pasaj vektörleriyle bellekte spec türünde bir index kurar."""
+    dim = vectors.shape[1]
+    spec = spec.resolve(len(vectors), dim)
+    index = faiss.IndexIDMap2(create_index(spec, dim, vectors))
+    index.add_with_ids(vectors, ids)
+    return spec, index
+
+
+def _by_section(store, retrieve):
+    """Vektör kimliği döndüren arama yolunu bölüm dosyası adı döndürene çevirir."""
+
+    def files(queries, k):
+        return [[_name(store.entry(i)["file"]) for i in ids] for ids in retrieve(queries, k)]
+
+    return files
+
+
+def evaluate(retrieve, questions, ks=DEFAULT_KS, batch_size=32):
+    """Bir arama yolunun recall@k, MRR ve QPS değerleri."""
+    depth = max(ks)
+    found = []
+    started = time.perf_counter()
+    for i in range(0, len(questions), batch_size):
+        found.extend(retrieve([q for q, _ in questions[i:i + batch_size]], depth))
+    seconds = time.perf_counter() - started
+
+    ranks = [next((r for r, f in enumerate(files, 1) if f == section), None)
+             for files, (_, section) in zip(found, questions)]
+    row = {f"recall@{k}": round(float(np.mean([r is not None and r <= k for r in ranks])), 3) for k in ks}
+    row["mrr"] = round(float(np.mean([1.0 / r if r else 0.0 for r in ranks])), 3)
+    row["qps"] = round(len(questions) / seconds, 1)
+    row["ms/sorgu"] = round(seconds / len(questions) * 1000, 2)
+    misses = [(q, section, files[:1]) for (q, section), files, r in zip(questions, found, ranks) if r is None]
+    return row, misses
+
+
+def run(model, index, store, questions, specs=(), ks=DEFAULT_KS, batch_size=32, retrievers=None):
+    """Her (index türü, arama yolu) için bir satır ve ıskalanan sorular."""
+    bm25 = store.bm25 or BM25Index.from_store(store)
+    variants = [("disk", index)]
+    if specs:
+        ids = store.meta.ids.astype("int64")
+        vectors = encode_sorted(model, [store.text(int(i)) for i in ids], batch_size, store.normalized)
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        for spec in specs:
+            resolved, variant = build_variant(IndexSpec.parse(spec), vectors, ids)
+            variants.append((str(resolved), variant))
+
+    rows, misses = [], {}
+    for label, variant in variants:
+        for name, retrieve in make_retrievers(model, variant, store, bm25).items():
+            retrieve = _by_section(store, retrieve)
+            if retrievers and name not in retrievers:
+                continue
+            # BM25 index türünden bağımsızdır; bir kez ölçülür
+            if name == "bm25" and label != "disk":
+                continue
+            row, missed = evaluate(retrieve, questions, ks, batch_size)
+            rows.append({"retriever": name, "index": label if name != "bm25" else "-", **row})
+            misses[f"{name}/{label}"] = missed
+    return rows, misses
+
+
+def compare(rows, baseline, tolerance):
+    """Temel ölçüme göre kalite düşüşleri; (satırlar, gerileme var mı)."""
+    previous = {(r["retriever"], r["index"]): r for r in baseline.get("rows", [])}
+    out, regressed = [], False
+    for row in rows:
+        old = previous.get((row["retriever"], row["index"]))
+        if old is None:
+            continue
+        for key, value in row.items():
+            if not key.startswith(GUARDED) or key not in old:
+                continue
+            change = value - old[key]
+            bad = change < -tolerance
+            regressed |= bad
+            out.append({"ölçüm": f"{row['retriever']}/{row['index']} {key}", "temel": old[key], "şimdi": value,
+                        "fark": f"{change:+.3f}", "": "❌" if bad else "✅"})
+    return out, regressed
+
+
+def main():
+    from retrieval import load_chunk_store
+    from startup import load_embedding_model
+
+    parser = argparse.ArgumentParser(description="Etiketli soru setiyle arama kalitesi ve hızı")
+    parser.add_argument("--questions", type=Path, default=EVAL_QUESTIONS_PATH, help="Soru -> bölüm JSONL dosyası")
+    parser.add_argument("--k", type=int, action="append", help="recall@k için k (tekrarlanabilir; varsayılan 1, 3, 5)")
+    parser.add_argument("--index", action="append", default=[], help="Ek index türü, örn. hnsw:m=16 (tekrarlanabilir)")
+    parser.add_argument("--retriever", action="append", choices=("dense", "bm25", "hybrid"), help="Yalnızca bu arama yolları")
+    parser.add_argument("--batch-size", type=int, default=32, help="Tek encode/search çağrısındaki soru sayısı")
+    parser.add_argument("--misses", action="store_true", help="Beklenen bölümü bulunamayan soruları yazdır")
+    parser.add_argument("--baseline", type=Path, help="Karşılaştırılacak temel ölçüm (JSON)")
+    parser.add_argument("--save-baseline", type=Path, help="Sonuçları temel ölçüm olarak kaydet")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Gerileme sayılan mutlak düşüş (recall/MRR)")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    model = load_embedding_model()
+    index, store = load_chunk_store()
+    check_sections(questions, store)
+    ks = tuple(sorted(set(args.k))) if args.k else DEFAULT_KS
+    print(f"📋 {len(questions)} soru, {len(store)} pasaj, {len(store.meta.files)} bölüm")
+
+    rows, misses = run(model, index, store, questions, args.index, ks, args.batch_size, args.retriever)
+    print_table(rows)
+    if args.misses:
+        for name, missed in misses.items():
+            for question, section, top in missed:
+                print(f"❔ {name}: {question} -> beklenen {section}, bulunan {top[0] if top else '-'}")
+
+    if args.save_baseline:
+        report = {"questions": len(questions), "ks": list(ks), "rows": rows}
+        args.save_baseline.write_text(json.dumps(report, indent=1, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Temel ölçüm -> {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("questions") != len(questions):
+            print(f"⚠️ Soru sayısı temel ölçümden farklı ({baseline.get('questions')} -> {len(questions)})")
+        out, regressed = compare(rows, baseline, args.tolerance)
+        print()
+        print_table(out)
+        print("❌ Kalite gerilemesi" if regressed else "✅ Gerileme yok")
+        raise SystemExit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
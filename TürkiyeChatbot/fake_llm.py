@@ -0,0 +1,269 @@
+"""Çevrimdışı deneme için OpenAI istemcisi taklidi ve OpenAI uyumlu sahte sunucu.
+
+client.chat.completions.create(...) arayüzünü taklit eder; stream=True
+verilirse yanıtı kelime kelime, ayarlanabilir gecikmelerle döndürür.
+
+    client = FakeStreamingClient("Başkent Ankara'dır.", first_token_delay=0.3)
+
+Gerçek HTTP yolunu (openai istemcisi, bağlantı havuzu, SSE) denemek için
+aynı davranışı /v1/chat/completions üzerinden sunan bir sunucu da vardır:
+
+    python fake_llm.py --port 8089 --ttft 0.3 --tokens-per-second 40
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python api_server.py
+
+Sunucu hata ve gecikme enjekte edebilir (--error-rate, --error-status,
+--jitter); ayarlar StubServer.faults üzerinden çalışırken de değiştirilebilir.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+try:
+    from aiohttp import web
+except ImportError:  # aiohttp yalnızca sahte sunucu için gerekir; sahte istemciler onsuz çalışır
+    web = None
+else:
+    # create_stub_app'in web.Application'a koyduğu sözlükler
+    STATS_KEY = web.AppKey("stats", dict)
+    FAULTS_KEY = web.AppKey("faults", dict)
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model, messages, stream=False, **kwargs):
+        owner = self._owner
+        owner.calls.append({"model": model, "messages": messages, "stream": stream, **kwargs})
+        reply = owner.reply(messages) if callable(owner.reply) else owner.reply
+        if not stream:
+            time.sleep(owner.first_token_delay + owner.token_delay * len(_tokens(reply)))
+            message = SimpleNamespace(role="assistant", content=reply)
+            return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")])
+        return self._stream(reply)
+
+    def _stream(self, reply):
+        owner = self._owner
+        time.sleep(owner.first_token_delay)
+        for i, token in enumerate(_tokens(reply)):
+            if i:
+                time.sleep(owner.token_delay)
+            delta = SimpleNamespace(role="assistant" if i == 0 else None, content=token)
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)])
+        end = SimpleNamespace(role=None, content=None)
+        yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=end, finish_reason="stop")])
+
+
+def _tokens(text):
+    # Boşlukları önceki kelimeyle birlikte tutar, birleştirilince metin aynen çıkar
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class FakeStreamingClient:
+    """OpenAI istemcisi yerine geçen, ağ kullanmayan sahte istemci.
+
+    reply sabit bir metin ya da messages alıp metin döndüren bir fonksiyon olabilir.
+    """
+
+    def __init__(self, reply="Bu bir deneme yanıtıdır.", first_token_delay=0.0, token_delay=0.0):
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.calls = []
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+
+class _AsyncCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        owner = self._owner
+        owner.calls.append({"model": model, "messages": messages, "stream": stream, **kwargs})
+        reply = owner.reply(messages) if callable(owner.reply) else owner.reply
+        if not stream:
+            await asyncio.sleep(owner.first_token_delay + owner.token_delay * len(_tokens(reply)))
+            message = SimpleNamespace(role="assistant", content=reply)
+            return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")])
+        return self._stream(reply)
+
+    async def _stream(self, reply):
+        owner = self._owner
+        await asyncio.sleep(owner.first_token_delay)
+        for i, token in enumerate(_tokens(reply)):
+            if i:
+                await asyncio.sleep(owner.token_delay)
+            delta = SimpleNamespace(role="assistant" if i == 0 else None, content=token)
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)])
+
+
+class FakeAsyncClient(FakeStreamingClient):
+    """AsyncOpenAI taklidi; gecikmeler olay döngüsünü bloklamaz."""
+
+    def __init__(self, reply="Bu bir deneme yanıtıdır.", first_token_delay=0.0, token_delay=0.0):
+        super().__init__(reply, first_token_delay, token_delay)
+        self.chat = SimpleNamespace(completions=_AsyncCompletions(self))
+
+    async def close(self):
+        pass
+
+
+# -----------------------------
+# OpenAI uyumlu sahte sunucu
+# -----------------------------
+def create_stub_app(reply="Bu yanıt sahte sunucu tarafından üretildi.", first_token_delay=0.3,
+                    tokens_per_second=40.0, error_rate=0.0, error_status=500, jitter=0.0, seed=None):
+    """POST /v1/chat/completions (akışlı ve akışsız) sunan aiohttp uygulaması.
+
+    İlk token first_token_delay (+ [0, jitter) rastgele) saniye sonra gelir,
+    sonrakiler tokens_per_second hızında akar. İsteklerin error_rate oranı
+    gecikmeden sonra error_status ile reddedilir (429 ve 503'te Retry-After
+    eklenir). app[STATS_KEY] istek sayılarını tutar; app[FAULTS_KEY] sözlüğü
+    (first_token_delay, jitter, error_rate, error_status) çalışırken değiştirilebilir.
+    """
+    from aiohttp import web
+
+    token_delay = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+    stats = {"requests": 0, "streams": 0, "errors": 0, "inflight": 0, "max_inflight": 0}
+    faults = {"first_token_delay": first_token_delay, "jitter": jitter, "error_rate": error_rate,
+              "error_status": error_status}
+    rng = random.Random(seed)
+
+    def chunk(completion_id, model, delta, finish_reason=None):
+        return {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+    async def completions(request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        tokens = _tokens(reply)
+        stats["requests"] += 1
+        stats["inflight"] += 1
+        stats["max_inflight"] = max(stats["max_inflight"], stats["inflight"])
+        try:
+            delay = faults["first_token_delay"] + rng.random() * faults["jitter"]
+            if rng.random() < faults["error_rate"]:
+                await asyncio.sleep(delay)
+                stats["errors"] += 1
+                status = faults["error_status"]
+                headers = {"Retry-After": "0"} if status in (429, 503) else None
+                return web.json_response({"error": {"message": "enjekte edilen hata", "type": "server_error"}},
+                                         status=status, headers=headers)
+            if not body.get("stream"):
+                await asyncio.sleep(delay + token_delay * len(tokens))
+                return web.json_response({
+                    "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": reply},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+                })
+            stats["streams"] += 1
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+            await response.prepare(request)
+            await asyncio.sleep(delay)
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(token_delay)
+                delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+                await response.write(f"data: {json.dumps(chunk(completion_id, model, delta))}\n\n".encode("utf-8"))
+            await response.write(f"data: {json.dumps(chunk(completion_id, model, {}, 'stop'))}\n\n".encode("utf-8"))
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+            return response
+        finally:
+            stats["inflight"] -= 1
+
+    app = web.Application()
+    app[STATS_KEY] = stats
+    app[FAULTS_KEY] = faults
+    app.router.add_post("/v1/chat/completions", completions)
+    return app
+
+
+class StubServer:
+    """Sahte sunucuyu arka plan iş parçacığındaki kendi olay döngüsünde çalıştırır.
+
+        with StubServer(first_token_delay=0.2) as server:
+            client = OpenAI(base_url=server.url, api_key="stub")
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **kwargs):
+        self.host = host
+        self.port = port
+        self.app = create_stub_app(**kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/v1"
+
+    @property
+    def stats(self):
+        return dict(self.app[STATS_KEY])
+
+    @property
+    def faults(self):
+        """Enjekte edilen hata/gecikme ayarları; değişiklikler sonraki isteklerde geçerlidir."""
+        return self.app[FAULTS_KEY]
+
+    async def _start(self):
+        from aiohttp import web
+
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop.run_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self):
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._runner = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI uyumlu sahte LLM sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--ttft", type=float, default=0.3, help="İlk token gecikmesi (saniye)")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--reply", default="Bu yanıt sahte sunucu tarafından üretildi.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="İlk token gecikmesine eklenen en fazla rastgele süre")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Hata döndürülen isteklerin oranı (0-1)")
+    parser.add_argument("--error-status", type=int, default=500, help="Enjekte edilen hatanın HTTP kodu")
+    args = parser.parse_args()
+
+    from aiohttp import web
+
+    print(f"🧪 http://{args.host}:{args.port}/v1 (ttft {args.ttft}s, {args.tokens_per_second} token/s, "
+          f"hata oranı {args.error_rate})")
+    app = create_stub_app(args.reply, args.ttft, args.tokens_per_second, args.error_rate, args.error_status,
+                          args.jitter)
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
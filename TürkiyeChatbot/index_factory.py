@@ -0,0 +1,131 @@
+"""FAISS index fabrikası.
+
+Index türü kısa bir tanımla seçilir:
+
+    flat                         kaba kuvvet (kesin sonuç)
+    ivf:nlist=256,nprobe=16      ters liste; nprobe küme taranır
+    hnsw:m=32,ef_search=64       çizge tabanlı; silme desteklemez
+    pq:m=48,nbits=8              ürün nicemleme; vektör başına m bayt
+    ivfpq:nlist=256,m=48         ters liste + ürün nicemleme
+
+Verilmeyen parametreler korpus boyutuna göre doldurulur (resolve). Çözülmüş
+parametreler metadata'ya yazılır; index açılırken arama parametreleri
+(nprobe, ef_search) oradan yeniden uygulanır.
+"""
+import math
+from dataclasses import asdict, dataclass, fields, replace
+
+import faiss
+import numpy as np
+
+KINDS = ("flat", "ivf", "hnsw", "pq", "ivfpq")
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    kind: str = "flat"
+    nlist: int | None = None  # IVF küme sayısı
+    nprobe: int = 8
+    m: int | None = None  # HNSW komşu sayısı ya da PQ alt niceleyici sayısı
+    nbits: int = 8
+    ef_construction: int = 40
+    ef_search: int = 64
+
+    def __post_init__(self):
+        if self.kind not in KINDS:
+            raise ValueError(f"Bilinmeyen index türü '{self.kind}' (seçenekler: {', '.join(KINDS)})")
+
+    @classmethod
+    def parse(cls, text):
+        """"ivf:nlist=64,nprobe=8" biçimindeki tanımı çözer."""
+        kind, _, params = text.strip().partition(":")
+        names = {f.name for f in fields(cls)} - {"kind"}
+        values = {}
+        for item in filter(None, params.split(",")):
+            key, _, value = item.partition("=")
+            key = key.strip()
+            if key not in names:
+                raise ValueError(f"'{kind}' için bilinmeyen parametre '{key}'")
+            values[key] = int(value)
+        return cls(kind.strip().lower(), **values)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        return asdict(self)
+
+    def __str__(self):
+        defaults = IndexSpec()
+        params = [f"{f.name}={getattr(self, f.name)}" for f in fields(self)
+                  if f.name != "kind" and getattr(self, f.name) != getattr(defaults, f.name)]
+        return self.kind + (":" + ",".join(params) if params else "")
+
+    @property
+    def trainable(self):
+        return self.kind in ("ivf", "pq", "ivfpq")
+
+    @property
+    def removable(self):
+        """remove_ids destekleniyor mu (HNSW'de desteklenmez)."""
+        return self.kind != "hnsw"
+
+    def resolve(self, n, dim):
+        """Eksik parametreleri n vektörlük korpus ve dim boyutu için doldurur.
+
+        Eğitim kümeleme ile yapıldığından küme/kod sayısı eğitim verisini
+        aşmayacak şekilde sınırlanır.
+        """
+        spec = self
+        if self.kind in ("ivf", "ivfpq"):
+            # FAISS her küme için en az ~39 eğitim noktası önerir
+            nlist = self.nlist or int(4 * math.sqrt(n))
+            nlist = max(1, min(nlist, n // 39 or 1))
+            spec = replace(spec, nlist=nlist, nprobe=min(self.nprobe, nlist))
+        if self.kind in ("pq", "ivfpq"):
+            m = self.m or max(d for d in range(1, dim // 8 + 1) if dim % d == 0)
+            if dim % m:
+                raise ValueError(f"PQ alt niceleyici sayısı ({m}) boyutu ({dim}) bölmeli")
+            # Kod kitabı başına da ~39 eğitim noktası
+            spec = replace(spec, m=m, nbits=max(1, min(self.nbits, int(math.log2(max(n // 39, 2))))))
+        if self.kind == "hnsw":
+            spec = replace(spec, m=self.m or 32)
+        return spec
+
+
+def create_index(spec, dim, train_vectors=None):
+    """Çözülmüş spec'e göre boş (gerekirse eğitilmiş) bir index oluşturur."""
+    if spec.kind == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif spec.kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, spec.m)
+        index.hnsw.efConstruction = spec.ef_construction
+    elif spec.kind == "ivf":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, spec.nlist)
+    elif spec.kind == "pq":
+        index = faiss.IndexPQ(dim, spec.m, spec.nbits)
+    else:
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, spec.nlist, spec.m, spec.nbits)
+
+    if spec.trainable:
+        if train_vectors is None or len(train_vectors) == 0:
+            raise ValueError(f"'{spec.kind}' index'i eğitim verisi gerektirir")
+        index.train(np.ascontiguousarray(train_vectors, dtype="float32"))
+    apply_search_params(index, spec)
+    return index
+
+
+def apply_search_params(index, spec):
+    """Kaydedilmiş arama parametrelerini (nprobe, ef_search) index'e uygular."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if spec.kind in ("ivf", "ivfpq"):
+        faiss.extract_index_ivf(inner).nprobe = spec.nprobe
+    elif spec.kind == "hnsw":
+        inner.hnsw.efSearch = spec.ef_search
+    return index
+
+
+def index_memory(index):
+    """Index'in serileştirilmiş boyutu (bayt); bellekteki ayak izine yakın bir ölçü."""
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,282 @@
+"""Büyük kaynak dökümlerini akış halinde bölümlere ayırma.
+
+Düz metin / Markdown dosyaları satır satır, Wikipedia XML dökümleri
+iterparse ile sayfa sayfa okunur (.bz2 / .gz sıkıştırılmış olabilir).
+Başlıklar (#### Başlık, == Başlık ==) bölüm sınırıdır; her bölüm
+doğrudan build_index.build_chunk_index'e verilir, ara dosya yazılmaz.
+Bellekte aynı anda yalnızca bir bölüm (en fazla max_chars karakter)
+ya da bir Wikipedia sayfası bulunur.
+
+Kullanım:
+    python ingest.py docs/turkiye_bilgileri.txt                   # bölümle ve index'le
+    python ingest.py trwiki-latest-pages-articles.xml.bz2 --index ivf
+    python ingest.py docs/turkiye_bilgileri.txt --out docs/bolumler   # bölümleri klasöre yaz
+"""
+import argparse
+import bz2
+import gzip
+import os
+import re
+import tempfile
+import unicodedata
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import EMBED_WORKERS, INDEX_SPEC
+
+MAX_SECTION_CHARS = 100_000
+
+# "#### 🏛️ Genel Bilgiler" ve "== Tarih ==" biçimindeki başlıklar
+_ATX_HEADER = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_WIKI_HEADER = re.compile(r"^(={2,6})\s*(.+?)\s*\1\s*$")
+
+_WIKI_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_WIKI_REF = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+_WIKI_TEMPLATE = re.compile(r"\{\{[^{}]*\}\}")
+_WIKI_TABLE = re.compile(r"\{\|.*?\|\}", re.S)
+_WIKI_MEDIA = re.compile(r"\[\[(?:Dosya|File|Resim|Image|Kategori|Category):[^\[\]]*(?:\[\[[^\]]*\]\][^\[\]]*)*\]\]",
+                         re.I)
+_WIKI_LINK = re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]")
+_WIKI_EXTERNAL = re.compile(r"\[https?://\S+\s*([^\]]*)\]")
+_WIKI_QUOTES = re.compile(r"'{2,}")
+_HTML_TAG = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"[ \t]{2,}")
+
+
+@dataclass(frozen=True)
+class Section:
+    """Başlığı ve gövde metniyle bir bölüm."""
+    title: str
+    text: str
+
+
+def normalize_title(title):
+    """Başlığı dosya adına çevirir: '📜 Tarih ve Kuruluş' -> 'tarih_ve_kuruluş'.
+
+    Karar Unicode kategorisine göre verilir, tek tek emoji listesi tutulmaz:
+    harf ve rakamlar kalır, boşluk ve tire/alt çizgi '_' olur, geri kalan
+    her şey (emoji, bayrak, noktalama) atılır. Birleşik işaretler (Mn) ancak
+    bağlı oldukları karakter kaldıysa kalır; böylece emojiye eklenen U+FE0F
+    gider. Adlar eski not defteri hücresinin ürettikleriyle aynı kalsın diye
+    str.lower kullanılır ('İklim' -> 'i̇klim').
+    """
+    out = []
+    kept = False
+    for ch in unicodedata.normalize("NFC", title.strip()).lower():
+        category = unicodedata.category(ch)
+        if category[0] in "LN":
+            out.append(ch)
+            kept = True
+        elif category == "Mn":
+            if kept:
+                out.append(ch)
+        else:
+            if category[0] == "Z" or category in ("Pd", "Pc"):
+                out.append("_")
+            kept = False
+    return re.sub(r"_+", "_", "".join(out)).strip("_")
+
+
+def open_text(path):
+    """Dosyayı uzantısına göre (.bz2, .gz, düz) metin olarak açar."""
+    path = Path(path)
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rt", encoding="utf-8")
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _header(line):
+    match = _ATX_HEADER.match(line) or _WIKI_HEADER.match(line)
+    return match.group(2) if match else None
+
+
+def _pieces(line, max_chars):
+    """max_chars'tan uzun satırı boşluk sınırından (yoksa tam sınırdan) parçalara böler."""
+    while len(line) > max_chars:
+        cut = line.rfind(" ", 0, max_chars) + 1 or max_chars
+        yield line[:cut]
+        line = line[cut:]
+    if line:
+        yield line
+
+
+def split_sections(lines, title="", max_chars=MAX_SECTION_CHARS):
+    """Satırları başlıklara göre bölümlere ayırır (üreteç).
+
+    İlk başlıktan önceki metin title başlığıyla döner. Bölümler en fazla
+    max_chars karakterdir: sınır aşılacaksa bölüm aynı başlıkla son paragraf
+    sınırından (boş satır), paragraf yoksa satır sınırından bölünür; tek
+    başına sınırı aşan satır boşluklardan parçalanır.
+    """
+    body = []
+    size = 0
+    boundary = 0  # body'de son boş satırdan sonraki konum
+    for line in lines:
+        header = _header(line)
+        if header is not None:
+            text = "".join(body).strip()
+            if text:
+                yield Section(title, text)
+            title, body, size, boundary = header, [], 0, 0
+            continue
+        for piece in _pieces(line, max_chars):
+            while body and size + len(piece) > max_chars:
+                cut = boundary or len(body)
+                text = "".join(body[:cut]).strip()
+                if text:
+                    yield Section(title, text)
+                body = body[cut:]
+                size = sum(map(len, body))
+                boundary = 0
+            body.append(piece)
+            size += len(piece)
+            if not piece.strip():
+                boundary = len(body)
+    text = "".join(body).strip()
+    if text:
+        yield Section(title, text)
+
+
+def text_sections(path, max_chars=MAX_SECTION_CHARS):
+    """Düz metin / Markdown dosyasını satır satır okuyup bölümler."""
+    with open_text(path) as f:
+        yield from split_sections(f, Path(path).name.split(".")[0], max_chars)
+
+
+def strip_wikitext(text):
+    """Vikimetni düz metne indirger: şablon, tablo, kaynak, dosya ve biçim işaretleri atılır."""
+    text = _WIKI_COMMENT.sub("", text)
+    text = _WIKI_REF.sub("", text)
+    # İç içe şablonlar içten dışa doğru silinir
+    while True:
+        text, n = _WIKI_TEMPLATE.subn("", text)
+        if not n:
+            break
+    text = _WIKI_TABLE.sub("", text)
+    text = _WIKI_MEDIA.sub("", text)
+    text = _WIKI_LINK.sub(r"\1", text)
+    text = _WIKI_EXTERNAL.sub(r"\1", text)
+    text = _WIKI_QUOTES.sub("", text)
+    return _SPACES.sub(" ", _HTML_TAG.sub("", text))
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def wiki_sections(path, max_chars=MAX_SECTION_CHARS):
+    """Wikipedia XML dökümündeki makaleleri (ad alanı 0, yönlendirme hariç) bölümler.
+
+    Bölüm başlığı 'Sayfa Bölüm' biçimindedir; giriş bölümü sayfa adını alır.
+    Her sayfa işlendikten sonra ağaçtan silinir, bellek sabit kalır.
+    """
+    with open_text(path) as f:
+        events = ET.iterparse(f, events=("start", "end"))
+        _, root = next(events)
+        page = {}
+        for event, elem in events:
+            if event == "start":
+                continue
+            tag = _local(elem.tag)
+            if tag in ("title", "ns", "text"):
+                page[tag] = elem.text or ""
+            elif tag == "redirect":
+                page["redirect"] = True
+            elif tag == "page":
+                if page.get("ns", "0") == "0" and not page.get("redirect") and page.get("text"):
+                    title = page["title"]
+                    lines = strip_wikitext(page["text"]).splitlines(keepends=True)
+                    for section in split_sections(lines, title, max_chars):
+                        if section.title != title:
+                            section = Section(f"{title} {section.title}", section.text)
+                        yield section
+                page = {}
+                root.clear()
+
+
+def detect_format(path):
+    name = Path(path).name.lower()
+    return "wiki" if ".xml" in name else "text"
+
+
+def iter_sections(path, fmt="auto", max_chars=MAX_SECTION_CHARS):
+    fmt = detect_format(path) if fmt == "auto" else fmt
+    if fmt == "wiki":
+        return wiki_sections(path, max_chars)
+    if fmt == "text":
+        return text_sections(path, max_chars)
+    raise ValueError(f"Bilinmeyen biçim '{fmt}' (seçenekler: auto, text, wiki)")
+
+
+def iter_documents(sections, prefix="turkiye_"):
+    """Bölümleri build_chunk_index'in beklediği (dosya adı, UTF-8 bayt) çiftlerine çevirir.
+
+    Aynı ada düşen bölümler '_2', '_3' ekleriyle ayrılır. Yalnızca başlık kökü
+    başına bir sayaç tutulur; bölünmüş bir bölümün parçaları yeni kayıt eklemez.
+    """
+    counts = {}
+    for section in sections:
+        stem = prefix + (normalize_title(section.title) or "bolum")
+        n = counts.get(stem, 0) + 1
+        name = stem if n == 1 else f"{stem}_{n}"
+        # Ekli ad gerçek bir başlığın köküyle çakışmasın ("Tarih 2" -> turkiye_tarih_2)
+        while n > 1 and name in counts:
+            n += 1
+            name = f"{stem}_{n}"
+        counts[stem] = n
+        if n > 1:
+            counts.setdefault(name, 1)
+        yield name + ".txt", section.text.encode("utf-8")
+
+
+def write_documents(documents, out):
+    """Bölümleri out klasörüne tek tek (atomik) yazar; yazılan dosya sayısını döndürür."""
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for name, data in documents:
+        fd, tmp = tempfile.mkstemp(prefix=f".{name}.", dir=out)
+        try:
+            with open(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, out / name)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kaynak dökümünü bölümleyip index'ler")
+    parser.add_argument("source", type=Path, help="Metin, Markdown ya da Wikipedia XML (.bz2/.gz olabilir)")
+    parser.add_argument("--format", default="auto", choices=("auto", "text", "wiki"))
+    parser.add_argument("--prefix", default="turkiye_", help="Bölüm dosya adlarının öneki")
+    parser.add_argument("--max-chars", type=int, default=MAX_SECTION_CHARS, help="Bölüm başına en fazla karakter")
+    parser.add_argument("--out", type=Path, help="Index yerine bölümleri bu klasöre yaz")
+    parser.add_argument("--index", default=INDEX_SPEC, help="Index türü, ör. flat, ivf:nlist=64, hnsw:m=32")
+    parser.add_argument("--full", action="store_true", help="Manifestoyu yok say, her şeyi yeniden göm")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS, help="Embedding süreç sayısı")
+    args = parser.parse_args()
+
+    documents = iter_documents(iter_sections(args.source, args.format, args.max_chars), args.prefix)
+    if args.out:
+        print(f"✅ {write_documents(documents, args.out)} bölüm -> {args.out}")
+        return
+
+    from build_index import build_chunk_index, format_stats
+    from startup import load_embedding_model
+
+    model = load_embedding_model() if args.workers <= 1 else None
+    index, meta, stats = build_chunk_index(model, args.source.resolve(), documents=documents,
+                                           full=args.full, index_spec=args.index, workers=args.workers)
+    print(format_stats(stats))
+    print(f"✅ {len(meta['files'])} bölüm, {index.ntotal} pasaj index'lendi")
+
+
+if __name__ == "__main__":
+    main()
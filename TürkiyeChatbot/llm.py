@@ -0,0 +1,75 @@
+"""OpenAI sohbet tamamlama çağrıları (akışlı ve akışsız).
+
+Akışlı yolda ilk token'a kadar geçen süre (TTFT) ölçülür ve son
+çağrıların dağılımı ttft_summary() ile okunabilir.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+from config import LLM_MODEL
+from metrics import METRICS
+
+_recent_ttft = deque(maxlen=1000)
+_recent_lock = threading.Lock()
+
+
+@dataclass
+class StreamTiming:
+    """Tek bir akışlı çağrının zamanlaması (saniye, perf_counter)."""
+    started_at: float = 0.0
+    first_token_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def ttft(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started_at
+
+    @property
+    def total(self):
+        return None if self.finished_at is None else self.finished_at - self.started_at
+
+
+def complete(client, messages, model=LLM_MODEL, **kwargs):
+    """Akışsız çağrı: yanıtın tamamını döndürür."""
+    with METRICS.span("llm_total"):
+        response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+    return response.choices[0].message.content
+
+
+def stream_chat(client, messages, model=LLM_MODEL, timing=None, **kwargs):
+    """Akışlı çağrı: yanıt parçalarını geldikçe üreten generator."""
+    timing = timing if timing is not None else StreamTiming()
+    timing.started_at = time.perf_counter()
+    stream = client.chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if timing.first_token_at is None:
+            timing.first_token_at = time.perf_counter()
+            with _recent_lock:
+                _recent_ttft.append(timing.ttft)
+            METRICS.observe("llm_ttft", timing.ttft)
+        yield delta
+    timing.finished_at = time.perf_counter()
+    METRICS.observe("llm_total", timing.total)
+
+
+def ttft_summary():
+    """Son akışlı çağrıların TTFT dağılımı (milisaniye)."""
+    with _recent_lock:
+        values = np.array(_recent_ttft) * 1000
+    if not len(values):
+        return {"count": 0}
+    return {
+        "count": int(len(values)),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "max_ms": float(values.max()),
+    }
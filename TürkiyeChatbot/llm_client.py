@@ -0,0 +1,459 @@
+"""Dayanıklı LLM istemcisi: bağlantı havuzu, süre sınırı, yeniden deneme, devre kesici, birleştirme.
+
+ResilientClient (ve asyncio karşılığı AsyncResilientClient) OpenAI
+istemcisini sarar ve aynı client.chat.completions.create(...) arayüzünü
+sunar; llm.complete / stream_chat ve api_server değişmeden kullanır.
+
+    süre sınırı     her çağrının toplam süresi (yeniden denemeler dahil)
+                    LLM_TIMEOUT'u aşamaz; akışta parçalar arası bekleme de
+                    kalan süreyle sınırlıdır
+    yeniden deneme  bağlantı hataları, zaman aşımı, 408/409/429 ve 5xx
+                    LLM_RETRIES kez, tam rastgele (full jitter) üstel
+                    beklemeyle denenir; Retry-After başlığına uyulur
+    devre kesici    art arda LLM_BREAKER_THRESHOLD başarısız çağrıdan sonra
+                    LLM_BREAKER_RESET saniye boyunca çağrılar beklemeden
+                    CircuitOpenError ile reddedilir; ardından tek bir deneme
+                    çağrısı geçer
+    birleştirme     aynı anda süren aynı istem (model, mesajlar, parametreler)
+                    tek üst akış çağrısı yapar; akışlı çağrılarda parçalar
+                    tüm bekleyenlere dağıtılır
+
+Politikalar sahte sunucuya karşı (hata ve gecikme enjeksiyonu, bkz. fake_llm.py)
+tests/test_llm_client.py'de denenir.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from types import SimpleNamespace
+
+from config import (
+    LLM_BACKOFF, LLM_BREAKER_RESET, LLM_BREAKER_THRESHOLD, LLM_COALESCE, LLM_MAX_BACKOFF, LLM_MAX_CONNECTIONS,
+    LLM_RETRIES, LLM_TIMEOUT,
+)
+from metrics import METRICS
+
+RETRYABLE_STATUS = frozenset({408, 409, 429})
+
+
+class CircuitOpenError(RuntimeError):
+    """Üst akış art arda başarısız oldu; devre açıkken çağrı yapılmaz."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Çağrı süre sınırı içinde tamamlanamadı."""
+
+
+def _status(exc):
+    return getattr(exc, "status_code", None)
+
+
+def is_retryable(exc):
+    """Geçici hata mı: bağlantı/zaman aşımı, 408/409/429 ya da 5xx."""
+    status = _status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    try:
+        import openai
+
+        if isinstance(exc, openai.APIConnectionError):  # APITimeoutError da bunun alt sınıfı
+            return True
+    except ImportError:
+        pass
+    return isinstance(exc, (ConnectionError, TimeoutError)) and not isinstance(exc, DeadlineExceeded)
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """Deneme sayısı ve tam rastgele üstel bekleme: U(0, min(max_backoff, backoff * 2^deneme))."""
+
+    def __init__(self, retries=LLM_RETRIES, backoff=LLM_BACKOFF, max_backoff=LLM_MAX_BACKOFF, rng=None):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt, exc=None):
+        retry_after = _retry_after(exc) if exc is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return self.rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """kapalı -> (threshold art arda hata) -> açık -> (reset_timeout) -> yarı açık -> tek deneme."""
+
+    def __init__(self, threshold=LLM_BREAKER_THRESHOLD, reset_timeout=LLM_BREAKER_RESET, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self):
+        """Çağrı yapılabilir mi; yarı açıkken yalnızca bir deneme çağrısına izin verilir."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                if self.opened_at is None or self._probing:
+                    self.trips += 1
+                self.opened_at = self.clock()
+                self._probing = False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError("LLM servisi geçici olarak devre dışı (art arda hata)")
+
+
+def request_key(model, messages, stream, kwargs):
+    """Birleştirme anahtarı: aynı model, mesajlar ve parametreler aynı anahtarı verir."""
+    payload = json.dumps({"model": model, "messages": messages, "stream": stream, **kwargs},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Broadcast:
+    """Tek üst akış akışını birden çok tüketiciye dağıtır.
+
+    Parçaları ayrı bir iş parçacığı okur; böylece bir tüketici yavaşlasa ya da
+    bıraksa da diğerleri beklemez.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def pump(self, stream, deadline, clock):
+        try:
+            for chunk in stream:
+                with self._cond:
+                    self.chunks.append(chunk)
+                    self._cond.notify_all()
+                if clock() > deadline:
+                    raise DeadlineExceeded("LLM akışı süre sınırını aştı")
+        except Exception as e:
+            self.error = e
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        finally:
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+
+    def consume(self, deadline, clock):
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.chunks) and not self.done:
+                    remaining = deadline - clock()
+                    if remaining <= 0:
+                        raise DeadlineExceeded("LLM akışı süre sınırını aştı")
+                    self._cond.wait(remaining)
+                if i < len(self.chunks):
+                    chunk = self.chunks[i]
+                    i += 1
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            yield chunk
+
+
+class _Stats:
+    def __init__(self):
+        self.calls = 0
+        self.upstream = 0
+        self.retries = 0
+        self.failures = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, n in counts.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def snapshot(self, breaker):
+        with self._lock:
+            return {"calls": self.calls, "upstream": self.upstream, "retries": self.retries,
+                    "failures": self.failures, "coalesced": self.coalesced, "rejected": self.rejected,
+                    "breaker": breaker.state, "trips": breaker.trips}
+
+
+class ResilientClient:
+    """OpenAI istemcisini süre sınırı, yeniden deneme, devre kesici ve birleştirmeyle sarar."""
+
+    def __init__(self, client, timeout=LLM_TIMEOUT, policy=None, breaker=None, coalesce=LLM_COALESCE,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.client = client
+        self.timeout = timeout
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.coalesce = coalesce
+        self.clock = clock
+        self.sleep = sleep
+        self._stats = _Stats()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def stats(self):
+        return self._stats.snapshot(self.breaker)
+
+    def close(self):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+    def create(self, model, messages, stream=False, timeout=None, **kwargs):
+        timeout = timeout or self.timeout
+        deadline = self.clock() + timeout
+        self._stats.add(calls=1)
+        if not self.coalesce:
+            return self._call(model, messages, stream, timeout, deadline, kwargs)
+
+        key = request_key(model, messages, stream, kwargs)
+        with self._lock:
+            shared = self._inflight.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._inflight[key] = Future()
+        if not leader:
+            self._stats.add(coalesced=1)
+            try:
+                result = shared.result(timeout=max(deadline - self.clock(), 0))
+            except FutureTimeout:
+                raise DeadlineExceeded("LLM çağrısı süre sınırını aştı") from None
+            return result.consume(deadline, self.clock) if stream else result
+
+        try:
+            result = self._call(model, messages, stream, timeout, deadline, kwargs)
+        except BaseException as e:
+            shared.set_exception(e)
+            self._release(key, shared)
+            raise
+        if not stream:
+            shared.set_result(result)
+            self._release(key, shared)
+            return result
+        broadcast = _Broadcast()
+        shared.set_result(broadcast)
+        # Akış bitene kadar aynı istem bu yayına bağlanır; anahtarı pompa bırakır
+        threading.Thread(target=self._pump, args=(key, shared, broadcast, result, deadline),
+                         name="llm-stream", daemon=True).start()
+        return broadcast.consume(deadline, self.clock)
+
+    def _pump(self, key, shared, broadcast, stream, deadline):
+        try:
+            broadcast.pump(stream, deadline, self.clock)
+        finally:
+            self._release(key, shared)
+
+    def _release(self, key, shared):
+        with self._lock:
+            if self._inflight.get(key) is shared:
+                del self._inflight[key]
+
+    def _call(self, model, messages, stream, timeout, deadline, kwargs):
+        """Tek mantıksal çağrı: devre kesici, süre sınırı ve yeniden denemeler."""
+        try:
+            self.breaker.check()
+        except CircuitOpenError:
+            self._stats.add(rejected=1)
+            raise
+        attempt = 0
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                self.breaker.failure()
+                self._stats.add(failures=1)
+                raise DeadlineExceeded(f"LLM çağrısı {timeout:g} s içinde tamamlanamadı")
+            try:
+                self._stats.add(upstream=1)
+                result = self.client.chat.completions.create(model=model, messages=messages, stream=stream,
+                                                             timeout=remaining, **kwargs)
+            except Exception as e:
+                delay = self.policy.delay(attempt, e)
+                if not is_retryable(e) or attempt >= self.policy.retries or self.clock() + delay >= deadline:
+                    self._failed(e)
+                    raise
+                attempt += 1
+                self._stats.add(retries=1)
+                METRICS.observe("llm_retry_wait", delay)
+                self.sleep(delay)
+                continue
+            self.breaker.success()
+            return result
+
+    def _failed(self, exc):
+        self._stats.add(failures=1)
+        # İstemci hataları (400, 401...) üst akışın sağlıklı olduğunu gösterir; devreyi açmaz
+        if is_retryable(exc):
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+
+
+class AsyncResilientClient:
+    """AsyncOpenAI için aynı politika; bekleme ve birleştirme olay döngüsünü bloklamaz.
+
+    Akışlı çağrılar birleştirilmez (API sunucusu akışsız çağrı yapar).
+    """
+
+    def __init__(self, client, timeout=LLM_TIMEOUT, policy=None, breaker=None, coalesce=LLM_COALESCE,
+                 clock=time.monotonic):
+        self.client = client
+        self.timeout = timeout
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.coalesce = coalesce
+        self.clock = clock
+        self._stats = _Stats()
+        self._inflight = {}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def stats(self):
+        return self._stats.snapshot(self.breaker)
+
+    async def close(self):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            await close()
+
+    async def create(self, model, messages, stream=False, timeout=None, **kwargs):
+        timeout = timeout or self.timeout
+        deadline = self.clock() + timeout
+        self._stats.add(calls=1)
+        if stream or not self.coalesce:
+            return await self._call(model, messages, stream, timeout, deadline, kwargs)
+
+        key = request_key(model, messages, stream, kwargs)
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats.add(coalesced=1)
+        else:
+            task = self._inflight[key] = asyncio.ensure_future(
+                self._call(model, messages, stream, timeout, deadline, kwargs))
+            task.add_done_callback(lambda t: self._settled(key, t))
+        # shield: bekleyenlerden biri iptal edilse de ortak çağrı sürer
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(deadline - self.clock(), 0))
+        except DeadlineExceeded:
+            raise
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("LLM çağrısı süre sınırını aştı") from None
+
+    def _settled(self, key, task):
+        self._inflight.pop(key, None)
+        # Tüm bekleyenler zaman aşımına uğradıysa hatayı kimse almaz; asyncio'nun
+        # "Task exception was never retrieved" uyarısını önlemek için burada okunur
+        if not task.cancelled():
+            task.exception()
+
+    async def _call(self, model, messages, stream, timeout, deadline, kwargs):
+        try:
+            self.breaker.check()
+        except CircuitOpenError:
+            self._stats.add(rejected=1)
+            raise
+        attempt = 0
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                self.breaker.failure()
+                self._stats.add(failures=1)
+                raise DeadlineExceeded(f"LLM çağrısı {timeout:g} s içinde tamamlanamadı")
+            try:
+                self._stats.add(upstream=1)
+                result = await asyncio.wait_for(
+                    self.client.chat.completions.create(model=model, messages=messages, stream=stream,
+                                                        timeout=remaining, **kwargs), remaining)
+            except Exception as e:
+                # Deneme zaman aşımı senkron istemcideki APITimeoutError gibi geçici bir hatadır:
+                # yeniden denenir ve devre kesicide hata sayılır
+                delay = self.policy.delay(attempt, e)
+                if not is_retryable(e) or attempt >= self.policy.retries or self.clock() + delay >= deadline:
+                    self._failed(e)
+                    if isinstance(e, asyncio.TimeoutError) and not isinstance(e, DeadlineExceeded):
+                        raise DeadlineExceeded(f"LLM çağrısı {timeout:g} s içinde tamamlanamadı") from e
+                    raise
+                attempt += 1
+                self._stats.add(retries=1)
+                METRICS.observe("llm_retry_wait", delay)
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.success()
+            return result
+
+    _failed = ResilientClient._failed
+
+
+def create_client(api_key=None, base_url=None, max_connections=LLM_MAX_CONNECTIONS, **kwargs):
+    """Paylaşılan bağlantı havuzlu OpenAI istemcisi, ResilientClient ile sarılmış.
+
+    openai'nin kendi yeniden denemeleri kapatılır; politika tek yerde uygulanır.
+    """
+    import httpx
+    from openai import DefaultHttpxClient, OpenAI
+
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                    http_client=DefaultHttpxClient(limits=limits))
+    return ResilientClient(client, **kwargs)
+
+
+def create_async_client(api_key=None, base_url=None, max_connections=LLM_MAX_CONNECTIONS, **kwargs):
+    """create_client'ın AsyncOpenAI karşılığı."""
+    import httpx
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                         http_client=DefaultAsyncHttpxClient(limits=limits))
+    return AsyncResilientClient(client, **kwargs)
+
@@ -0,0 +1,213 @@
+"""Aşama süreleri (span), histogramlar ve Prometheus metin biçiminde dışa aktarım.
+
+Her aşama (embed, search, lexical, passages, context, llm_ttft, llm_total)
+METRICS.span("ad") ile ölçülür ve aşama başına sabit kovalı bir histograma
+yazılır. Gözlem başına maliyet bir perf_counter çifti ile kilitli bir sayaç
+artışıdır (birkaç mikro saniye); ölçüm üretimde açık kalabilir. Kapatmak
+için TURKIYE_METRICS=0.
+
+METRICS.trace() bloğu içinde aynı iş parçacığında açılan span'ler ayrıca
+sırasıyla toplanır; Streamlit hata ayıklama paneli son isteğin dökümünü
+buradan gösterir. Önbellekler watch_cache ile kaydedilir, isabet oranları
+dışa aktarımda okunur.
+
+    curl localhost:8000/metrics                  # api_server.py
+    TURKIYE_METRICS_PORT=9100 streamlit run app.py
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS as ENABLED
+
+# Saniye cinsinden kova üst sınırları: 0.1 ms'den 60 s'ye
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX = "turkiye"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Sabit kovalı, iş parçacığı güvenli süre histogramı."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q):
+        """Kovalardan doğrusal aradeğerlemeyle yaklaşık yüzdelik (saniye)."""
+        counts, _, count = self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class _Span:
+    """Oluşturulduğu andan bloğun sonuna kadar geçen süreyi yazar."""
+
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.started = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """Aşama histogramları, önbellek sayaçları ve iş parçacığı başına iz."""
+
+    def __init__(self, enabled=ENABLED, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._stages = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def histogram(self, name):
+        histogram = self._stages.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(name, Histogram(self.buckets))
+        return histogram
+
+    def span(self, name):
+        """with METRICS.span("embed"): ... — bloğun süresini name aşamasına yazar."""
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        self.histogram(name).observe(seconds)
+        spans = getattr(self._local, "spans", None)
+        if spans is not None:
+            spans.append((name, seconds))
+
+    @contextmanager
+    def trace(self):
+        """Blok içinde bu iş parçacığında ölçülen (aşama, saniye) çiftlerini toplar."""
+        spans = []
+        previous = getattr(self._local, "spans", None)
+        self._local.spans = spans
+        try:
+            yield spans
+        finally:
+            self._local.spans = previous
+
+    def watch_cache(self, name, cache):
+        """hits / misses sayaçları olan bir önbelleği dışa aktarıma ekler."""
+        with self._lock:
+            self._caches[name] = cache
+
+    def cache_stats(self):
+        with self._lock:
+            caches = list(self._caches.items())
+        return {name: cache.stats() for name, cache in caches}
+
+    def summary(self):
+        """Aşama başına sayı, ortalama ve yaklaşık p50/p95 (milisaniye)."""
+        with self._lock:
+            stages = list(self._stages.items())
+        out = {}
+        for name, histogram in stages:
+            _, total, count = histogram.snapshot()
+            if count:
+                out[name] = {"count": count, "mean_ms": round(total / count * 1000, 2),
+                             "p50_ms": round(histogram.quantile(0.5) * 1000, 2),
+                             "p95_ms": round(histogram.quantile(0.95) * 1000, 2)}
+        return out
+
+    def render(self):
+        """Prometheus metin biçimi (0.0.4)."""
+        name = f"{PREFIX}_stage_duration_seconds"
+        lines = [f"# HELP {name} İstek aşamalarının süresi", f"# TYPE {name} histogram"]
+        with self._lock:
+            stages = sorted(self._stages.items())
+        for stage, histogram in stages:
+            counts, total, count = histogram.snapshot()
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+        caches = self.cache_stats()
+        for metric, key, kind, help_text in (("cache_hits_total", "hits", "counter", "Önbellek isabetleri"),
+                                             ("cache_misses_total", "misses", "counter", "Önbellek ıskaları"),
+                                             ("cache_entries", "size", "gauge", "Önbellekteki kayıt sayısı")):
+            lines.append(f"# HELP {PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{metric} {kind}")
+            for cache, stats in sorted(caches.items()):
+                lines.append(f'{PREFIX}_{metric}{{cache="{cache}"}} {stats.get(key, 0)}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+METRICS = Metrics()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, host="127.0.0.1"):
+    """/metrics uç noktasını arka plan iş parçacığında sunar (Streamlit gibi HTTP'si olmayan süreçler için)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,13 @@
+"""Süreç havuzu yardımcıları (prepare_corpus.py, embed_pool.py).
+
+Tek işçiyle havuz açılmaz; iş aynı süreçte yapılır ve sonuç, havuzun
+submit'iyle aynı arayüzde hazır bir Future olarak döner.
+"""
+from concurrent.futures import Future
+
+
+def run_inline(fn, *args):
+    """Tek süreçte havuz yerine: sonucu hazır bir Future."""
+    future = Future()
+    future.set_result(fn(*args))
+    return future
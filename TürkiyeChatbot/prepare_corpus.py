@@ -0,0 +1,186 @@
+"""Korpus hazırlama: küçük harf, noktalama ve stopword temizliği.
+
+Dosyalar satır bloklarına bölünerek akış halinde okunur; bloklar bir süreç
+havuzunda temizlenir ve sırası korunarak yazılır. Bellek kullanımı dosya
+boyutundan bağımsızdır (en fazla workers * 2 blok bellekte bekler), büyük
+tek bir dosya da tüm çekirdeklere dağılır.
+
+Kullanım:
+    python prepare_corpus.py [--source docs/bolumler] [--out docs/temizlenmis] [--workers 8]
+    python prepare_corpus.py --bench 50     # 50 MB'lık örnek korpusta MB/s ölçümü
+"""
+import argparse
+import os
+import shutil
+import string
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+from config import CLEAN_DIR, SECTIONS_DIR
+from pools import run_inline
+from turkish import turkish_lower, turkish_stopwords
+
+# ASCII noktalama baytları UTF-8'de çok baytlı karakterlerin içinde geçmez; bytes.translate
+# ile silmek str.translate'ten kat kat hızlıdır. Tipografik işaretler ayrıca silinir.
+_ASCII_PUNCTUATION = string.punctuation.encode("ascii")
+_TYPOGRAPHIC = "‘’“”«»–—…•"
+BLOCK_SIZE = 1 << 20
+
+_stopwords = frozenset()
+
+
+def clean_text(text, stopwords=None):
+    """Türkçe küçük harf, noktalama silme ve stopword atma; kelimeler tek boşlukla birleşir."""
+    stopwords = _stopwords if stopwords is None else stopwords
+    text = turkish_lower(text).encode("utf-8").translate(None, _ASCII_PUNCTUATION).decode("utf-8")
+    for mark in _TYPOGRAPHIC:
+        if mark in text:
+            text = text.replace(mark, "")
+    return " ".join([w for w in text.split() if w not in stopwords])
+
+
+def _init_worker(stopwords):
+    global _stopwords
+    _stopwords = stopwords
+
+
+def _clean_block(block):
+    return clean_text(block)
+
+
+def _read_blocks(path, block_size=BLOCK_SIZE):
+    """Dosyayı satır sınırında bölünmüş yaklaşık block_size baytlık metinler olarak okur."""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            lines = f.readlines(block_size)
+            if not lines:
+                return
+            yield "".join(lines)
+
+
+def _tasks(files, block_size):
+    for path in files:
+        for block in _read_blocks(path, block_size):
+            yield path, block
+        yield path, None  # dosya sonu
+
+
+def prepare_folder(source=SECTIONS_DIR, out=CLEAN_DIR, workers=None, stopwords=None, pattern="*.txt",
+                   block_size=BLOCK_SIZE):
+    """source altındaki dosyaları temizleyip aynı adla out altına yazar.
+
+    {"files": n, "bytes": okunan bayt, "seconds": süre} döndürür.
+    """
+    source, out = Path(source), Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    stopwords = turkish_stopwords() if stopwords is None else frozenset(stopwords)
+    files = sorted(source.glob(pattern))
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    writers = {}  # kaynak yol -> [açık geçici dosya, geçici yol, boş mu]
+
+    def emit(path, cleaned):
+        if path not in writers:
+            fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=out)
+            writers[path] = [open(fd, "w", encoding="utf-8"), tmp, True]
+        writer = writers[path]
+        if cleaned is None:
+            writer[0].close()
+            os.replace(writer[1], out / path.name)
+        elif cleaned:
+            # Bloklar arasında da kelimeler tek boşlukla ayrılır
+            writer[0].write(cleaned if writer[2] else " " + cleaned)
+            writer[2] = False
+
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stopwords,)) if workers > 1 else None
+    if pool is None:
+        _init_worker(stopwords)
+    submit = pool.submit if pool is not None else run_inline
+    try:
+        with pool or nullcontext():
+            pending = deque()
+            for path, block in _tasks(files, block_size):
+                pending.append((path, None if block is None else submit(_clean_block, block)))
+                # Sırayı koruyarak yaz; kuyruk sınırlı tutulur
+                while len(pending) > workers * 2 or (pending and (pending[0][1] is None or pending[0][1].done())):
+                    done_path, future = pending.popleft()
+                    emit(done_path, None if future is None else future.result())
+            while pending:
+                done_path, future = pending.popleft()
+                emit(done_path, None if future is None else future.result())
+    finally:
+        for f, tmp, _ in writers.values():
+            if not f.closed:
+                f.close()
+                os.remove(tmp)
+
+    return {"files": len(files), "bytes": sum(p.stat().st_size for p in files),
+            "seconds": time.perf_counter() - started}
+
+
+def _legacy_clean(text, stopwords):
+    """Eski not defteri hücresi: str.lower ve liste üzerinde stopword araması."""
+    text = text.lower().translate(str.maketrans("", "", string.punctuation))
+    return " ".join([k for k in text.split() if k not in stopwords])
+
+
+def bench(megabytes, workers, source=SECTIONS_DIR):
+    """source dosyalarını çoğaltarak ~megabytes MB korpus oluşturur ve iki yolu ölçer."""
+    stopwords = turkish_stopwords()
+    texts = [p.read_text(encoding="utf-8") for p in sorted(Path(source).glob("*.txt"))]
+    sample = "\n".join(texts)
+    copies = max(1, int(megabytes * 2**20 / len(sample.encode("utf-8"))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "src"
+        src.mkdir()
+        # Dosya sayısı workers'ın birkaç katı: hem dosya hem blok düzeyinde paralellik görülür
+        n_files = max(1, workers * 4)
+        for i in range(n_files):
+            with open(src / f"part_{i:03d}.txt", "w", encoding="utf-8") as f:
+                for _ in range(copies // n_files or 1):
+                    f.write(sample + "\n")
+        size = sum(p.stat().st_size for p in src.iterdir())
+
+        started = time.perf_counter()
+        stopword_list = list(stopwords)
+        for path in sorted(src.iterdir()):
+            _legacy_clean(path.read_text(encoding="utf-8"), stopword_list)
+        legacy = time.perf_counter() - started
+
+        results = {"eski (liste, tek süreç)": legacy}
+        for n in sorted({1, workers}):
+            stats = prepare_folder(src, Path(tmp) / f"out_{n}", workers=n, stopwords=stopwords)
+            results[f"yeni ({n} süreç)"] = stats["seconds"]
+        shutil.rmtree(src)
+
+    print(f"{size / 2**20:.1f} MB, {len(stopwords)} stopword")
+    for name, seconds in results.items():
+        print(f"{name:<24} {seconds:7.2f} s  {size / 2**20 / seconds:8.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Korpus temizleme (küçük harf, noktalama, stopword)")
+    parser.add_argument("--source", type=Path, default=SECTIONS_DIR)
+    parser.add_argument("--out", type=Path, default=CLEAN_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pattern", default="*.txt")
+    parser.add_argument("--bench", type=float, metavar="MB", help="Örnek korpusla verim ölçümü yap")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench, args.workers, args.source)
+        return
+    stats = prepare_folder(args.source, args.out, args.workers, pattern=args.pattern)
+    mb = stats["bytes"] / 2**20
+    print(f"✅ {stats['files']} dosya, {mb:.1f} MB, {stats['seconds']:.2f} s "
+          f"({mb / stats['seconds']:.1f} MB/s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Sorgu embedding'leri için sınırlı, iş parçacığı güvenli LRU önbellek.
+
+Aynı soru (büyük/küçük harf ve boşluk farkları dahil) tekrar sorulduğunda
+transformer ileri geçişi atlanır. İsteğe bağlı olarak .npz dosyasına
+pickle kullanmadan kaydedilir ve açılışta geri yüklenir. Dosya embedding
+modelini, arka ucunu ve boyutunu da tutar; bunlar değiştiyse (ör.
+TURKIYE_EMBEDDING_BACKEND) kayıtlı vektörler kullanılmaz.
+"""
+import os
+import tempfile
+import threading
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from config import EMBEDDING_BACKEND, EMBEDDING_MODEL
+from turkish import normalize_query
+
+
+class EmbeddingCache:
+    """Normalleştirilmiş sorgu -> embedding eşlemesi (LRU).
+
+    model ve backend kaydedilen dosyaya yazılır; dim ilk kodlamada (ya da
+    yüklenen dosyadan) öğrenilir.
+    """
+
+    def __init__(self, maxsize=1024, path=None, model=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND, dim=None):
+        if maxsize <= 0:
+            raise ValueError("maxsize pozitif olmalı")
+        self.maxsize = maxsize
+        self.path = Path(path) if path else None
+        self.model = model
+        self.backend = backend
+        self.dim = dim
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self.load()
+
+    def __len__(self):
+        return len(self._data)
+
+    @staticmethod
+    def _key(query, normalize_embeddings):
+        return f"{int(bool(normalize_embeddings))}:{normalize_query(query)}"
+
+    def get(self, query, normalize_embeddings=False):
+        key = self._key(query, normalize_embeddings)
+        with self._lock:
+            vector = self._data.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, query, vector, normalize_embeddings=False):
+        key = self._key(query, normalize_embeddings)
+        vector = np.asarray(vector, dtype="float32").reshape(-1)
+        vector.flags.writeable = False
+        with self._lock:
+            self._data[key] = vector
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def encode(self, model, queries, normalize_embeddings=False):
+        """model.encode yerine geçer; yalnızca önbellekte olmayan sorgular kodlanır."""
+        vectors = [self.get(q, normalize_embeddings) for q in queries]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            encoded = np.asarray(model.encode([queries[i] for i in missing], normalize_embeddings=normalize_embeddings),
+                                 dtype="float32")
+            if encoded.shape[1] != self.dim:
+                # Boyut değişti (başka model): eski kayıtlar bu modelin vektörleriyle karıştırılamaz
+                self._reset(encoded.shape[1])
+                if len(missing) < len(queries):
+                    return self.encode(model, queries, normalize_embeddings)
+            for i, vector in zip(missing, encoded):
+                self.put(queries[i], vector, normalize_embeddings)
+                vectors[i] = vector
+        return np.vstack(vectors)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def _reset(self, dim):
+        with self._lock:
+            self._data.clear()
+            self.dim = dim
+
+    def save(self, path=None):
+        """Önbelleği LRU sırasıyla .npz olarak atomik biçimde kaydeder."""
+        path = Path(path or self.path)
+        with self._lock:
+            keys = list(self._data.keys())
+            vectors = list(self._data.values())
+        if not keys:
+            return
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".npz", dir=path.parent)
+        os.close(fd)
+        try:
+            np.savez(tmp, keys=np.array(keys, dtype=str), vectors=np.vstack(vectors), model=np.array(self.model),
+                     backend=np.array(self.backend))
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def load(self, path=None):
+        """Kayıtlı önbelleği yükler; model, arka uç ya da boyut uyuşmazsa dosyayı yok sayar."""
+        path = Path(path or self.path)
+        with np.load(path, allow_pickle=False) as data:
+            keys, vectors = data["keys"], data["vectors"]
+            saved = tuple(str(data[name]) if name in data else None for name in ("model", "backend"))
+        if saved != (self.model, self.backend) or (self.dim is not None and vectors.shape[1] != self.dim):
+            warnings.warn(f"{path.name} başka bir embedding modeli/arka ucu için kaydedilmiş {saved}; yok sayılıyor")
+            return
+        with self._lock:
+            self.dim = vectors.shape[1]
+            for key, vector in zip(keys[-self.maxsize:], vectors[-self.maxsize:]):
+                vector.flags.writeable = False
+                self._data[str(key)] = vector
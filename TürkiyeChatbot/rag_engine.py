@@ -0,0 +1,236 @@
+"""Streamlit'ten bağımsız RAG motoru.
+
+Model, index, pasaj deposu ve LLM istemcisi dışarıdan verilir; böylece
+motor Streamlit çalışma ortamı olmadan (worker, toplu iş, benchmark)
+kullanılabilir:
+
+    from fake_llm import FakeStreamingClient
+    engine = RagEngine.from_disk(FakeStreamingClient())
+    print(engine.answer("Türkiye'nin başkenti neresidir?").text)
+
+collection verilen çağrılar varsayılan index yerine o koleksiyonun
+parçalarında arar (bkz. collection.py).
+"""
+from dataclasses import dataclass, field
+
+from answer_cache import SemanticAnswerCache
+from config import LLM_MODEL, TOP_K
+from context_builder import Context, ContextBuilder
+from llm import StreamTiming, complete, stream_chat
+from metrics import METRICS
+from resources import IndexHandle, shared_collections, shared_index, shared_model
+from retrieval import encode_queries, search
+
+DEFAULT_PROMPT = """
+Aşağıda Türkiye hakkında bazı bilgiler ve bir kullanıcı sorusu var.
+Soruyu bu bilgilerden yararlanarak yanıtla.
+Cevabın doğal, kısa ve bilgilendirici olsun.
+
+Bilgiler:
+{context}
+
+Soru: {query}
+"""
+
+
+@dataclass
+class Answer:
+    """Motorun ürettiği yanıt.
+
+    Akışlı yolda text başlangıçta boştur; stream tüketildikçe dolar.
+    sources yalnızca bağlama giren pasajların başlıklarıdır (bkz. context).
+    """
+    text: str
+    sources: list
+    passages: list = field(default_factory=list)
+    cached: bool = False
+    stream: object = None
+    timing: StreamTiming | None = None
+    context: Context | None = None
+
+
+class RagEngine:
+    """Arama (retrieve), bağlam oluşturma (build_context) ve yanıt üretimi (answer)."""
+
+    def __init__(self, model, index, store, client, llm_model=LLM_MODEL, top_k=TOP_K,
+                 query_cache=None, answer_cache=None, prompt_template=DEFAULT_PROMPT, batcher=None,
+                 context_builder=None, conversations=None, collections=None):
+        self.model = model
+        # Aramalar (index, store) çiftini okuma kilidi altında görür; bkz. resources.IndexHandle
+        self.handle = IndexHandle(index, store)
+        self.client = client
+        self.llm_model = llm_model
+        self.top_k = top_k
+        self.query_cache = query_cache
+        self.answer_cache = answer_cache
+        self.prompt_template = prompt_template
+        # Pasajları token bütçesine göre paketler; bkz. context_builder.py
+        self.context_builder = context_builder or ContextBuilder(model=llm_model)
+        # Eşzamanlı kullanımda sorguları toplu kodlayan MicroBatcher (isteğe bağlı)
+        self.batcher = batcher
+        # Çok turlu sohbet geçmişi (conversation.ConversationStore, isteğe bağlı)
+        self.conversations = conversations
+        # Çok korpuslu koleksiyonlar (collection.CollectionRegistry, isteğe bağlı)
+        self.collections = collections
+        # Koleksiyon başına ayrı yanıt önbelleği: önbellek tek bir index sürümü tutar
+        self._collection_answers = {}
+        if query_cache is not None:
+            METRICS.watch_cache("query", query_cache)
+        if answer_cache is not None:
+            METRICS.watch_cache("answer", answer_cache)
+        if conversations is not None:
+            METRICS.watch_cache("conversations", conversations)
+        if collections is not None:
+            METRICS.watch_cache("shards", collections.cache)
+
+    @classmethod
+    def from_disk(cls, client, model=None, **kwargs):
+        """Süreçte paylaşılan model ve index'le bir motor kurar (bkz. resources.REGISTRY).
+
+        Model ve index sürecin ilk çağrısında yüklenir; sonraki motorlar (ör.
+        her Streamlit oturumu) aynı nesneleri kullanır. Index ve korpus
+        değiştiğinde paylaşılan IndexHandle yerinde yenilenir.
+        """
+        kwargs.setdefault("collections", shared_collections())
+        engine = cls(model if model is not None else shared_model(), None, None, client, **kwargs)
+        engine.handle = shared_index()
+        return engine
+
+    @property
+    def index(self):
+        return self.handle.index
+
+    @property
+    def store(self):
+        return self.handle.store
+
+    def refresh(self):
+        """Diskteki index/korpus değiştiyse ikisini birlikte yeniden yükler; yüklendiyse True."""
+        return self.handle.refresh()
+
+    def embed(self, query):
+        """Sorgu vektörü (index ile aynı normalizasyonla)."""
+        if self.batcher is not None:
+            return self.batcher.embed(query)
+        return encode_queries(self.model, [query], self.store.normalized, self.query_cache)[0]
+
+    def collection(self, name):
+        """Ada göre koleksiyon; yoksa KeyError."""
+        if self.collections is None:
+            raise KeyError(f"Koleksiyon bulunamadı: {name}")
+        return self.collections.get(name)
+
+    def answer_cache_for(self, collection=None):
+        """(yanıt önbelleği ya da None, index sürümü)."""
+        if collection is None or self.answer_cache is None:
+            return self.answer_cache, self.store.version
+        target = self.collection(collection)
+        cache = self._collection_answers.get(collection)
+        if cache is None:
+            base = self.answer_cache
+            cache = self._collection_answers.setdefault(
+                collection, SemanticAnswerCache(base.threshold, base.ttl, base.maxsize))
+        return cache, target.version
+
+    def retrieve(self, query, top_k=None, collection=None):
+        if collection is not None:
+            target = self.collection(collection)
+            with METRICS.span("retrieve"):
+                return target.search(self.model, query, top_k or self.top_k, cache=self.query_cache)
+        self.refresh()
+        with METRICS.span("retrieve"):
+            if self.batcher is not None:
+                return self.batcher.search(query, top_k or self.top_k)
+            with self.handle.read() as (index, store):
+                return search(self.model, index, store, query, top_k or self.top_k, cache=self.query_cache)
+
+    def build_context(self, passages):
+        """Pasajlardan token bütçesine sığan bağlamı (Context) oluşturur."""
+        with METRICS.span("context"):
+            return self.context_builder.build(passages)
+
+    def build_messages(self, query, context, conversation=None, collection=None):
+        """İstem; conversation verilirse önce özet ve penceredeki turlar gelir.
+
+        Koleksiyonun collection.json'da kendi istem şablonu varsa o kullanılır.
+        """
+        template = (self.collection(collection).prompt if collection is not None else None) or self.prompt_template
+        prompt = template.format(context=context.text, query=query)
+        history = conversation.messages() if conversation is not None else []
+        return history + [{"role": "user", "content": prompt}]
+
+    def start_turn(self, query, session=None):
+        """(oturum sohbeti ya da None, aramada kullanılacak bağımsız sorgu)."""
+        if session is None or self.conversations is None:
+            return None, query
+        conversation = self.conversations.get(session)
+        return conversation, self.conversations.standalone(conversation, query, self.client, self.llm_model)
+
+    def finish_turn(self, conversation, question, query, answer):
+        if conversation is not None:
+            self.conversations.record(conversation, question, query, answer, self.client, self.llm_model)
+
+    def answer(self, query, session=None, collection=None):
+        """Akışsız yanıt; yanıt önbelleği varsa önce ona bakılır.
+
+        session verilirse (bkz. conversation.py) takip sorusu bağımsız bir
+        sorguya çevrilerek aranır, istem sohbet geçmişiyle kurulur ve tur kaydedilir.
+        """
+        question = query
+        conversation, query = self.start_turn(question, session)
+        answer_cache, version = self.answer_cache_for(collection)
+        if answer_cache is None:
+            passages = self.retrieve(query, collection=collection)
+            context = self.build_context(passages)
+            messages = self.build_messages(query, context, conversation, collection)
+            text = complete(self.client, messages, model=self.llm_model)
+            self.finish_turn(conversation, question, query, text)
+            return Answer(text, context.sources, passages, context=context)
+
+        passages = []
+        contexts = []
+
+        def compute():
+            passages.extend(self.retrieve(query, collection=collection))
+            contexts.append(self.build_context(passages))
+            messages = self.build_messages(query, contexts[0], conversation, collection)
+            text = complete(self.client, messages, model=self.llm_model)
+            return text, contexts[0].sources
+
+        cached, hit = answer_cache.get_or_compute(self.embed(query), query, compute, version)
+        self.finish_turn(conversation, question, query, cached.answer)
+        return Answer(cached.answer, cached.sources, passages, cached=hit, context=contexts[0] if contexts else None)
+
+    def answer_stream(self, query, session=None, collection=None):
+        """Akışlı yanıt; önbellekte varsa stream=None ve text dolu döner.
+
+        Sohbet turu (session verildiyse) akış tamamen tüketildiğinde kaydedilir.
+        """
+        question = query
+        conversation, query = self.start_turn(question, session)
+        answer_cache, version = self.answer_cache_for(collection)
+        query_embedding = None
+        if answer_cache is not None:
+            query_embedding = self.embed(query)
+            cached = answer_cache.get(query_embedding, version)
+            if cached is not None:
+                self.finish_turn(conversation, question, query, cached.answer)
+                return Answer(cached.answer, cached.sources, cached=True)
+
+        passages = self.retrieve(query, collection=collection)
+        context = self.build_context(passages)
+        result = Answer("", context.sources, passages, timing=StreamTiming(), context=context)
+
+        def tokens():
+            parts = []
+            messages = self.build_messages(query, context, conversation, collection)
+            for delta in stream_chat(self.client, messages, model=self.llm_model, timing=result.timing):
+                parts.append(delta)
+                yield delta
+            result.text = "".join(parts)
+            if answer_cache is not None:
+                answer_cache.put(query_embedding, query, result.text, result.sources, version)
+            self.finish_turn(conversation, question, query, result.text)
+
+        result.stream = tokens()
+        return result
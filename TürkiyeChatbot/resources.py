@@ -0,0 +1,314 @@
+"""Süreç genelinde paylaşılan kaynaklar: model ve index her süreçte bir kez yüklenir.
+
+Streamlit oturumları, API istekleri ve betikler kaynaklara REGISTRY üzerinden
+erişir; oturum başına kopya tutulmaz, bu yüzden süreç belleği eşzamanlı
+kullanıcı sayısıyla büyümez. Index + pasaj deposu bir IndexHandle içinde
+durur: aramalar okuma kilidi altında tutarlı bir (index, store) çifti görür,
+index yeniden derlendiğinde yeni sürüm kilit dışında yüklenip yazma kilidi
+altında yerine konur ve eskisi kapatılır; yeniden başlatma gerekmez.
+
+    python resources.py memory               # kaynak başına yaklaşık bellek ve RSS
+    python resources.py check --sessions 50  # N oturumun RSS'i büyütmediğini denetle
+"""
+import argparse
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class RWLock:
+    """Çok okuyucu / tek yazıcı kilidi; bekleyen yazıcı yeni okuyuculardan önce girer."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class IndexHandle:
+    """(index, ChunkStore) çifti; yeniden derlemede yerinde değiştirilir.
+
+    loader verilirse refresh() diskteki index değiştiğinde loader() ile yeni
+    çifti yükler. Aynı anda yalnızca bir iş parçacığı yükleme yapar; diğerleri
+    beklemeden eski sürümle devam eder.
+    """
+
+    def __init__(self, index, store, loader=None):
+        self._index = index
+        self._store = store
+        self.loader = loader
+        self.swaps = 0
+        self._lock = RWLock()
+        self._loading = threading.Lock()
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def store(self):
+        return self._store
+
+    @contextmanager
+    def read(self):
+        """Okuma kilidi altında (index, store); blok bitene kadar çift değişmez."""
+        with self._lock.read():
+            yield self._index, self._store
+
+    def swap(self, index, store):
+        """Yeni çifti yerine koyar; eski çift tüm okuyucular çıktıktan sonra kapatılır."""
+        with self._lock.write():
+            old = self._store
+            self._index, self._store = index, store
+            self.swaps += 1
+        if old is not None and old is not store:
+            old.close()
+
+    def refresh(self):
+        """Diskteki index/korpus değiştiyse yeniden yükler; yüklendiyse True.
+
+        Kontrol ChunkStore.is_stale() ile seyreltildiği için istek başına
+        sistem çağrısı yapılmaz.
+        """
+        if self.loader is None or self._store is None or not self._store.is_stale():
+            return False
+        if not self._loading.acquire(blocking=False):
+            return False
+        try:
+            self.swap(*self.loader())
+        finally:
+            self._loading.release()
+        return True
+
+    def close(self):
+        with self._lock.write():
+            store, self._index, self._store = self._store, None, None
+        if store is not None:
+            store.close()
+
+    def memory(self):
+        """Index ve pasaj deposunun yaklaşık bayt cinsinden boyutu."""
+        return index_memory(self._index) + self._store.memory()
+
+
+def index_memory(index):
+    """FAISS index'inin yaklaşık boyutu: vektör kodları + kimlikler (+ HNSW bağlantıları)."""
+    import faiss
+
+    if index is None:
+        return 0
+    total = 0
+    if hasattr(index, "id_map"):
+        total += index.ntotal * 8
+        index = faiss.downcast_index(index.index)
+    try:
+        code_size = index.sa_code_size()
+    except RuntimeError:
+        code_size = 0
+    total += index.ntotal * (code_size or index.d * 4)
+    hnsw = getattr(index, "hnsw", None)
+    if hnsw is not None:
+        total += hnsw.neighbors.size() * 4
+    return total
+
+
+def memory_of(value):
+    """Kaynağın yaklaşık bellek boyutu (bayt); bilinmiyorsa 0.
+
+    memory() metodu olanlar kendi boyutunu bildirir (IndexHandle, BM25Index,
+    OnnxEncoder); torch modüllerinde ağırlıklar sayılır.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "memory"):
+        return value.memory()
+    if hasattr(value, "parameters"):
+        return sum(p.numel() * p.element_size() for p in value.parameters())
+    return 0
+
+
+def rss_bytes():
+    """Sürecin şu anki yerleşik bellek kullanımı."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    # /proc olmayan sistemlerde tepe değer (macOS'ta bayt, Linux'ta KB)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ResourceRegistry:
+    """Ada göre bir kez yüklenen, süreç ömrü boyunca paylaşılan kaynaklar.
+
+    get(name, loader) ilk çağrıda loader()'ı çalıştırır, sonrakilerde aynı
+    nesneyi döndürür; aynı kaynağı eşzamanlı isteyenler tek yüklemeyi bekler.
+    close(name) kaynağı (close() metodu varsa) kapatıp kayıttan siler.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._loading = {}
+
+    def get(self, name, loader):
+        with self._lock:
+            if name in self._values:
+                return self._values[name]
+            lock = self._loading.setdefault(name, threading.Lock())
+        with lock:
+            with self._lock:
+                if name in self._values:
+                    return self._values[name]
+            value = loader()
+            with self._lock:
+                self._values[name] = value
+                self._loading.pop(name, None)
+            return value
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._values
+
+    def names(self):
+        with self._lock:
+            return list(self._values)
+
+    def close(self, name=None):
+        """Verilen kaynağı, name=None ise hepsini kapatır."""
+        with self._lock:
+            names = list(self._values) if name is None else [name]
+            values = [self._values.pop(n) for n in names if n in self._values]
+        for value in values:
+            if hasattr(value, "close"):
+                value.close()
+
+    def memory(self):
+        """Kaynak başına yaklaşık bayt ve sürecin RSS'i."""
+        with self._lock:
+            items = list(self._values.items())
+        usage = {name: memory_of(value) for name, value in items}
+        usage["rss"] = rss_bytes()
+        return usage
+
+
+REGISTRY = ResourceRegistry()
+
+
+def shared_model():
+    """Süreçteki tek embedding modeli (bkz. startup.load_embedding_model)."""
+    from startup import load_embedding_model
+
+    return REGISTRY.get("model", load_embedding_model)
+
+
+def shared_index():
+    """Süreçteki tek IndexHandle; index değiştiğinde yerinde yenilenir."""
+    from retrieval import load_chunk_store
+    from startup import load_index
+
+    return REGISTRY.get("index", lambda: IndexHandle(*load_index(), loader=load_chunk_store))
+
+
+def shared_collections():
+    """Süreçteki tek CollectionRegistry; koleksiyon parçaları ilk aramada yüklenir."""
+    from collection import CollectionRegistry
+
+    return REGISTRY.get("collections", CollectionRegistry)
+
+
+def format_memory(usage):
+    return " · ".join(f"{name}: {value / 2**20:.1f} MB" for name, value in usage.items())
+
+
+def check_sessions(sessions, queries=3, tolerance_mb=16.0):
+    """N oturumu (iş parçacığı) aynı kaynaklarla çalıştırıp RSS artışını ölçer.
+
+    Her oturum kendi RagEngine'ini from_disk ile kurar ve sorgu yapar; model
+    ve index paylaşıldığı için RSS yalnızca ilk oturumda artmalıdır.
+    (ilk oturum sonrası RSS, son RSS, başarılı mı) döndürür.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from rag_engine import RagEngine
+
+    questions = ["Türkiye'nin başkenti neresidir?", "Göbeklitepe nerededir?", "Türkiye'nin iklimi nasıldır?"]
+
+    def session(i):
+        engine = RagEngine.from_disk(client=None)
+        for q in range(queries):
+            engine.retrieve(questions[(i + q) % len(questions)])
+        return engine
+
+    first = session(0)
+    baseline = rss_bytes()
+    with ThreadPoolExecutor(min(sessions, 8)) as pool:
+        engines = list(pool.map(session, range(1, sessions)))
+    final = rss_bytes()
+    shared = all(e.model is first.model and e.handle is first.handle for e in engines)
+    return baseline, final, shared and (final - baseline) / 2**20 <= tolerance_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paylaşılan kaynaklar: bellek muhasebesi ve oturum denetimi")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("memory", help="Model ve index'i yükleyip kaynak başına belleği yazdır")
+    check = sub.add_parser("check", help="N oturumun RSS'i büyütmediğini denetle")
+    check.add_argument("--sessions", type=int, default=50)
+    check.add_argument("--tolerance-mb", type=float, default=16.0)
+    args = parser.parse_args()
+
+    if args.command == "memory":
+        before = rss_bytes()
+        shared_model()
+        shared_index()
+        print(f"🧠 {format_memory(REGISTRY.memory())} (açılıştan önce RSS: {before / 2**20:.1f} MB)")
+        return
+
+    baseline, final, ok = check_sessions(args.sessions, tolerance_mb=args.tolerance_mb)
+    print(f"{'✅' if ok else '❌'} {args.sessions} oturum: RSS {baseline / 2**20:.1f} MB -> {final / 2**20:.1f} MB "
+          f"(+{(final - baseline) / 2**20:.1f} MB, eşik {args.tolerance_mb} MB)")
+    print(f"🧠 {format_memory(REGISTRY.memory())}")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    # rag_engine bu modülü "resources" adıyla import eder; betik de aynı REGISTRY'yi kullansın
+    import resources
+
+    resources.main()
@@ -0,0 +1,242 @@
+"""Pasaj düzeyinde arama.
+
+Pasaj index'i (turkiye_chunks.faiss + turkiye_chunks.meta) varsa o kullanılır.
+Yoksa dosya düzeyindeki eski index (turkiye_index.faiss + turkiye_files.meta)
+her dosyanın tek bir pasaj olduğu bir index gibi yüklenir. Her iki durumda
+metadata açılışta index ile karşılaştırılır; uyuşmazlıkta hemen hata verilir.
+"""
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from bm25 import BM25Index
+from chunk_meta import ChunkMeta
+from config import (
+    BASE_DIR, BM25_PATH, CHUNK_INDEX_PATH, CHUNK_META_PATH, CORPUS_PATH, DOCSTORE_RELOAD_INTERVAL,
+    EMBEDDING_BACKEND, EMBEDDING_MODEL, FILES_PATH, HYBRID, HYBRID_DEPTH, INDEX_MMAP, INDEX_PATH, RRF_K,
+)
+from doc_store import DocStore
+from index_factory import IndexSpec, apply_search_params
+from metrics import METRICS
+
+# Salt okunur açılış: index verisi kopyalanmaz, sayfalar ilk erişimde diskten gelir.
+# IFC (kopyasız kod dizileri) ters listeli index'lerde desteklenmez; onlar yalnızca
+# IO_FLAG_MMAP ile açılır.
+_MMAP_FLAGS = faiss.IO_FLAG_MMAP
+_MMAP_IFC_FLAGS = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+# BM25 aramaları yoğun arama ile aynı anda bu havuzda çalışır
+_lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bm25")
+
+
+@dataclass(frozen=True)
+class Passage:
+    """Arama sonucunda dönen pasaj."""
+    file: str
+    start: int
+    end: int
+    title: str
+    text: str
+    score: float  # eksi L2 uzaklığı; hibrit aramada RRF skoru
+
+
+class ChunkStore:
+    """Index'teki her vektörün kaynağını (dosya, bayt aralığı, başlık) tutar.
+
+    Kayıtlar ChunkMeta'dan istendikçe okunur; metinler bir DocStore'dan
+    dilimlenir, sorgu sırasında diske gidilmez. watch_paths verilirse
+    is_stale() en fazla reload_interval saniyede bir bu dosyaların değişip
+    değişmediğine bakar.
+    """
+
+    def __init__(self, meta, docs, version=None, watch_paths=(), reload_interval=5.0):
+        self.meta = meta
+        self.docs = docs
+        self.normalized = meta.normalized
+        # Index içeriği değiştiğinde değişen parmak izi (yanıt önbelleği için)
+        self.version = version or meta.fingerprint()
+        # Hibrit arama için BM25Index (load_chunk_store HYBRID açıksa doldurur)
+        self.bm25 = None
+        self.watch_paths = [Path(p) for p in watch_paths]
+        self.reload_interval = reload_interval
+        self._stamps = self._read_stamps()
+        self._next_check = time.monotonic() + reload_interval
+
+    def __len__(self):
+        return len(self.meta)
+
+    def entry(self, vector_id):
+        # ID-eşlemeli index'lerde arama vektör kimliği döndürür, sıra numarası değil
+        return self.meta.entry(vector_id)
+
+    def view(self, vector_id):
+        """Pasajın baytlarını kopyasız memoryview olarak döndürür."""
+        entry = self.entry(vector_id)
+        return self.docs.view(entry["file"], entry["start"], entry["end"])
+
+    def text(self, vector_id):
+        return str(self.view(vector_id), "utf-8")
+
+    def memory(self):
+        """Metadata, korpus ve BM25 dizilerinin bayt cinsinden boyutu (mmap'ler dahil)."""
+        return self.meta.memory() + self.docs.memory() + (self.bm25.memory() if self.bm25 is not None else 0)
+
+    def close(self):
+        self.meta.close()
+        self.docs.close()
+
+    def _read_stamps(self):
+        stamps = []
+        for path in self.watch_paths:
+            try:
+                st = path.stat()
+                stamps.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except FileNotFoundError:
+                stamps.append(None)
+        return stamps
+
+    def is_stale(self):
+        """İzlenen dosyalar değiştiyse True; kontroller reload_interval ile seyreltilir."""
+        if not self.watch_paths or time.monotonic() < self._next_check:
+            return False
+        self._next_check = time.monotonic() + self.reload_interval
+        return self._read_stamps() != self._stamps
+
+
+def _open_docs(meta, source_dir, corpus_path=CORPUS_PATH):
+    """Paketlenmiş korpus index ile uyumluysa mmap ile açar, değilse klasörden okur."""
+    files = meta.files
+    if Path(corpus_path).exists():
+        docs = DocStore.open(corpus_path)
+        if all(name in docs and docs.digest(name) == digest for name, digest in files.items()):
+            return docs
+        docs.close()
+    return DocStore.from_files(source_dir / name for name in files)
+
+
+def load_chunk_store(reload_interval=DOCSTORE_RELOAD_INTERVAL, mmap=INDEX_MMAP, index_path=None, meta_path=None,
+                     corpus_path=CORPUS_PATH, bm25_path=BM25_PATH):
+    """(index, ChunkStore) döndürür; pasaj index'i yoksa eski index'e düşer.
+
+    Metadata index ile (model, boyut, vektör sayısı, kimlikler) uyuşmazsa
+    ValueError fırlatılır. mmap=True iken index salt okunur eşlenir; yeni
+    sürüm atomik olarak yazıldığından açık eşleme eski dosyayı görmeye devam eder.
+    index_path/meta_path verilirse (ör. bir koleksiyon parçası, bkz.
+    collection.py) varsayılan yollar yerine bunlar açılır.
+    """
+    if index_path is None:
+        if CHUNK_INDEX_PATH.exists() and CHUNK_META_PATH.exists():
+            index_path, meta_path = CHUNK_INDEX_PATH, CHUNK_META_PATH
+        else:
+            index_path, meta_path = INDEX_PATH, FILES_PATH
+    meta = ChunkMeta.open(meta_path)
+    index = faiss.read_index(str(index_path), _read_flags(meta) if mmap else 0)
+    meta.validate(index, EMBEDDING_MODEL)
+    backend = meta.settings.get("backend", "torch")
+    if backend != EMBEDDING_BACKEND:
+        # Arka uçlar aynı modelin yaklaşık kopyalarıdır; arama çalışır ama sıralama biraz kayabilir
+        warnings.warn(f"Index '{backend}' arka ucuyla derlenmiş, sorgular '{EMBEDDING_BACKEND}' ile gömülüyor")
+    if "index_params" in meta.settings:
+        apply_search_params(index, IndexSpec.from_dict(meta.settings["index_params"]))
+    docs = _open_docs(meta, BASE_DIR / meta.settings["source_dir"], corpus_path)
+    # Metadata en son yazıldığı için onu izlemek index + korpus çiftini izlemeye yeter
+    store = ChunkStore(meta, docs, watch_paths=[meta_path], reload_interval=reload_interval)
+    if HYBRID:
+        store.bm25 = load_bm25(store, bm25_path)
+    return index, store
+
+
+def _read_flags(meta):
+    """mmap açılış bayrakları; IVF türlerinde IFC eklenmez."""
+    kind = meta.settings.get("index_params", {}).get("kind", "flat")
+    return _MMAP_FLAGS if kind in ("ivf", "ivfpq") else _MMAP_IFC_FLAGS
+
+
+def load_bm25(store, path=BM25_PATH):
+    """Kaydedilmiş BM25 index'i bu store'a aitse onu, değilse pasajlardan yenisini döndürür."""
+    if Path(path).exists():
+        bm25 = BM25Index.load(path)
+        if bm25.version == store.version and np.array_equal(bm25.ids, store.meta.ids):
+            return bm25
+    return BM25Index.from_store(store)
+
+
+def encode_queries(model, queries, normalize, cache=None):
+    """Sorguları tek çağrıda kodlar; cache verilirse yalnızca önbellekte olmayanlar kodlanır."""
+    with METRICS.span("embed"):
+        if cache is not None:
+            embeddings = cache.encode(model, queries, normalize_embeddings=normalize)
+        else:
+            embeddings = model.encode(queries, normalize_embeddings=normalize)
+        return np.asarray(embeddings, dtype="float32")
+
+
+def to_passage(store, vector_id, score):
+    entry = store.entry(vector_id)
+    return Passage(entry["file"], entry["start"], entry["end"], entry["title"], store.text(vector_id), score)
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Kimlik listelerini RRF ile birleştirir: skor = Σ 1 / (k + sıra)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, vector_id in enumerate(ranking, 1):
+            scores[vector_id] = scores.get(vector_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def to_passages(store, distances, indices, top_k=None, lexical=None):
+    """index.search sonucunun tek satırını Passage listesine çevirir.
+
+    lexical (BM25 kimlikleri, skorları) verilirse iki sıralama RRF ile
+    birleştirilir ve skor RRF skoru olur; yoksa skor eksi uzaklıktır.
+    """
+    top_k = len(indices) if top_k is None else top_k
+    if lexical is None:
+        return [to_passage(store, int(i), -float(d)) for d, i in zip(distances[:top_k], indices[:top_k]) if i >= 0]
+    dense = [int(i) for i in indices if i >= 0]
+    fused = reciprocal_rank_fusion([dense, lexical[0].tolist()])[:top_k]
+    return [to_passage(store, vector_id, score) for vector_id, score in fused]
+
+
+def start_lexical(store, queries, depth):
+    """BM25 aramasını arka planda başlatır; yoğun arama bu sırada sürer."""
+    bm25 = getattr(store, "bm25", None)
+    if bm25 is None:
+        return None
+    return _lexical_pool.submit(bm25.search_batch, queries, depth)
+
+
+def search_depth(store, top_k):
+    """Birleştirmeye girecek aday sayısı (yalnızca hibrit aramada top_k'dan büyük)."""
+    return max(top_k, HYBRID_DEPTH) if getattr(store, "bm25", None) is not None else top_k
+
+
+def search_batch(model, index, store, queries, top_k, cache=None):
+    """Birden çok sorguyu tek encode ve tek index.search çağrısıyla arar.
+
+    Store'da BM25 index'i varsa sözcüksel arama paralel çalışır ve sonuçlar
+    RRF ile birleştirilir.
+    """
+    depth = search_depth(store, top_k)
+    lexical = start_lexical(store, queries, depth)
+    query_embeddings = encode_queries(model, queries, store.normalized, cache)
+    with METRICS.span("search"):
+        distances, indices = index.search(query_embeddings, depth)
+    with METRICS.span("lexical"):
+        lexical = lexical.result() if lexical is not None else [None] * len(queries)
+    with METRICS.span("passages"):
+        return [to_passages(store, d, i, top_k, lex) for d, i, lex in zip(distances, indices, lexical)]
+
+
+def search(model, index, store, query, top_k, cache=None):
+    """Sorguya en yakın top_k pasajı skor sırasıyla döndürür.
+
+    cache verilirse (EmbeddingCache) tekrar eden sorgular yeniden kodlanmaz.
+    """
+    return search_batch(model, index, store, [query], top_k, cache)[0]
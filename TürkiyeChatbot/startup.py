@@ -0,0 +1,151 @@
+"""Hızlı açılış: yerel model klasörü, ertelenmiş import'lar, ısınma ve hazır olma sinyali.
+
+Ağır modüller (sentence_transformers, faiss, openai) ilk kullanıldıkları
+yerde import edilir; arayüz ya da HTTP sunucusu bunlar yüklenmeden ayağa
+kalkar. Model önce EMBEDDING_MODEL_DIR altındaki sabitlenmiş kopyadan,
+yoksa hub adından yüklenir. Her adımın süresi TIMINGS'e yazılır.
+
+Modeli yerel klasöre sabitlemek için (bir kez, ağ erişimi gerekir):
+    python startup.py pin
+Açılış sürelerini görmek için:
+    python startup.py timings
+"""
+import argparse
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_MODEL_DIR, WARMUP_QUERY
+
+_PROCESS_STARTED = time.perf_counter()
+
+
+class StartupTimings:
+    """Açılış adımlarının süreleri (saniye), eklendikleri sırayla."""
+
+    def __init__(self):
+        self._steps = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._steps[name] = self._steps.get(name, 0.0) + time.perf_counter() - started
+
+    def as_dict(self):
+        with self._lock:
+            return {name: round(seconds * 1000, 1) for name, seconds in self._steps.items()}
+
+    def format(self):
+        return " · ".join(f"{name}: {ms:.0f} ms" for name, ms in self.as_dict().items())
+
+
+TIMINGS = StartupTimings()
+
+
+def model_source(name=EMBEDDING_MODEL, local_dir=EMBEDDING_MODEL_DIR):
+    """Sabitlenmiş yerel kopya varsa onun yolu, yoksa hub adı."""
+    local_dir = Path(local_dir)
+    return str(local_dir) if (local_dir / "modules.json").exists() else name
+
+
+def load_embedding_model(name=EMBEDDING_MODEL, local_dir=EMBEDDING_MODEL_DIR, backend=EMBEDDING_BACKEND):
+    """Seçilen arka uçla (bkz. embeddings.py) embedding modelini yükler."""
+    from embeddings import load_backend
+
+    with TIMINGS.measure(f"model ({backend})"):
+        return load_backend(model_source(name, local_dir), backend)
+
+
+def load_index(**kwargs):
+    """(index, ChunkStore); faiss import'u ve okuma süreleri ayrı ölçülür."""
+    with TIMINGS.measure("import faiss"):
+        import faiss  # noqa: F401
+    from retrieval import load_chunk_store
+
+    with TIMINGS.measure("index"):
+        return load_chunk_store(**kwargs)
+
+
+def warm_up(engine, query=WARMUP_QUERY):
+    """İlk gerçek sorgunun ödeyeceği ilk çağrı maliyetini (tokenizer, bellek ayırma,
+    index sayfaları, BM25 iş parçacıkları) açılışta öder."""
+    with TIMINGS.measure("warm-up"):
+        engine.embed(query)
+        engine.retrieve(query)
+
+
+class Readiness:
+    """Arka planda yüklenen bir kaynağın durumu: starting -> ready | failed."""
+
+    def __init__(self):
+        self.state = "starting"
+        self.error = None
+        self.value = None
+        self._event = threading.Event()
+
+    def start(self, load):
+        """load() sonucunu arka plan iş parçacığında hazırlar."""
+        threading.Thread(target=self._run, args=(load,), name="startup", daemon=True).start()
+        return self
+
+    def _run(self, load):
+        try:
+            with TIMINGS.measure("ready"):
+                self.value = load()
+            self.state = "ready"
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = "failed"
+        finally:
+            self._event.set()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def wait(self, timeout=None):
+        """Hazır olunca değeri döndürür; yükleme başarısızsa RuntimeError."""
+        if not self._event.wait(timeout):
+            raise TimeoutError("Yükleme zaman aşımına uğradı")
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.value
+
+    def status(self):
+        return {"state": self.state, "error": self.error, "timings_ms": TIMINGS.as_dict()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Açılış araçları")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pin = sub.add_parser("pin", help="Embedding modelini yerel klasöre indirip sabitle")
+    pin.add_argument("--dir", type=Path, default=EMBEDDING_MODEL_DIR)
+    sub.add_parser("timings", help="Motoru açıp adım sürelerini yazdır")
+    args = parser.parse_args()
+
+    if args.command == "pin":
+        from sentence_transformers import SentenceTransformer
+
+        SentenceTransformer(EMBEDDING_MODEL).save(str(args.dir))
+        print(f"✅ {EMBEDDING_MODEL} -> {args.dir}")
+        return
+
+    with TIMINGS.measure("import rag_engine"):
+        from rag_engine import RagEngine
+    engine = RagEngine.from_disk(client=None)
+    warm_up(engine)
+    started = time.perf_counter()
+    engine.retrieve("Türkiye'nin en kalabalık şehri hangisidir?")
+    print(f"⏱️ {TIMINGS.format()}")
+    print(f"⏱️ süreç başlangıcından hazır olmaya: {(started - _PROCESS_STARTED) * 1000:.0f} ms, "
+          f"ısınma sonrası ilk sorgu: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,120 +3,194 @@ import streamlit as st
 # 🟢 BU SATIRI EN ÜSTE KOY
 st.set_page_config(page_title="Türkiye Chatbot", page_icon="🇹🇷", layout="centered")
 
-from openai import OpenAI
-import faiss
-import numpy as np
-from sentence_transformers import SentenceTransformer
+# Ağır modüller (sentence_transformers, faiss, openai) motor yüklenirken import edilir;
+# sayfa bunları beklemeden çizilir
+from config import (
+    CHUNK_INDEX_PATH, CHUNK_META_PATH, FILES_PATH, INDEX_PATH,
+    QUERY_CACHE_PATH, QUERY_CACHE_SIZE,
+    ANSWER_CACHE_SIZE, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, FAKE_LLM, STREAMING,
+    DEBUG_PANEL, METRICS_PORT,
+)
+from metrics import METRICS, serve
+from resources import REGISTRY, format_memory
+from startup import TIMINGS, Readiness, warm_up
 
 # -----------------------------
 # OpenAI istemcisi
 # -----------------------------
 from dotenv import load_dotenv
 import os
+import uuid
 
 load_dotenv()  # .env dosyasını oku
 api_key = os.getenv("OPENAI_API_KEY")
 
-if not api_key:
+if not FAKE_LLM and not api_key:
     st.error("❌ OpenAI API Key bulunamadı! Lütfen .env dosyasını kontrol edin.")
     st.stop()
 
-client = OpenAI(api_key=api_key)
+
+def create_client():
+    if FAKE_LLM:
+        # Çevrimdışı deneme: ağ kullanmayan sahte istemci
+        from fake_llm import FakeStreamingClient
+        return FakeStreamingClient("Bu yanıt sahte istemci tarafından üretildi.", 0.3, 0.03)
+    # Yeniden deneme, süre sınırı, devre kesici ve aynı istemlerin birleştirilmesi
+    from llm_client import create_client as create_resilient_client
+    with TIMINGS.measure("import openai"):
+        return create_resilient_client(api_key=api_key)
 
 # -----------------------------
-# Model ve index yükleme
+# Model, index ve RAG motoru
 # -----------------------------
+def build_engine():
+    from answer_cache import SemanticAnswerCache
+    from conversation import ConversationStore
+    from query_cache import EmbeddingCache
+    from rag_engine import RagEngine
+
+    # Tüm oturumlar aynı önbellekleri paylaşır; yol verilmişse kapanışta diske yazılır
+    import atexit
+    query_cache = EmbeddingCache(QUERY_CACHE_SIZE, QUERY_CACHE_PATH or None)
+    if query_cache.path:
+        atexit.register(query_cache.save)
+    answer_cache = SemanticAnswerCache(ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, ANSWER_CACHE_SIZE)
+
+    # Sohbet geçmişleri de motorda, oturum kimliğine göre tutulur (boşta kalanlar silinir)
+    engine = RagEngine.from_disk(create_client(), query_cache=query_cache, answer_cache=answer_cache,
+                                 conversations=ConversationStore(use_llm=not FAKE_LLM))
+    warm_up(engine)
+    return engine
+
+
 @st.cache_resource
-def load_components():
-    try:
-        import os
-        # Dosyaların varlığını kontrol et
-        # Streamlit Cloud kök dizinde çalıştığı için TürkiyeChatbot alt klasörünü ekle
-        base_path = "TürkiyeChatbot" if os.path.exists("TürkiyeChatbot") else "."
-        faiss_path = os.path.join(base_path, "turkiye_index.faiss")
-        npy_path = os.path.join(base_path, "turkiye_files.npy")
-        
-        if not os.path.exists(faiss_path):
-            st.error(f"❌ turkiye_index.faiss dosyası bulunamadı!")
-            st.stop()
-        if not os.path.exists(npy_path):
-            st.error(f"❌ turkiye_files.npy dosyası bulunamadı!")
-            st.stop()
-        
-        model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
-        index = faiss.read_index(faiss_path)
-        file_names = np.load(npy_path, allow_pickle=True)
-        return model, index, file_names
-    except Exception as e:
-        st.error(f"❌ Model yüklenirken hata: {e}")
-        st.stop()
+def start_engine():
+    """Motoru arka planda yüklemeye başlar; tüm oturumlar aynı Readiness'i paylaşır.
+
+    Model ve index süreçte tek kopyadır (resources.REGISTRY); oturumlara
+    yalnızca aynı motorun referansı verilir, session_state'e kopya konmaz.
+    """
+    return Readiness().start(build_engine)
 
-# Session state ile güvenli bileşen erişimi
-if "model" not in st.session_state:
-    st.session_state.model, st.session_state.index, st.session_state.file_names = load_components()
+
+@st.cache_resource
+def start_metrics_server():
+    """/metrics uç noktası; Streamlit'in kendi HTTP sunucusuna rota eklenemediği için ayrı port."""
+    return serve(METRICS_PORT)
+
+
+if METRICS_PORT:
+    start_metrics_server()
+
+# Pasaj index'i yoksa dosya düzeyindeki eski index kullanılır
+if not INDEX_PATH.exists() and not CHUNK_INDEX_PATH.exists():
+    st.error(f"❌ {CHUNK_INDEX_PATH.name} / {INDEX_PATH.name} dosyası bulunamadı!")
+    st.stop()
+if not CHUNK_META_PATH.exists() and not FILES_PATH.exists():
+    st.error(f"❌ {CHUNK_META_PATH.name} / {FILES_PATH.name} dosyası bulunamadı!")
+    st.stop()
+
+st.title("🇹🇷 Türkiye Bilgi Chatbot")
+st.write("Temizlenmiş dokümanlardan bilgiye dayalı olarak yanıt verir.")
+
+# Tüm oturumlar aynı motoru kullanır; hazırsa beklemeden döner
+readiness = start_engine()
+try:
+    with st.spinner("⏳ Sistem hazırlanıyor..."):
+        engine = readiness.wait()
+except Exception as e:
+    # Başarısız yükleme önbellekte kalmasın; sonraki çalıştırma yeniden dener
+    start_engine.clear()
+    st.error(f"❌ Model yüklenirken hata: {e}")
+    st.stop()
 
 # -----------------------------
 # Benzer içerik arama
 # -----------------------------
-def get_relevant_texts(query, top_k=2):
-    query_embedding = st.session_state.model.encode([query])
-    distances, indices = st.session_state.index.search(np.array(query_embedding).astype("float32"), top_k)
-    relevant_files = [st.session_state.file_names[i] for i in indices[0]]
-    return relevant_files
+def get_relevant_texts(query, top_k=None):
+    return engine.retrieve(query, top_k)
 
 # -----------------------------
 # Cevap üretimi (RAG)
 # -----------------------------
 def generate_answer(query):
+    """(yanıt, kaynak başlıkları) döndürür."""
     try:
-        relevant_files = get_relevant_texts(query)
-        context = ""
-        # Streamlit Cloud için dosya yolu
-        import os
-        docs_path = os.path.join("TürkiyeChatbot", "docs", "temizlenmis") if os.path.exists("TürkiyeChatbot") else "docs/temizlenmis"
-        for f in relevant_files:
-            file_path = os.path.join(docs_path, f)
-            with open(file_path, "r", encoding="utf-8") as file:
-                context += file.read() + "\n\n"
-
-        # Uzun bağlam durumunda kesme (isteğe bağlı güvenlik katmanı)
-        if len(context) > 8000:
-            context = context[:8000]
-
-        prompt = f"""
-        Aşağıda Türkiye hakkında bazı bilgiler ve bir kullanıcı sorusu var.
-        Soruyu bu bilgilerden yararlanarak yanıtla.
-        Cevabın doğal, kısa ve bilgilendirici olsun.
-
-        Bilgiler:
-        {context}
-
-        Soru: {query}
-        """
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.choices[0].message.content
+        answer = engine.answer(query, session_id, collection)
+        return answer.text, answer.sources
     except Exception as e:
-        return f"❌ Hata oluştu: {e}"
+        return f"❌ Hata oluştu: {e}", []
 
 # -----------------------------
 # Streamlit Arayüzü
 # -----------------------------
-st.title("🇹🇷 Türkiye Bilgi Chatbot")
-st.write("Temizlenmiş dokümanlardan bilgiye dayalı olarak yanıt verir.")
-
 # Başarı mesajı
 st.success("✅ Sistem hazır! Sorularınızı sorabilirsiniz.")
+st.caption(f"⏱️ Açılış: {TIMINGS.format()}")
+st.caption(f"🧠 Bellek: {format_memory(REGISTRY.memory())}")
+
+# Oturumda yalnızca kimlik tutulur; geçmiş (son turlar + eski turların özeti) motordadır
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+conversation = engine.conversations.get(session_id)
+if conversation.summary:
+    st.caption(f"🗂️ Önceki konuşmanın özeti: {conversation.summary}")
+for turn in list(conversation.turns):
+    st.chat_message("user").markdown(turn.question)
+    st.chat_message("assistant").markdown(turn.answer)
+
+# Derlenmiş koleksiyon varsa (bkz. collection.py) aranacak korpus seçilebilir
+collection = None
+collection_names = engine.collections.names() if engine.collections is not None else []
+if collection_names:
+    choice = st.selectbox("📚 Koleksiyon", ["Varsayılan"] + collection_names)
+    collection = None if choice == "Varsayılan" else choice
 
 user_input = st.text_input("Sorunuzu yazın:", placeholder="Örneğin: Türkiye'nin başkenti neresidir?")
 
 if st.button("Sor"):
-    if user_input:
-        with st.spinner("Yanıt üretiliyor..."):
-            answer = generate_answer(user_input)
-            st.markdown(f"**Yanıt:**\n\n{answer}")
-    else:
-        st.warning("Lütfen bir soru yazın.")
+    # Bu isteğin aşama süreleri hata ayıklama panelinde gösterilir
+    with METRICS.trace() as spans:
+        if user_input and STREAMING:
+            try:
+                with st.spinner("Yanıt üretiliyor..."):
+                    answer = engine.answer_stream(user_input, session_id, collection)
+                st.markdown("**Yanıt:**")
+                if answer.stream is None:
+                    st.markdown(answer.text)
+                else:
+                    st.write_stream(answer.stream)
+                    if answer.timing.ttft is not None:
+                        st.caption(f"⏱️ İlk token: {answer.timing.ttft * 1000:.0f} ms · "
+                                   f"Toplam: {answer.timing.total * 1000:.0f} ms")
+                if answer.sources:
+                    st.caption("📚 Kaynaklar: " + ", ".join(answer.sources))
+                if answer.context is not None:
+                    st.caption(f"🧮 Bağlam: {answer.context.tokens} / {answer.context.budget} token")
+            except Exception as e:
+                st.error(f"❌ Hata oluştu: {e}")
+        elif user_input:
+            with st.spinner("Yanıt üretiliyor..."):
+                answer, sources = generate_answer(user_input)
+                st.markdown(f"**Yanıt:**\n\n{answer}")
+                if sources:
+                    st.caption("📚 Kaynaklar: " + ", ".join(sources))
+        else:
+            st.warning("Lütfen bir soru yazın.")
+    st.session_state.last_trace = spans
+
+if conversation.turns and st.button("🧹 Sohbeti temizle"):
+    engine.conversations.drop(session_id)
+    st.rerun()
 
+# -----------------------------
+# Hata ayıklama paneli (TURKIYE_DEBUG_PANEL=1 ya da ?debug=1)
+# -----------------------------
+if DEBUG_PANEL or st.query_params.get("debug") == "1":
+    with st.expander("🔬 Ölçümler"):
+        trace = st.session_state.get("last_trace")
+        if trace:
+            st.markdown("**Son istek**")
+            st.table([{"aşama": name, "ms": round(seconds * 1000, 2)} for name, seconds in trace])
+        st.markdown("**Tüm istekler**")
+        st.table([{"aşama": name, **values} for name, values in METRICS.summary().items()])
+        st.json(METRICS.cache_stats())
@@ -0,0 +1,103 @@
+"""Testler için ortak yardımcılar.
+
+Modüller TürkiyeChatbot klasöründen düz import edildiği için
+testler de bu klasörü sys.path'e ekler. Embedding modeli yerine kelime
+karmasından vektör üreten küçük bir sahte model kullanılır; ağ gerekmez.
+"""
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class HashingModel:
+    """SentenceTransformer.encode arayüzünü taklit eden deterministik model."""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        self.calls += 1
+        single = isinstance(texts, str)
+        out = np.zeros((1 if single else len(texts), self.dim), dtype="float32")
+        for row, text in enumerate([texts] if single else texts):
+            for word in text.lower().split():
+                out[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out = out / np.where(norms == 0, 1, norms)
+        return out[0] if single else out
+
+
+@pytest.fixture
+def model():
+    return HashingModel()
+
+
+TOPICS = ["ankara", "istanbul", "izmir", "bursa", "antalya", "konya", "trabzon", "erzurum"]
+
+
+def write_docs(folder, count=40):
+    folder.mkdir()
+    for i in range(count):
+        topic = TOPICS[i % len(TOPICS)]
+        sentences = [f"{topic.title()} şehri hakkında {i}. bölümün {j}. cümlesi burada yer alır." for j in range(12)]
+        (folder / f"bolum_{i:02d}.txt").write_text(f"{topic.title()} {i}\n\n" + " ".join(sentences), encoding="utf-8")
+
+
+@pytest.fixture
+def build(model, tmp_path):
+    """Geçici klasörde küçük bir pasaj index'i derleyen fonksiyon; load_chunk_store yollarını döndürür."""
+    from build_index import build_chunk_index
+
+    write_docs(tmp_path / "docs")
+    paths = {
+        "index_path": tmp_path / "chunks.faiss",
+        "meta_path": tmp_path / "chunks.meta",
+        "corpus_path": tmp_path / "corpus.bin",
+        "bm25_path": tmp_path / "bm25.npz",
+    }
+
+    def run(kind="flat"):
+        build_chunk_index(model, tmp_path / "docs", chunk_size=200, overlap=40, index_spec=kind,
+                          checkpoint_dir=tmp_path / "checkpoint", workers=1, **paths)
+        return paths
+
+    return run
+
+
+@pytest.fixture
+def handle(build):
+    """Derlenmiş index'i tutan resources.IndexHandle."""
+    from resources import IndexHandle
+    from retrieval import load_chunk_store
+
+    index, store = load_chunk_store(0, True, **build())
+    yield IndexHandle(index, store)
+    store.close()
+
+
+class FakeClock:
+    """time.monotonic yerine geçen, elle ilerletilen saat."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from answer_cache import SemanticAnswerCache
+from fake_llm import FakeStreamingClient
+from rag_engine import RagEngine
+
+
+def _vector(*values):
+    return np.asarray(values, dtype="float32")
+
+
+def test_hit_above_threshold_and_miss_below(clock):
+    cache = SemanticAnswerCache(threshold=0.9, clock=clock)
+    cache.put(_vector(1, 0, 0), "başkent?", "Ankara", ["genel"])
+
+    hit = cache.get(_vector(1, 0.1, 0))
+    assert hit is not None and hit.answer == "Ankara" and hit.sources == ["genel"]
+    assert cache.get(_vector(0, 1, 0)) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SemanticAnswerCache(threshold=0.9, ttl=60, clock=clock)
+    cache.put(_vector(1, 0), "eski", "eski yanıt", [])
+    clock.advance(30)
+    cache.put(_vector(0, 1), "yeni", "yeni yanıt", [])
+    clock.advance(31)
+
+    assert cache.get(_vector(1, 0)) is None
+    assert cache.get(_vector(0, 1)).answer == "yeni yanıt"
+    assert len(cache) == 1
+
+
+def test_oldest_entry_is_evicted_at_maxsize(clock):
+    cache = SemanticAnswerCache(threshold=0.99, maxsize=3, clock=clock)
+    basis = np.eye(5, dtype="float32")
+    for i in range(5):
+        cache.put(basis[i], f"soru {i}", f"yanıt {i}", [])
+        clock.advance(1)
+
+    assert len(cache) == 3
+    assert cache.get(basis[0]) is None and cache.get(basis[1]) is None
+    assert [cache.get(basis[i]).answer for i in (2, 3, 4)] == ["yanıt 2", "yanıt 3", "yanıt 4"]
+    # Halka tampon ayrıldığı boyutta kalır
+    assert cache._vectors.shape == (3, 5)
+
+
+def test_index_version_change_clears_entries(clock):
+    cache = SemanticAnswerCache(threshold=0.9, clock=clock)
+    cache.put(_vector(1, 0), "başkent?", "Ankara", [], index_version="v1")
+    assert cache.get(_vector(1, 0), index_version="v1") is not None
+    assert cache.get(_vector(1, 0), index_version="v2") is None
+    assert len(cache) == 0
+
+
+@pytest.fixture
+def engine(model, handle, clock):
+    client = FakeStreamingClient("Ankara şehri hakkında bilgi.")
+    return RagEngine(model, handle.index, handle.store, client, answer_cache=SemanticAnswerCache(ttl=60, clock=clock))
+
+
+def test_engine_answers_from_cache_until_ttl(engine, clock):
+    first = engine.answer("Ankara şehri nasıl bir yer?")
+    second = engine.answer("Ankara şehri nasıl bir yer?")
+    assert not first.cached and second.cached
+    assert second.text == first.text and second.sources == first.sources
+    assert len(engine.client.calls) == 1
+
+    clock.advance(61)
+    third = engine.answer("Ankara şehri nasıl bir yer?")
+    assert not third.cached
+    assert len(engine.client.calls) == 2
+
+
+def test_engine_does_not_cache_unrelated_questions(engine):
+    engine.answer("Ankara şehri nasıl bir yer?")
+    other = engine.answer("Trabzon şehri hakkında bilgi ver")
+    assert not other.cached
+    assert len(engine.client.calls) == 2
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from api_server import RagService, create_app
+from config import MAX_TOP_K
+from fake_llm import FakeAsyncClient
+
+
+class RecordingEngine:
+    """retrieve çağrılarını kaydeden, index'siz motor."""
+
+    top_k = 3
+    batcher = None
+    collections = None
+
+    def __init__(self):
+        self.requested = []
+
+    def retrieve(self, question, top_k=None, collection=None):
+        self.requested.append(top_k)
+        return []
+
+
+def _post(engine, body):
+    async def run():
+        service = RagService(engine, FakeAsyncClient(), workers=1)
+        async with TestClient(TestServer(create_app(service))) as client:
+            response = await client.post("/retrieve", json=body)
+            return response.status
+
+    return asyncio.run(run())
+
+
+def test_top_k_defaults_to_engine():
+    engine = RecordingEngine()
+    assert _post(engine, {"question": "başkent"}) == 200
+    assert engine.requested == [3]
+
+
+@pytest.mark.parametrize("top_k", ["üç", [1], 0, -5, 2.5, True, "5"])
+def test_invalid_top_k_is_rejected(top_k):
+    engine = RecordingEngine()
+    assert _post(engine, {"question": "başkent", "top_k": top_k}) == 400
+    assert engine.requested == []
+
+
+def test_large_top_k_is_clamped():
+    engine = RecordingEngine()
+    assert _post(engine, {"question": "başkent", "top_k": 10**9}) == 200
+    assert engine.requested == [MAX_TOP_K]
@@ -0,0 +1,29 @@
+import numpy as np
+
+from batching import MicroBatcher
+
+
+def test_batch_results_match_single_queries(model, handle):
+    batcher = MicroBatcher(model, handle, max_batch_size=8, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(f"{topic} şehri", 2) for topic in ("Ankara", "İzmir", "Konya")]
+        embedding = batcher.submit("Ankara şehri")
+        results = [f.result(timeout=5) for f in futures]
+        assert all(len(passages) == 2 for passages in results)
+        assert np.allclose(embedding.result(timeout=5), model.encode(["Ankara şehri"], normalize_embeddings=True)[0])
+    finally:
+        batcher.close()
+
+
+def test_cancelled_request_does_not_fail_its_batch(model, handle):
+    # Uzun pencere: tüm istekler aynı toplu işe düşer, ilki işlenmeden iptal edilir
+    batcher = MicroBatcher(model, handle, max_batch_size=8, max_wait_ms=200)
+    try:
+        cancelled = batcher.submit("Ankara şehri", 2)
+        others = [batcher.submit("İzmir şehri", 2), batcher.submit("Konya şehri")]
+        assert cancelled.cancel()
+        for future in others:
+            assert future.exception(timeout=5) is None
+        assert batcher.stats()["items"] == 2
+    finally:
+        batcher.close()
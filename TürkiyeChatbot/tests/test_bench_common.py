@@ -0,0 +1,26 @@
+from bench_common import make_retrievers, print_table
+from retrieval import load_chunk_store
+
+
+def test_retrievers_share_one_interface_and_leave_store_untouched(model, build):
+    index, store = load_chunk_store(0, True, **build())
+    try:
+        bm25 = store.bm25
+        retrievers = make_retrievers(model, index, store)
+        queries = ["Ankara şehri", "Konya şehri hakkında"]
+        for name, retrieve in retrievers.items():
+            results = retrieve(queries, 3)
+            assert len(results) == 2, name
+            assert all(1 <= len(ids) <= 3 and set(ids) <= set(store.meta.ids.tolist()) for ids in results), name
+        assert store.bm25 is bm25
+    finally:
+        store.close()
+
+
+def test_print_table_aligns_columns(capsys):
+    print_table([{"ad": "dense", "p50_ms": 1.5}, {"ad": "bm25"}])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["ad", "p50_ms"]
+    assert lines[1].index("1.5") == lines[0].index("p50_ms")
+    print_table([])
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,133 @@
+import copy
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import collection as collection_module
+from collection import Collection, ShardCache, build_collection, shard_paths
+from retrieval import load_chunk_store, search_batch
+
+QUERIES = ["Ankara şehri hakkında", "İzmir 18. bölümün cümlesi", "Trabzon ve Erzurum", "Konya 5"]
+
+
+@pytest.fixture
+def loader(build):
+    paths = build()
+
+    def load():
+        load.calls += 1
+        return load_chunk_store(0, True, **paths)
+
+    load.calls = 0
+    return load
+
+
+def test_lru_eviction_skips_pinned_shards(loader):
+    cache = ShardCache(max_shards=2)
+    for key in (("genel", "a"), ("genel", "b")):
+        cache.pin(key, loader)
+        cache.unpin(key)
+    b = cache.pin(("genel", "b"), loader)
+    cache.unpin(("genel", "b"))
+    a = cache.pin(("genel", "a"), loader)  # a sabit ve en yeni; en eski sabit olmayan b
+
+    cache.pin(("genel", "c"), loader)
+    assert cache.stats()["resident"] == ["genel/a", "genel/c"]
+    assert b.store is None and a.store is not None
+
+    # Hepsi sabitken sınır geçici olarak aşılır; bırakılan ilk uygun parça çıkarılır
+    cache.pin(("genel", "d"), loader)
+    assert len(cache) == 3 and cache.evicted == 1
+    cache.unpin(("genel", "c"))
+    assert cache.stats()["resident"] == ["genel/a", "genel/d"]
+    assert cache.evicted == 2
+
+    cache.unpin(("genel", "a"))
+    cache.unpin(("genel", "d"))
+    assert len(cache) == 2
+    cache.close()
+    assert len(cache) == 0 and a.store is None
+
+
+def test_hits_move_shards_to_the_back(loader):
+    cache = ShardCache(max_shards=2)
+    for key in (("genel", "a"), ("genel", "b"), ("genel", "a"), ("genel", "c")):
+        cache.pin(key, loader)
+        cache.unpin(key)
+    stats = cache.stats()
+    assert stats["resident"] == ["genel/a", "genel/c"]
+    assert (stats["hits"], stats["misses"], stats["evicted"]) == (1, 3, 1)
+    cache.close()
+
+
+def test_concurrent_pins_load_a_shard_once(loader):
+    cache = ShardCache(max_shards=2)
+    barrier = threading.Barrier(8)
+
+    def pin(_):
+        barrier.wait()
+        return cache.pin(("genel", "a"), loader)
+
+    with ThreadPoolExecutor(8) as pool:
+        handles = list(pool.map(pin, range(8)))
+    assert loader.calls == 1 and len({id(h) for h in handles}) == 1
+    for _ in handles:
+        cache.unpin(("genel", "a"))
+    cache.close()
+
+
+@pytest.fixture
+def sharded(model, build, tmp_path, monkeypatch):
+    """Aynı dokümanlarla hem tek index hem üç parçalı koleksiyon derler."""
+    monkeypatch.setattr(collection_module, "EMBED_CHECKPOINT_DIR", tmp_path / "collection-checkpoint")
+    paths = build()
+    (tmp_path / "collection.json").write_text(
+        json.dumps({"shards": 3, "index": "flat", "chunk_size": 200, "overlap": 40}), encoding="utf-8")
+    manifest, _ = build_collection(model, tmp_path, workers=1)
+    assert sorted(manifest["shards"]) == ["000", "001", "002"]
+    assert all(shard_paths(tmp_path, shard)["index_path"].exists() for shard in range(3))
+
+    index, store = load_chunk_store(0, True, **paths)
+    cache = ShardCache()
+    pool = ThreadPoolExecutor(3)
+    yield tmp_path, index, store, cache, pool
+    cache.close()
+    pool.shutdown()
+    store.close()
+
+
+def _keys(passages, above=None):
+    if above is None:
+        return [(p.file, p.start) for p in passages]
+    return {(p.file, p.start) for p in passages if p.score > above + 1e-6}
+
+
+def test_dense_merge_matches_a_single_index(model, sharded):
+    root, index, store, cache, pool = sharded
+    dense = copy.copy(store)
+    dense.bm25 = None
+    collection = Collection("genel", root, cache, pool, hybrid=False)
+    for k in (1, 5, 20):
+        merged = collection.search_batch(model, QUERIES, k)
+        single = search_batch(model, index, dense, QUERIES, k)
+        for got, expected in zip(merged, single):
+            assert [p.score for p in got] == pytest.approx([p.score for p in expected])
+            # Eşit uzaklıklar parçalarda farklı sırada gelebilir; kesim sınırındaki eşitlikler hariç aynı pasajlar
+            cutoff = expected[-1].score
+            assert _keys(got, above=cutoff) == _keys(expected, above=cutoff)
+    assert cache.stats()["misses"] == 3
+
+
+def test_hybrid_merge_spans_shards(model, sharded):
+    root, _, store, cache, pool = sharded
+    collection = Collection("genel", root, cache, pool, hybrid=True)
+    passages = collection.search(model, "Trabzon şehri hakkında", 10)
+    assert len(passages) == 10
+    assert len(set(_keys(passages))) == 10
+    assert [p.score for p in passages] == sorted((p.score for p in passages), reverse=True)
+    assert "Trabzon" in passages[0].text
+    # Pasajlar birden çok parçadan gelir
+    names = {p.file for p in passages}
+    assert len({collection_module.shard_of(name, 3) for name in names}) > 1
@@ -0,0 +1,32 @@
+import pytest
+
+from context_builder import ContextBuilder, _estimate_tokens, truncate
+
+
+def _words(text):
+    return len(text.split())
+
+
+@pytest.mark.parametrize("count_tokens", [_estimate_tokens, _words, lambda t: len(t.encode("utf-8"))])
+@pytest.mark.parametrize("budget", [1, 5, 17, 40])
+def test_truncate_without_sentence_boundary_fits_budget(count_tokens, budget):
+    # Tek ve uzun bir "cümle"; token yoğunluğu metin boyunca değişir
+    text = "a " * 200 + "çok uzun kelimeler burada " * 50 + "ğüşiöç" * 100
+    out = truncate(text, budget, count_tokens)
+    assert out and count_tokens(out) <= budget
+    assert text.startswith(out)
+    assert count_tokens(text[:len(out) + 2].rstrip()) > budget or len(out) + 2 > len(text)
+
+
+def test_truncate_keeps_whole_sentences():
+    text = "Ankara başkenttir. İstanbul en kalabalık şehirdir. İzmir Ege'dedir."
+    assert truncate(text, 6, _words) == "Ankara başkenttir. İstanbul en kalabalık şehirdir."
+
+
+def test_oversized_best_passage_is_truncated_within_budget():
+    from types import SimpleNamespace
+
+    passage = SimpleNamespace(title="t", text="x" * 5000, score=1.0, file="a", start=0, end=5000)
+    context = ContextBuilder(budget=100, count_tokens=_estimate_tokens).build([passage])
+    assert context.passages == [passage]
+    assert 0 < context.tokens <= 100
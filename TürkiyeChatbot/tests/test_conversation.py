@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from conversation import ConversationStore, is_follow_up
+from fake_llm import FakeStreamingClient
+
+
+@pytest.mark.parametrize("question", [
+    "peki nüfusu?",
+    "Ya ekonomisi nasıl?",
+    "Onun nüfusu ne kadar?",
+    "Başkentte kaç kişi yaşıyor, orada metro var mı?",
+    "Neden?",
+])
+def test_follow_up_questions(question):
+    assert is_follow_up(question)
+
+
+@pytest.mark.parametrize("question", [
+    "TEKNOFEST nedir?",
+    "Göbeklitepe nerededir?",
+    "Türkiye'nin başkenti neresidir?",
+    "Kapadokya",
+    "",
+])
+def test_standalone_questions(question):
+    assert not is_follow_up(question)
+
+
+@pytest.fixture
+def conversation(clock):
+    store = ConversationStore(clock=clock)
+    conversation = store.get("oturum")
+    store.record(conversation, "Türkiye'nin başkenti neresidir?", "Türkiye'nin başkenti neresidir?",
+                 "Başkent Ankara'dır.")
+    return store, conversation
+
+
+def test_short_entity_question_is_not_rewritten(conversation):
+    store, conversation = conversation
+    client = FakeStreamingClient("yeniden yazılmış sorgu")
+    assert store.standalone(conversation, "Göbeklitepe nerededir?", client, "stub") == "Göbeklitepe nerededir?"
+    assert store.standalone(conversation, "TEKNOFEST nedir?") == "TEKNOFEST nedir?"
+    assert client.calls == []
+
+
+def test_follow_up_is_combined_without_a_client(conversation):
+    store, conversation = conversation
+    query = store.standalone(conversation, "peki nüfusu?")
+    assert query == "Türkiye'nin başkenti neresidir? nüfusu?"
+
+
+def test_follow_up_is_rewritten_with_a_client(conversation):
+    store, conversation = conversation
+    client = FakeStreamingClient("Ankara'nın nüfusu")
+    assert store.standalone(conversation, "peki nüfusu?", client, "stub") == "Ankara'nın nüfusu"
+    assert len(client.calls) == 1
+
+
+class LockProbeClient:
+    """Özet çağrısı sırasında oturum kilidinin tutulup tutulmadığını kaydeder."""
+
+    def __init__(self, conversation):
+        self.conversation = conversation
+        self.locked = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.locked.append(self.conversation.lock.locked())
+        message = SimpleNamespace(content="Başkent Ankara; nüfus soruldu.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_old_turns_are_summarized_outside_the_conversation_lock(clock):
+    store = ConversationStore(max_turns=2, clock=clock)
+    conversation = store.get("oturum")
+    client = LockProbeClient(conversation)
+    for i in range(3):
+        store.record(conversation, f"soru {i}", f"soru {i}", f"yanıt {i}.", client, "stub")
+    assert client.locked == [False]
+    assert conversation.summary == "Başkent Ankara; nüfus soruldu."
+    assert [t.question for t in conversation.turns] == ["soru 2"]
+    assert not conversation.folding and store.stats()["summarized"] == 1
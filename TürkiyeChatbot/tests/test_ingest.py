@@ -0,0 +1,45 @@
+import pytest
+
+from ingest import iter_documents, split_sections, Section
+
+
+def _lines(text):
+    return text.splitlines(keepends=True)
+
+
+def test_sections_follow_headers():
+    text = "giriş\n# Tarih\nbir\n\niki\n== Coğrafya ==\nüç\n"
+    assert list(split_sections(_lines(text), "kaynak")) == [
+        Section("kaynak", "giriş"), Section("Tarih", "bir\n\niki"), Section("Coğrafya", "üç")]
+
+
+def test_section_without_blank_lines_is_split_at_line_boundaries():
+    lines = [f"satır {i:04d} " + "x" * 40 + "\n" for i in range(1000)]
+    sections = list(split_sections(lines, "uzun", max_chars=500))
+    assert len(sections) > 1
+    assert all(len(s.text) <= 500 and s.title == "uzun" for s in sections)
+    assert "".join(s.text + "\n" for s in sections) == "".join(lines)
+
+
+def test_split_prefers_paragraph_boundaries():
+    paragraph = "cümle " * 30 + "\n"
+    lines = [paragraph, paragraph, "\n", paragraph, paragraph, "\n", paragraph]
+    sections = list(split_sections(lines, "t", max_chars=2 * len(paragraph) + 10))
+    assert [s.text.count("cümle") for s in sections] == [60, 60, 30]
+
+
+def test_single_long_line_is_bounded():
+    sections = list(split_sections(["kelime " * 10_000], "t", max_chars=1000))
+    assert all(len(s.text) <= 1000 for s in sections)
+    assert sum(s.text.count("kelime") for s in sections) == 10_000
+
+
+@pytest.mark.parametrize("titles, names", [
+    (["Tarih", "Tarih", "Tarih"], ["turkiye_tarih", "turkiye_tarih_2", "turkiye_tarih_3"]),
+    (["Tarih 2", "Tarih", "Tarih"], ["turkiye_tarih_2", "turkiye_tarih", "turkiye_tarih_3"]),
+    (["Tarih", "Tarih", "Tarih 2"], ["turkiye_tarih", "turkiye_tarih_2", "turkiye_tarih_2_2"]),
+    (["🇹🇷", "!"], ["turkiye_bolum", "turkiye_bolum_2"]),
+])
+def test_document_names_are_unique(titles, names):
+    documents = list(iter_documents(Section(t, "metin") for t in titles))
+    assert [name for name, _ in documents] == [n + ".txt" for n in names]
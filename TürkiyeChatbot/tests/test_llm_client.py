@@ -0,0 +1,234 @@
+import asyncio
+import gc
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from fake_llm import StubServer
+from llm import stream_chat
+from llm_client import (
+    AsyncResilientClient, CircuitBreaker, CircuitOpenError, DeadlineExceeded, ResilientClient, RetryPolicy,
+    create_async_client, create_client,
+)
+
+MESSAGES = [{"role": "user", "content": "Türkiye'nin başkenti neresidir?"}]
+
+
+@pytest.fixture(scope="module")
+def stub():
+    with StubServer(first_token_delay=0.01, tokens_per_second=1000, seed=0) as server:
+        yield server
+
+
+@pytest.fixture
+def server(stub):
+    defaults = dict(stub.faults)
+    yield stub
+    stub.faults.update(defaults)
+
+
+def _client(server, **kwargs):
+    kwargs.setdefault("policy", RetryPolicy(retries=10, backoff=0.001, max_backoff=0.01, rng=random.Random(0)))
+    return create_client(api_key="stub", base_url=server.url, **kwargs)
+
+
+def _ask(client, **kwargs):
+    return client.chat.completions.create(model="stub", messages=MESSAGES, **kwargs)
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_transient_errors_are_retried(server, status):
+    server.faults.update(error_rate=0.5, error_status=status)
+    client = _client(server)
+    replies = [_ask(client, user=str(i)) for i in range(10)]
+    assert all(r.choices[0].message.content for r in replies)
+    stats = client.stats()
+    assert stats["retries"] > 0
+    assert stats["failures"] == 0
+    assert stats["breaker"] == "closed"
+
+
+def test_client_errors_are_not_retried(server):
+    server.faults.update(error_rate=1.0, error_status=400)
+    client = _client(server)
+    with pytest.raises(Exception) as info:
+        _ask(client)
+    assert getattr(info.value, "status_code", None) == 400
+    stats = client.stats()
+    assert stats["upstream"] == 1 and stats["retries"] == 0
+    # 4xx üst akışın sağlıklı olduğunu gösterir; devre açılmaz
+    assert client.breaker.failures == 0
+
+
+def test_deadline_bounds_a_slow_upstream(server):
+    server.faults.update(first_token_delay=2.0)
+    client = _client(server, timeout=0.3)
+    started = time.monotonic()
+    with pytest.raises(Exception):
+        _ask(client)
+    assert time.monotonic() - started < 1.0
+
+
+def test_deadline_includes_retries(clock):
+    class Failing:
+        def __init__(self):
+            self.calls = 0
+            self.chat = self
+            self.completions = self
+
+        def create(self, **kwargs):
+            self.calls += 1
+            raise ConnectionError("bağlantı koptu")
+
+    upstream = Failing()
+    client = ResilientClient(upstream, timeout=1.0, policy=RetryPolicy(retries=100, backoff=0.2, max_backoff=0.2),
+                             breaker=CircuitBreaker(threshold=1000), clock=clock, sleep=clock.advance)
+    with pytest.raises((ConnectionError, DeadlineExceeded)):
+        _ask(client)
+    # Beklemeler sahte saatte 1 saniyeyi aşamaz; deneme sayısı süre sınırıyla kısıtlıdır
+    assert clock.now - 1000.0 <= 1.0
+    assert upstream.calls < 100
+
+
+def test_breaker_opens_probes_and_recovers(server, clock):
+    server.faults.update(error_rate=1.0, error_status=500)
+    breaker = CircuitBreaker(threshold=3, reset_timeout=30, clock=clock)
+    client = _client(server, breaker=breaker, policy=RetryPolicy(retries=0))
+    for _ in range(5):
+        with pytest.raises(Exception):
+            _ask(client)
+    stats = client.stats()
+    assert (stats["upstream"], stats["rejected"], stats["breaker"]) == (3, 2, "open")
+    with pytest.raises(CircuitOpenError):
+        _ask(client)
+
+    # Yarı açık: tek deneme çağrısı geçer; başarısızsa devre yeniden açılır
+    clock.advance(30)
+    assert breaker.state == "half-open"
+    with pytest.raises(Exception) as info:
+        _ask(client)
+    assert not isinstance(info.value, CircuitOpenError)
+    assert breaker.state == "open" and breaker.trips == 2
+
+    clock.advance(30)
+    server.faults.update(error_rate=0.0)
+    assert _ask(client).choices[0].message.content
+    assert breaker.state == "closed"
+
+
+def test_half_open_admits_a_single_probe(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=5, clock=clock)
+    breaker.failure()
+    assert not breaker.allow()
+    clock.advance(5)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_identical_concurrent_calls_are_coalesced(server, stream):
+    server.faults.update(first_token_delay=0.3)
+    client = _client(server)
+    before = server.stats["requests"]
+
+    def ask(_):
+        if stream:
+            return "".join(stream_chat(client, MESSAGES, model="stub"))
+        return _ask(client).choices[0].message.content
+
+    with ThreadPoolExecutor(16) as pool:
+        answers = list(pool.map(ask, range(16)))
+    assert server.stats["requests"] - before == 1
+    assert len(set(answers)) == 1 and answers[0]
+    assert client.stats()["coalesced"] == 15
+
+
+def test_async_client_retries_and_coalesces(server):
+    server.faults.update(first_token_delay=0.1, error_rate=0.3, error_status=429)
+
+    async def run():
+        client = create_async_client(api_key="stub", base_url=server.url,
+                                     policy=RetryPolicy(retries=10, backoff=0.001, max_backoff=0.01))
+        try:
+            replies = await asyncio.gather(*[client.chat.completions.create(model="stub", messages=MESSAGES)
+                                             for _ in range(16)])
+            return replies, client.stats()
+        finally:
+            await client.close()
+
+    replies, stats = asyncio.run(run())
+    assert all(r.choices[0].message.content for r in replies)
+    assert stats["coalesced"] == 15
+    assert stats["failures"] == 0
+
+
+def test_async_client_deadline(server):
+    server.faults.update(first_token_delay=2.0)
+
+    async def run():
+        client = create_async_client(api_key="stub", base_url=server.url, timeout=0.3)
+        try:
+            started = time.monotonic()
+            with pytest.raises(TimeoutError):
+                await client.chat.completions.create(model="stub", messages=MESSAGES)
+            return time.monotonic() - started
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()) < 1.0
+
+
+class SlowAsyncClient:
+    """Her çağrıda latency saniye bekleyen sahte AsyncOpenAI."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(choices=[])
+
+
+def test_async_attempt_timeout_counts_as_breaker_failure():
+    async def run():
+        client = AsyncResilientClient(SlowAsyncClient(1.0), timeout=0.05, policy=RetryPolicy(retries=0),
+                                      breaker=CircuitBreaker(threshold=2, reset_timeout=60), coalesce=False)
+        errors = []
+        for _ in range(4):
+            try:
+                await client.chat.completions.create(model="stub", messages=MESSAGES)
+            except (DeadlineExceeded, CircuitOpenError) as e:
+                errors.append(e)
+        return client, errors
+
+    client, errors = asyncio.run(run())
+    assert [type(e) for e in errors] == [DeadlineExceeded, DeadlineExceeded, CircuitOpenError, CircuitOpenError]
+    assert isinstance(errors[0].__cause__, TimeoutError)
+    assert client.breaker.state == "open"
+    assert client.client.calls == 2
+
+
+def test_async_coalesced_waiters_time_out_cleanly():
+    async def run():
+        loop = asyncio.get_running_loop()
+        unhandled = []
+        loop.set_exception_handler(lambda _, context: unhandled.append(context["message"]))
+        client = AsyncResilientClient(SlowAsyncClient(1.0), timeout=0.05, policy=RetryPolicy(retries=0))
+        results = await asyncio.gather(*[client.chat.completions.create(model="stub", messages=MESSAGES)
+                                         for _ in range(4)], return_exceptions=True)
+        await asyncio.sleep(0.1)
+        gc.collect()
+        return results, unhandled, client
+
+    results, unhandled, client = asyncio.run(run())
+    assert all(isinstance(r, DeadlineExceeded) for r in results)
+    assert client.client.calls == 1 and not client._inflight
+    assert unhandled == []
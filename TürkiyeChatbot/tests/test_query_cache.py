@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from query_cache import EmbeddingCache
+
+
+def test_repeated_queries_are_not_reencoded(model):
+    cache = EmbeddingCache(8)
+    first = cache.encode(model, ["Ankara nerede?", "İzmir"], True)
+    second = cache.encode(model, ["  ankara   NEREDE? ", "İzmir"], True)
+    assert np.array_equal(first, second)
+    assert model.calls == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_saved_cache_is_reused_by_the_same_model(model, tmp_path):
+    path = tmp_path / "query_cache.npz"
+    cache = EmbeddingCache(8, model="m", backend="torch")
+    vectors = cache.encode(model, ["Ankara"], True)
+    cache.save(path)
+
+    restored = EmbeddingCache(8, path, model="m", backend="torch")
+    assert len(restored) == 1 and restored.dim == model.dim
+    assert np.array_equal(restored.encode(model, ["Ankara"], True), vectors)
+    assert model.calls == 1
+
+
+@pytest.mark.parametrize("model_name, backend", [("m", "onnx-int8"), ("başka-model", "torch")])
+def test_saved_cache_is_ignored_after_model_or_backend_change(model, tmp_path, model_name, backend):
+    path = tmp_path / "query_cache.npz"
+    cache = EmbeddingCache(8, model="m", backend="torch")
+    cache.encode(model, ["Ankara"], True)
+    cache.save(path)
+
+    with pytest.warns(UserWarning):
+        restored = EmbeddingCache(8, path, model=model_name, backend=backend)
+    assert len(restored) == 0
+
+
+def test_dimension_change_drops_stale_vectors(model):
+    small, large = type(model)(dim=16), type(model)(dim=32)
+    cache = EmbeddingCache(8)
+    cache.encode(small, ["Ankara"], True)
+    out = cache.encode(large, ["Ankara", "İzmir"], True)
+    assert out.shape == (2, 32)
+    assert cache.dim == 32 and len(cache) == 2
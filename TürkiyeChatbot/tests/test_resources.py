@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import resources
+from resources import IndexHandle, ResourceRegistry, check_sessions
+
+
+def test_sessions_share_model_and_index(monkeypatch, model, handle):
+    registry = ResourceRegistry()
+    monkeypatch.setattr(resources, "REGISTRY", registry)
+    registry.get("model", lambda: model)
+    registry.get("index", lambda: handle)
+
+    baseline, final, ok = check_sessions(50, tolerance_mb=16.0)
+
+    assert ok, f"RSS {baseline / 2**20:.1f} MB -> {final / 2**20:.1f} MB"
+    assert registry.get("index", None) is handle
+
+
+def test_registry_loads_once_under_contention():
+    registry = ResourceRegistry()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        values = list(pool.map(lambda _: registry.get("model", loader), range(32)))
+    assert len(loads) == 1
+    assert all(v is values[0] for v in values)
+
+
+def test_swap_closes_the_old_store_after_readers_leave(handle):
+    index, store = handle.index, handle.store
+    closed = []
+
+    class Store:
+        def close(self):
+            closed.append(True)
+
+    old = Store()
+    target = IndexHandle(index, old)
+    with target.read() as (_, current):
+        assert current is old
+    target.swap(index, store)
+    assert closed == [True] and target.store is store
@@ -0,0 +1,17 @@
+import pytest
+
+import retrieval
+from index_factory import KINDS
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("kind", KINDS)
+def test_every_index_kind_loads(model, build, kind, mmap):
+    index, store = retrieval.load_chunk_store(0, mmap, **build(kind))
+    try:
+        assert index.ntotal == len(store) > 0
+        passages = retrieval.search(model, index, store, "Ankara şehri hakkında", 3)
+        assert passages
+        assert all(p.text for p in passages)
+    finally:
+        store.close()
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from answer_cache import SemanticAnswerCache
+from fake_llm import FakeStreamingClient
+from llm import StreamTiming, stream_chat
+from rag_engine import RagEngine
+
+REPLY = "Türkiye'nin başkenti Ankara'dır ve 1923'ten beri başkenttir."
+MESSAGES = [{"role": "user", "content": "Başkent neresi?"}]
+
+
+def test_stream_yields_tokens_as_they_arrive():
+    client = FakeStreamingClient(REPLY, first_token_delay=0.05, token_delay=0.02)
+    timing = StreamTiming()
+    arrivals = []
+    for delta in stream_chat(client, MESSAGES, model="stub", timing=timing):
+        arrivals.append((time.perf_counter(), delta))
+
+    assert "".join(d for _, d in arrivals) == REPLY
+    assert len(arrivals) > 1
+    # İlk token tüm yanıttan önce gelir
+    assert timing.ttft < timing.total
+    assert arrivals[0][0] < arrivals[-1][0]
+    assert client.calls[0]["stream"] is True
+
+
+def test_stream_skips_empty_deltas():
+    client = FakeStreamingClient("")
+    assert list(stream_chat(client, MESSAGES, model="stub")) == []
+
+
+@pytest.fixture
+def engine(model, handle):
+    client = FakeStreamingClient(REPLY, token_delay=0.001)
+    return RagEngine(model, handle.index, handle.store, client, answer_cache=SemanticAnswerCache())
+
+
+def test_answer_stream_fills_text_and_cache(engine):
+    result = engine.answer_stream("Ankara şehri nasıl bir yer?")
+    assert result.text == "" and result.stream is not None
+    assert "".join(result.stream) == REPLY
+    assert result.text == REPLY
+    assert result.timing.ttft is not None
+    assert result.sources
+
+    cached = engine.answer_stream("Ankara şehri nasıl bir yer?")
+    assert cached.cached and cached.stream is None
+    assert cached.text == REPLY
+    assert len(engine.client.calls) == 1
+
+
+def test_unconsumed_stream_is_not_cached(engine):
+    result = engine.answer_stream("Ankara şehri nasıl bir yer?")
+    next(result.stream)
+    result.stream.close()
+    assert not engine.answer_stream("Ankara şehri nasıl bir yer?").cached
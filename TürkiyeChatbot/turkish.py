@@ -0,0 +1,83 @@
+"""Türkçe'ye özgü metin yardımcıları."""
+import os
+import re
+import sys
+import unicodedata
+import warnings
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def turkish_lower(text):
+    """Türkçe kurallarına uygun küçük harfe çevirme (İ -> i, I -> ı)."""
+    # str.lower() "İ" harfini "i̇" (i + birleşik nokta) yapar, "I" harfini "i" yapar; bu iki harf önce çevrilir.
+    # İki str.replace, tablo ile str.translate'ten belirgin biçimde hızlıdır (büyük korpuslarda önemli)
+    return text.replace("İ", "i").replace("I", "ı").lower()
+
+
+def normalize_query(text):
+    """Önbellek anahtarı için sorguyu normalleştirir: NFC, küçük harf, tek boşluk."""
+    text = unicodedata.normalize("NFC", text)
+    return _WHITESPACE.sub(" ", turkish_lower(text)).strip()
+
+
+# Kesme işaretinden sonraki ek atılır: "Türkiye'nin" -> "türkiye"
+_TOKEN = re.compile(r"(\w+)(?:['’]\w+)*")
+
+
+def tokenize(text, stopwords=frozenset()):
+    """Arama için kelimelere ayırır: NFC, Türkçe küçük harf, ek ve stopword atma."""
+    text = turkish_lower(unicodedata.normalize("NFC", text)).replace("\u0307", "")
+    return [token for token in _TOKEN.findall(text) if token not in stopwords]
+
+
+def _nltk_data_dirs():
+    """nltk.data.path'in varsayılanları; nltk import edilmeden aranır."""
+    dirs = [p for p in os.getenv("NLTK_DATA", "").split(os.pathsep) if p]
+    dirs.append(os.path.expanduser("~/nltk_data"))
+    for prefix in (sys.prefix, "/usr", "/usr/local"):
+        dirs += [os.path.join(prefix, sub) for sub in ("nltk_data", "share/nltk_data", "lib/nltk_data")]
+    return dirs
+
+
+def _read_stopwords_file():
+    """İndirilmiş listeyi doğrudan okur; yoksa None."""
+    for base in map(Path, _nltk_data_dirs()):
+        path = base / "corpora" / "stopwords" / "turkish"
+        if path.is_file():
+            return path.read_text(encoding="utf-8").split()
+        archive = base / "corpora" / "stopwords.zip"
+        if archive.is_file():
+            with zipfile.ZipFile(archive) as z:
+                if "stopwords/turkish" in z.namelist():
+                    return z.read("stopwords/turkish").decode("utf-8").split()
+    return None
+
+
+@lru_cache(maxsize=1)
+def turkish_stopwords():
+    """NLTK'nin Türkçe stopword listesi (frozenset; üyelik testi O(1)).
+
+    İndirilmiş liste nltk import edilmeden okunur (nltk'nin import'u
+    açılışa saniyeler ekler). Liste yoksa nltk ile indirilir; indirilemezse
+    uyarı verilir ve boş küme döner; BM25 yine çalışır, yalnızca sık
+    kelimeler idf ile bastırılır.
+    """
+    words = _read_stopwords_file()
+    if words is not None:
+        return frozenset(turkish_lower(w) for w in words)
+    try:
+        from nltk.corpus import stopwords
+        try:
+            words = stopwords.words("turkish")
+        except LookupError:
+            import nltk
+            nltk.download("stopwords", quiet=True)
+            words = stopwords.words("turkish")
+    except (ImportError, LookupError) as e:
+        warnings.warn(f"Türkçe stopword listesi yüklenemedi: {e}")
+        return frozenset()
+    return frozenset(turkish_lower(w) for w in words)